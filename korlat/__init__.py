@@ -1,5 +1,3 @@
-import abstraction
-import common
-import core
-import exception
-import tests
+from korlat.lazy import install
+
+install(__name__, ["abstraction", "common", "core", "exception", "tests", "tools"])
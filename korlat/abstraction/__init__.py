@@ -1,4 +1,3 @@
-import container
-import element
-import elementlist
-import widget
+from korlat.lazy import install
+
+install(__name__, ["container", "element", "elementlist", "fallback", "manifest", "widget"])
@@ -1,9 +1,106 @@
+from collections import Mapping, namedtuple
+
 from selenium.common.exceptions import NoSuchElementException
 
+from korlat.core.trace import traced
+
+
+class Locator(namedtuple("Locator", ["label", "clss", "args", "required"])):
+    """Locator is an Element declared as a class attribute of a Container (see :func:`declare`.)
+
+    Locators are immutable, so the locator table of a Container class is shared by all its instances and threads.
+
+    :var label: the label of the Element (the name of the class attribute.)
+    :var clss: the class of :class:`Element` to make.
+    :var args: the arguments to make the Element with, between the Container and the label (ie: strategy, identifier.)
+    :var required: whether the Element is required.
+    """
+    __slots__ = ()
+
+
+def declare(clss, *args):
+    """Declare an Element as a class attribute of a Container.
+
+    The Element is made (bound to the Container's :class:`WebApp`) the first time a Container instance uses it.
+
+    >>> class LoginContainer(Container):
+    >>>     username = required(Element, ID, "username")
+    >>>     login = declare(Element, ID, "login")
+    >>>     options = declare(FallbackElement, [(ID, "options"), (XPATH, "//div[@class='options']")])
+    >>>
+    >>> LoginContainer(web_app).login.click()
+
+    :param clss: the class of :class:`Element` to make.
+    :type clss: a sub-class of :class:`Element`
+    :param args: the arguments to make the Element with, between the Container and the label (ie: strategy, identifier.)
+    :returns: the :class:`Locator`.
+    """
+    return Locator(None, clss, tuple(args), False)
+
+
+def required(clss, *args):
+    """Declare a required Element as a class attribute of a Container (see :func:`declare`.)
+
+    :returns: the :class:`Locator`.
+    """
+    return Locator(None, clss, tuple(args), True)
+
+
+class ContainerType(type):
+    """ContainerType compiles the Elements declared on a Container class into its locator table, once per class.
+
+    The table (_locators) is a read-only mapping of each label to its :class:`Locator`, including those inherited.
+    Each declared class attribute is replaced by a descriptor, which gets the instance's Element (or the Locator, from
+    the class.)
+    """
+    def __new__(mcs, name, bases, attributes):
+        locators = {}
+
+        for base in reversed(bases):
+            locators.update(getattr(base, "_locators", {}))
+
+        for key, value in attributes.items():
+            if isinstance(value, Locator):
+                assert not any([hasattr(base, key) and key not in getattr(base, "_locators", {}) for base in bases]), \
+                    "%s.%s hides a Container attribute" % (name, key)
+                locators[key] = value._replace(label=key)
+                attributes[key] = _Declared(key)
+
+        attributes["_locators"] = _LocatorTable(locators)
+        return super(ContainerType, mcs).__new__(mcs, name, bases, attributes)
+
+
+class _LocatorTable(Mapping):
+    def __init__(self, locators):
+        self._locators = dict(locators)
+
+    def __getitem__(self, label):
+        return self._locators[label]
+
+    def __iter__(self):
+        return iter(self._locators)
+
+    def __len__(self):
+        return len(self._locators)
+
+
+class _Declared(object):
+    def __init__(self, label):
+        self.label = label
+
+    def __get__(self, container, clss):
+        if container is None:
+            return clss._locators[self.label]
+
+        return container.get(self.label)
+
 
 class Container(object):
     """Container represents an area or collection in the application of Elements and Widgets.
 
+    Elements are either put in _build_elements(), or declared as class attributes (see :func:`declare`.)  Declared
+    Elements are compiled once per class, and each instance only makes those it uses.
+
     :param web_app: the application :class:`WebApp` this Container is relevant to.
     :type web_app: :class:`WebApp`
 
@@ -13,10 +110,14 @@ class Container(object):
         3. Don't get/set private (_var) instance variables (these are left un-documented.)
 
     :var web_app: the :class:`WebApp` context this Container exists in.
+    :var frame: the path of frame Elements this Container is inside of, outermost first.  empty for the top level document.
     """
+    __metaclass__ = ContainerType
+
     def __init__(self, web_app):
         super(Container, self).__init__()
         self.web_app = web_app
+        self.frame = ()
         self._elements = {}
         self._build_elements()
 
@@ -24,14 +125,39 @@ class Container(object):
         """Populate this Container's Elements.
 
         .. note::
-            this method must be overridden
+            this method must be overridden, unless the Elements are declared as class attributes
 
         >>> class SimpleContainer(Container)
         >>>     def _build_elements(self):
         >>>         self.put(Element(self, ID, "test_id", "test_label"))
 
         """
-        raise NotImplementedError()
+        if len(self._locators) == 0:
+            raise NotImplementedError()
+
+    def set_frame(self, *frames):
+        """Set the frame this Container is inside of
+
+        The frame applies to every Element in this Container (and the sub-Elements of its Widgets), both those already
+        put and those created afterwards.
+        Typically this is called first thing in _build_elements().
+
+        >>> class PaymentContainer(Container)
+        >>>     def _build_elements(self):
+        >>>         self.set_frame(Element(self.web_app, ID, "payment-iframe"))
+        >>>         self.put(Element(self, ID, "card-number", "card_number"))
+
+        :param frames: the frame Elements (iframe, frame), outermost first.  none for the top level document.
+        :type frames: :class:`Element`
+        :returns: this Container.
+        """
+        self.frame = tuple(frames)
+
+        # declared Elements made afterwards take the frame from this Container
+        for element, required in self._elements.values():
+            element.set_frame(*frames)
+
+        return self
 
     def put(self, element, required=False):
         """Put an Element into this Container.
@@ -57,6 +183,10 @@ class Container(object):
         :returns: the :class:`Element` found to be keyed by label.  if one cannot be found, then KeyError is raised.
         """
         assert label is not None and len(label) > 0
+
+        if label not in self._elements and label in self._locators:
+            self._bind(self._locators[label])
+
         return self._elements[label][0]
 
     def get_elements(self, clss=None, required=None):
@@ -68,6 +198,10 @@ class Container(object):
         :type required: bool
         :returns: the list of :class:`Element` in this Container which meet the specified criteria.  unspecified criteria are ignored.
         """
+        for label, locator in self._locators.items():
+            if label not in self._elements:
+                self._bind(locator)
+
         if clss is not None and required is not None:
             return [v[0] for v in self._elements.values() if isinstance(v[0], clss) and v[1] == required]
         elif clss is not None:
@@ -77,6 +211,10 @@ class Container(object):
         else:
             return [v[0] for v in self._elements.values()]
 
+    def _bind(self, locator):
+        self._elements[locator.label] = (locator.clss(self, *(locator.args + (locator.label,))), locator.required)
+
+    @traced()
     def wait_until_visible(self, wait_in_seconds=None):
         """Wait until this Container becomes visible (displayed)
 
@@ -93,8 +231,11 @@ class Container(object):
         """
         required_elements = self.get_elements(required=True)
         assert len(required_elements) > 0
-        return required_elements[0].wait_until_displayed(wait_in_seconds, ignore=True)
+        return self.web_app.cached_until_changed(self._fingerprint_key("visible", required_elements),
+                                                 lambda: required_elements[0].wait_until_displayed(wait_in_seconds, ignore=True),
+                                                 self.frame)
 
+    @traced()
     def wait_until_not_visible(self, wait_in_seconds=None):
         """Wait until this Container goes away (becomes in-visible)
 
@@ -113,6 +254,7 @@ class Container(object):
         assert len(required_elements) > 0
         return required_elements[0].wait_until_not_displayed(wait_in_seconds, ignore=True)
 
+    @traced()
     def is_visible(self):
         """Check if this Container is visible (displayed)
 
@@ -126,5 +268,31 @@ class Container(object):
         """
         required_elements = self.get_elements(required=True)
         assert len(required_elements) > 0
-        return required_elements[0].is_displayed(ignore=True)
+        return self.web_app.cached_until_changed(self._fingerprint_key("visible", required_elements),
+                                                 lambda: required_elements[0].is_displayed(ignore=True),
+                                                 self.frame)
+
+    @traced()
+    def check_appearance(self):
+        """Check the appearance of every checkable Element (and Widget) in this Container
+
+        With fingerprinting enabled on the :class:`WebApp`, a check which already passed is skipped while the page
+        hasn't changed since.
+
+        :result: each Element with a check_appearance() is inspected in regards to its appearance.
+        :returns: this Container.
+        :raises: :class:`CheckError`
+        """
+        elements = [e for e in self.get_elements() if hasattr(e, "check_appearance")]
+
+        def check():
+            for element in elements:
+                element.check_appearance()
+
+            return self
+
+        return self.web_app.cached_until_changed(self._fingerprint_key("appearance", elements), check, self.frame)
+
+    def _fingerprint_key(self, operation, elements):
+        return (operation, self.__class__, tuple(sorted([(e.label, e.get_xpath()) for e in elements])))
 
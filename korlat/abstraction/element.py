@@ -1,10 +1,11 @@
+import sys
 from time import sleep
 
 from selenium.common.exceptions import NoSuchElementException, \
     StaleElementReferenceException, TimeoutException
-from selenium.webdriver.support.wait import WebDriverWait
 
 from container import Container
+from korlat.core.monitor import monitored, LOOKUP, WAIT, ACTION, READ
 from korlat.core.strategy import xpath_of, ID, TAG, XPATH
 from korlat.core.webapp import WebApp
 from korlat.exception import UnknownStrategy, CheckError
@@ -37,12 +38,14 @@ class Element(object):
         3. Don't get/set private (_var) instance variables (these are left un-documented.)
 
     :var web_app: the :class:`WebApp` this Element belongs to.
+    :var container: the :class:`Container` this Element was made in.  can be None.
     :var label: the label of this element (used in reference to :class:`Container`.)
     :var strategy: the strategy used to locate this element.
     :var parent: the parent element to this element.  can be None.
     :var link: the :class:`Container` this element links to.  can be None.
     :var links: the map of :class:`Container` s this element links to.
     :var content: the filler content used to populate the identifier (when applicable.)
+    :var frame: the path of frame Elements this element is inside of, outermost first.  empty for the top level document.
     """
     def __init__(self, container_or_web_app, strategy, identifier, label=None):
         super(Element, self).__init__()
@@ -50,8 +53,10 @@ class Element(object):
 
         if isinstance(container_or_web_app, Container):
             self.web_app = container_or_web_app.web_app
+            self.container = container_or_web_app
         else:
             self.web_app = container_or_web_app
+            self.container = None
 
         self.strategy = strategy
         self._identifier = identifier
@@ -61,6 +66,10 @@ class Element(object):
         self.link = None
         self.links = {}
         self.content = []
+        self.frame = ()
+
+        if isinstance(container_or_web_app, Container) and len(container_or_web_app.frame) > 0:
+            self.set_frame(*container_or_web_app.frame)
 
     def set_parent(self, parent_element):
         """Set this element's parent
@@ -82,6 +91,29 @@ class Element(object):
         self.parent = parent_element
         return self
 
+    def set_frame(self, *frames):
+        """Set the frame this Element is inside of
+
+        korlat switches into the frame whenever the element is located (see use_frame() from :class:`WebApp`.)
+        Each frame is itself an Element, which is in turn set to be inside of the frames before it.
+
+        >>> outer = Element(my_web_app, strategy.ID, "outer-iframe")
+        >>> inner = Element(my_web_app, strategy.TAG, "iframe")
+        >>> e = Element(my_web_app, strategy.ID, "login").set_frame(outer, inner)
+        >>> inner.frame
+        (outer,)
+
+        :param frames: the frame Elements (iframe, frame), outermost first.  none for the top level document.
+        :type frames: :class:`Element`
+        :returns: this Element.
+        """
+        for i in range(len(frames)):
+            assert isinstance(frames[i], Element)
+            frames[i].set_frame(*frames[:i])
+
+        self.frame = tuple(frames)
+        return self
+
     def set_link(self, container, key=None):
         """Set a link for this Element
 
@@ -115,6 +147,7 @@ class Element(object):
 
         return self
 
+    @monitored(ACTION)
     def go_to_link(self, key=None):
         """Go to the link represented by this Element.
 
@@ -169,6 +202,7 @@ class Element(object):
 
         return self
 
+    @monitored(LOOKUP)
     def get_web_element(self):
         """Find the WebElement represented by this Element on the page.
 
@@ -176,9 +210,47 @@ class Element(object):
         :raises: :class:`selenium.common.exceptions.NoSuchElementException`
         :raises: :class:`UnknownStrategy`
         """
-        if self.web_app.wait_delegate is not None:
-            self.web_app.wait_delegate.wait()
+        self.web_app.delegate_wait()
 
+        self.web_app.use_frame(self.frame)
+        missing = None
+
+        for _ in self._alternatives():
+            try:
+                web_element = self._locate()
+            except NoSuchElementException:
+                missing = sys.exc_info()
+                continue
+
+            self._found()
+            return web_element
+
+        raise missing[0], missing[1], missing[2]
+
+    def _find_web_elements(self):
+        """Find the WebElements matching this Element, without raising on absence.
+
+        :returns: the list of selenium :class:`WebElement` found on the page.  empty if there are none.
+        :raises: :class:`UnknownStrategy`
+        """
+        self.web_app.delegate_wait()
+
+        try:
+            self.web_app.use_frame(self.frame)
+        except NoSuchElementException:
+            # no frame, no element
+            return []
+
+        for _ in self._alternatives():
+            web_elements = self._locate_all()
+
+            if len(web_elements) > 0:
+                self._found()
+                return web_elements
+
+        return []
+
+    def _locate(self):
         if self.parent is not None or self.strategy == XPATH:
             return self.web_app.driver.find_element_by_xpath(self.get_identifier())
         elif self.strategy == ID:
@@ -188,6 +260,34 @@ class Element(object):
 
         raise UnknownStrategy(self.strategy)
 
+    def _locate_all(self):
+        if self.parent is not None or self.strategy == XPATH:
+            return self.web_app.driver.find_elements_by_xpath(self.get_identifier())
+        elif self.strategy == ID:
+            return self.web_app.driver.find_elements_by_id(self.get_identifier())
+        elif self.strategy == TAG:
+            return self.web_app.driver.find_elements_by_tag_name(self.get_identifier())
+
+        raise UnknownStrategy(self.strategy)
+
+    def _alternatives(self):
+        """Step through each way of locating this Element: just the one, unless it (or a parent) has fallbacks.
+
+        Each step leaves this Element (and its parents) set to the locator to try.  Once they are all tried, the
+        locators are set back to those at the start.
+        """
+        if self.parent is None:
+            yield
+        else:
+            for _ in self.parent._alternatives():
+                yield
+
+    def _found(self):
+        """Note that the current locators (of this Element and its parents) found it.
+        """
+        if self.parent is not None:
+            self.parent._found()
+
     def get_identifier(self):
         """Get the identifier for this Element.
 
@@ -198,6 +298,22 @@ class Element(object):
         else:
             return self._identifier % tuple(self.content)
 
+    def get_xpath(self):
+        """Get the identifier for this Element as an xpath.
+
+        :returns: the xpath locating this Element.
+        :raises: :class:`UnknownStrategy`
+        """
+        if self.parent is not None:
+            return self.get_identifier()
+
+        xpath = xpath_of(self.strategy, self._identifier, self.content)
+
+        if xpath is None:
+            raise UnknownStrategy(self.strategy)
+
+        return xpath
+
     def __str__(self):
         # TODO: fill with other usefull properties
         return "Identifier: %s\n" % self.get_identifier()
@@ -207,21 +323,15 @@ class Element(object):
 
         :returns: this Element.
         """
-        if wait_in_seconds is None:
-            wait_in_seconds = self.web_app.default_wait
-
-        assert wait_in_seconds > 0
+        assert wait_in_seconds is None or wait_in_seconds >= 0
         ignoring = [
             StaleElementReferenceException,
             NoSuchElementException
         ]
-        wait = WebDriverWait(self.web_app.driver, wait_in_seconds, .25, ignoring)
-
-        if exists:
-            wait.until(self._exists_for_wait)
-        else:
-            wait.until_not(self._exists_for_wait)
-
+        wait = "wait_until_%sexists" % ("" if exists else "not_")
+        wait_in_seconds = self.web_app.element_wait(self, wait, wait_in_seconds)
+        operation = "%s %s" % (self._describe(), wait)
+        self.web_app.wait_until(self._exists_for_wait, exists, wait_in_seconds, ignoring, operation)
         return self
 
     def _wait_until_displayed_or_not(self, displayed, wait_in_seconds=None):
@@ -229,55 +339,63 @@ class Element(object):
 
         :returns: this Element.
         """
-        if wait_in_seconds is None:
-            wait_in_seconds = self.web_app.default_wait
-
-        assert wait_in_seconds > 0
+        assert wait_in_seconds is None or wait_in_seconds >= 0
         ignoring = [
             StaleElementReferenceException,
             NoSuchElementException
         ]
-        wait = WebDriverWait(self.web_app.driver, wait_in_seconds, .25, ignoring)
-
-        if displayed:
-            wait.until(self._is_displayed_for_wait)
-        else:
-            wait.until_not(self._is_displayed_for_wait)
-
+        wait = "wait_until_%sdisplayed" % ("" if displayed else "not_")
+        wait_in_seconds = self.web_app.element_wait(self, wait, wait_in_seconds)
+        operation = "%s %s" % (self._describe(), wait)
+        self.web_app.wait_until(self._is_displayed_for_wait, displayed, wait_in_seconds, ignoring, operation)
         return self
 
+    def _describe(self):
+        return self.label if self.label is not None else self.get_identifier()
+
+    @monitored(WAIT)
     def wait_until_exists(self, wait_in_seconds=None):
         """Wait until this Element exists on the page.
 
-        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default is used.
+        Within a :meth:`WebApp.deadline`, the wait is cut short to the time remaining.
+
+        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default (or its adaptive timeout) is used.
         :type wait_in_seconds: int
         :returns: True if it **does** exist after the wait, False otherwise.
         """
         try:
             self._wait_until_exists_or_not(True, wait_in_seconds)
+            return True
         except TimeoutException:
-            pass
+            self.web_app.capture_failure("wait_until_exists timed out", self, timeout=True)
 
         return self.exists()
 
+    @monitored(WAIT)
     def wait_until_not_exists(self, wait_in_seconds=None):
         """Wait until this Element no longer exists on the page.
 
-        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default is used.
+        Within a :meth:`WebApp.deadline`, the wait is cut short to the time remaining.
+
+        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default (or its adaptive timeout) is used.
         :type wait_in_seconds: int
         :returns: True if it **does not** exist after the wait, False otherwise.
         """
         try:
             self._wait_until_exists_or_not(False, wait_in_seconds)
+            return True
         except TimeoutException:
-            pass
+            self.web_app.capture_failure("wait_until_not_exists timed out", self, timeout=True)
 
         return not self.exists()
 
+    @monitored(WAIT)
     def wait_until_displayed(self, wait_in_seconds=None, ignore=False):
         """Wait until this Element is displayed (visible) on the page.
 
-        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default is used.
+        Within a :meth:`WebApp.deadline`, the wait is cut short to the time remaining.
+
+        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default (or its adaptive timeout) is used.
         :type wait_in_seconds: int
         :param ignore: specify whether NoSuchElementExceptions should be ignored or not.  if ignored, a caught NoSuchElementException will return as False.
         :type ignore: bool
@@ -286,15 +404,19 @@ class Element(object):
         """
         try:
             self._wait_until_displayed_or_not(True, wait_in_seconds)
+            return True
         except TimeoutException:
-            pass
+            self.web_app.capture_failure("wait_until_displayed timed out", self, timeout=True)
 
         return self.is_displayed(ignore)
 
+    @monitored(WAIT)
     def wait_until_not_displayed(self, wait_in_seconds=None, ignore=False):
         """Wait until this Element is no longer displayed (visible) on the page.
 
-        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default is used.
+        Within a :meth:`WebApp.deadline`, the wait is cut short to the time remaining.
+
+        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default (or its adaptive timeout) is used.
         :type wait_in_seconds: int
         :param ignore: specify whether NoSuchElementExceptions should be ignored or not.  if ignored, a caught NoSuchElementException will return as False.
         :type ignore: bool
@@ -303,9 +425,13 @@ class Element(object):
         """
         try:
             self._wait_until_displayed_or_not(False, wait_in_seconds)
+
+            if ignore:
+                return True
         except TimeoutException:
-            pass
+            self.web_app.capture_failure("wait_until_not_displayed timed out", self, timeout=True)
 
+        # a missing Element raises, unless ignored
         return not self.is_displayed(ignore)
 
     def _exists_for_wait(self, *args, **kwargs):
@@ -318,23 +444,26 @@ class Element(object):
     def _is_displayed_for_wait(self, *args, **kwargs):
         """Wrapper for is_displayed() which takes args, kwargs and does nothing with them.
 
+        A missing element counts as not displayed (without raising); wait_until_not_displayed() raises for it
+        afterwards, unless ignored.
+
         :returns: True if it is displayed, False otherwise.
         """
-        return self.is_displayed()
+        return self.is_displayed(ignore=True)
 
     # methods which return bool
 
+    @monitored(LOOKUP)
     def exists(self):
         """Check if this Element exists on the page.
 
+        Absence is found out without an exception (from find_elements), which keeps negative checks and waits cheap.
+
         :returns: True if it exists, False otherwise.
         """
-        try:
-            self.get_web_element()
-            return True
-        except NoSuchElementException:
-            return False
+        return len(self._find_web_elements()) > 0
 
+    @monitored(LOOKUP)
     def is_displayed(self, ignore=False):
         """Check if this Element is displayed (visible.)
 
@@ -344,13 +473,12 @@ class Element(object):
         :raises: :class:`selenium.common.exceptions.NoSuchElementException`
         """
         if ignore:
-            try:
-                return self.get_web_element().is_displayed()
-            except NoSuchElementException:
-                return False
+            web_elements = self._find_web_elements()
+            return len(web_elements) > 0 and web_elements[0].is_displayed()
         else:
             return self.get_web_element().is_displayed()
 
+    @monitored(READ)
     def is_enabled(self):
         """Check if this Element is enabled.
 
@@ -359,6 +487,7 @@ class Element(object):
         """
         return self.get_web_element().is_enabled()
 
+    @monitored(READ)
     def is_selected(self):
         """Check if this Element is selected.
 
@@ -369,6 +498,7 @@ class Element(object):
 
     # methods which return something (other than Element)
 
+    @monitored(READ)
     def get_location(self):
         """Get the location of this Element.
 
@@ -377,6 +507,7 @@ class Element(object):
         """
         return self.get_web_element().location
 
+    @monitored(READ)
     def get_size(self):
         """Get the size of this Element.
 
@@ -385,6 +516,7 @@ class Element(object):
         """
         return self.get_web_element().size
 
+    @monitored(READ)
     def get_text(self):
         """Get the html text of this Element.
 
@@ -393,6 +525,7 @@ class Element(object):
         """
         return self.get_web_element().text
 
+    @monitored(READ)
     def get_tag_name(self):
         """Get the tag name of this Element.
 
@@ -401,6 +534,7 @@ class Element(object):
         """
         return self.get_web_element().tag_name
 
+    @monitored(READ)
     def get_attribute(self, name):
         """Get the value of attribute for this Element.
 
@@ -411,6 +545,7 @@ class Element(object):
         """
         return self.get_web_element().get_attribute(name)
 
+    @monitored(READ)
     def get_value(self):
         """Get the value for this Element.
 
@@ -419,6 +554,7 @@ class Element(object):
         """
         return self.get_web_element().get_attribute("value")
 
+    @monitored(READ)
     def get_css_value(self, prop):
         """Get the value of the css property for this Element.
 
@@ -431,6 +567,7 @@ class Element(object):
 
     # method which return Element
 
+    @monitored(ACTION)
     def send_keys(self, keys):
         """Send the keys to this Element.
 
@@ -445,6 +582,7 @@ class Element(object):
         self.get_web_element().send_keys(keys)
         return self
 
+    @monitored(ACTION)
     def click(self):
         """Click on this Element.
 
@@ -454,6 +592,7 @@ class Element(object):
         self.get_web_element().click()
         return self
 
+    @monitored(ACTION)
     def clear(self):
         """Clear this Element.
 
@@ -463,6 +602,7 @@ class Element(object):
         self.get_web_element().clear()
         return self
 
+    @monitored(ACTION)
     def submit(self):
         """Submit this Element.
 
@@ -1,12 +1,20 @@
-from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
-from selenium.webdriver.support.wait import WebDriverWait
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, \
+    TimeoutException
 
 from container import Container
+from element import Element
+from korlat.core.monitor import monitored, LOOKUP, WAIT, READ
+from korlat.core.script import count_matches, filter_indices
 from korlat.core.strategy import xpath_of, ID, TAG, XPATH
 from korlat.core.webapp import WebApp
 from korlat.exception import UnknownStrategy, CheckError
 
 
+CHUNK_SIZE = 100
+"""The default number of elements fetched per page by iter_chunks().
+"""
+
+
 class ElementList(object):
     """ElementList is the basic atomic handle to a list of objects
 
@@ -28,12 +36,19 @@ class ElementList(object):
     >>> e = ElementList(my_container, strategy.XPATH, "//div[contains(@class, 'test')]", "TEST")
     >>> my_container.get("TEST").
 
+    >>> # reach into the list without fetching all of it
+    >>> rows = ElementList(my_web_app, strategy.XPATH, "//table[@id='results']//tr")
+    >>> rows[5].get_text()
+    >>> for chunk in rows.iter_chunks(500):
+    >>>     process(chunk)
+
     Usage clarficiation:
         1. Access documented instace variables simply through direct dot syntax.
         2. Never set documeneted instance variables directly; use setters.
         3. Don't get/set private (_var) instance variables (these are left un-documented.)
 
     :var web_app: the :class:`WebApp` this Element belongs to.
+    :var container: the :class:`Container` this Element was made in.  can be None.
     :var label: the label of this element (used in reference to :class:`Container`.)
     :var strategy: the strategy used to locate this element.
     :var required: whether this element is required to be displayed in its :class:`Container`.  can be None.
@@ -41,6 +56,7 @@ class ElementList(object):
     :var link: the :class:`Container` this element links to.  can be None.
     :var links: the map of :class:`Container` s this element links to.
     :var content: the filler content used to populate the identifier (when applicable.)
+    :var frame: the path of frame Elements these elements are inside of, outermost first.  empty for the top level document.
     """
     def __init__(self, container_or_web_app, strategy, identifier, label=None):
         super(ElementList, self).__init__()
@@ -48,8 +64,10 @@ class ElementList(object):
 
         if isinstance(container_or_web_app, Container):
             self.web_app = container_or_web_app.web_app
+            self.container = container_or_web_app
         else:
             self.web_app = container_or_web_app
+            self.container = None
 
         self.strategy = strategy
         self._identifier = identifier
@@ -60,6 +78,10 @@ class ElementList(object):
         self.link = None
         self.links = {}
         self.content = []
+        self.frame = ()
+
+        if isinstance(container_or_web_app, Container) and len(container_or_web_app.frame) > 0:
+            self.set_frame(*container_or_web_app.frame)
 
     def set_parent(self, parent_element):
         """Set this element's parent
@@ -81,6 +103,21 @@ class ElementList(object):
         self.parent = parent_element
         return self
 
+    def set_frame(self, *frames):
+        """Set the frame these elements are inside of
+
+        See set_frame() from :class:`Element`.
+
+        :param frames: the frame Elements (iframe, frame), outermost first.  none for the top level document.
+        :type frames: :class:`Element`
+        :returns: this ElementList.
+        """
+        for i in range(len(frames)):
+            frames[i].set_frame(*frames[:i])
+
+        self.frame = tuple(frames)
+        return self
+
     def set_content(self, contents):
         """Set the content used to fill this element's templated identifier
 
@@ -103,6 +140,7 @@ class ElementList(object):
 
         return self
 
+    @monitored(LOOKUP)
     def get_web_elements(self):
         """Find the WebElement represented by this Element on the page.
 
@@ -110,8 +148,9 @@ class ElementList(object):
         :raises: :class:`selenium.common.exceptions.NoSuchElementException`
         :raises: :class:`UnknownStrategy`
         """
-        if self.web_app.wait_delegate is not None:
-            self.web_app.wait_delegate.wait()
+        self.web_app.delegate_wait()
+
+        self.web_app.use_frame(self.frame)
 
         if self.parent is not None or self.strategy == XPATH:
             return self.web_app.driver.find_elements_by_xpath(self.get_identifier())
@@ -132,8 +171,167 @@ class ElementList(object):
         else:
             return self._identifier % tuple(self.content)
 
+    def get_xpath(self):
+        """Get the identifier for these elements as an xpath.
+
+        :returns: the xpath locating these elements.
+        :raises: :class:`UnknownStrategy`
+        """
+        if self.parent is not None:
+            return self.get_identifier()
+
+        xpath = xpath_of(self.strategy, self._identifier, self.content)
+
+        if xpath is None:
+            raise UnknownStrategy(self.strategy)
+
+        return xpath
+
     def make_ith_identifier(self, i):
-        return xpath_of(self.get_identifier())
+        """Get the xpath locating the i-th (0 based) of these elements.
+
+        >>> es = ElementList(my_web_app, strategy.TAG, "tr")
+        >>> es.make_ith_identifier(4)
+        (//tr)[5]
+
+        :param i: the index of the element.
+        :type i: int
+        :returns: the positional xpath of the i-th element.
+        """
+        assert i >= 0
+        return "(%s)[%d]" % (self.get_xpath(), i + 1)
+
+    def __getitem__(self, index):
+        """Get the i-th of these elements, or a slice of them, as positionally located Elements.
+
+        Nothing is fetched from the page, except for the count when a negative or open ended index needs it.
+
+        :param index: the index (or slice.)
+        :type index: int or slice
+        :returns: the :class:`Element` (or list of Elements) at index.
+        """
+        if isinstance(index, slice):
+            if index.stop is None or index.stop < 0 or (index.start or 0) < 0 or (index.step or 1) < 0:
+                indices = range(*index.indices(self.count()))
+            else:
+                indices = range(index.start or 0, index.stop, index.step or 1)
+
+            return [self._element_at(i) for i in indices]
+
+        if index < 0:
+            index += self.count()
+
+            if index < 0:
+                raise IndexError(index)
+
+        return self._element_at(index)
+
+    def __iter__(self):
+        """Iterate over these elements as positionally located Elements (as from __getitem__.)
+
+        Only the count is fetched from the page; each Element is looked up when it is used.  Use iter_chunks() for the
+        WebElements themselves.
+        """
+        for i in range(self.count()):
+            yield self._element_at(i)
+
+    def iter_chunks(self, size=CHUNK_SIZE):
+        """Iterate over the WebElements of this list in pages.
+
+        Each page is a single positional lookup, so only **size** element references are transferred (and held) at
+        once, and the first page is available long before the last one is fetched.
+
+        :param size: the number of elements per page.
+        :type size: int
+        :returns: a generator of lists of selenium :class:`WebElement`.
+        """
+        assert size > 0
+        start = 0
+
+        while True:
+            chunk = self._get_page(start, size)
+
+            if len(chunk) > 0:
+                yield chunk
+
+            if len(chunk) < size:
+                return
+
+            start += size
+
+    def _get_page(self, start, size):
+        self.web_app.delegate_wait()
+
+        self.web_app.use_frame(self.frame)
+        return self.web_app.driver.find_elements_by_xpath("(%s)[position() > %d and position() <= %d]" %
+                                                          (self.get_xpath(), start, start + size))
+
+    def _element_at(self, i):
+        label = "%s[%d]" % (self.label, i) if self.label is not None else None
+        # the positional xpath is final, so it mustn't be taken as a template
+        element = Element(self._owner(), XPATH, self.make_ith_identifier(i).replace("%", "%%"), label)
+        return element.set_frame(*self.frame)
+
+    def _owner(self):
+        # what the Elements made from this list belong to, so they are keyed (ie: timed) under the same Container
+        return self.container if self.container is not None else self.web_app
+
+    def filter(self, text=None, attr=None, css=None, displayed=None):
+        """Narrow these elements to those meeting all the criteria, evaluated inside the browser
+
+        Only the indices of the matches are transferred, rather than (for example) the text of every element.
+        The result is located by the positions matched at the time of the call.
+
+        >>> rows = ElementList(my_web_app, strategy.TAG, "tr", "rows")
+        >>> rows.filter(text="Bob", displayed=True).count()
+        2
+        >>> rows.filter(attr={"class": "selected"}).get_identifier()
+        (//tr)[position()=3]
+
+        :param text: the text the element's text must contain.  if unspecified it is not checked.
+        :type text: str
+        :param attr: the attributes the element must have, mapped to their exact value (or None to only require the attribute.)
+        :type attr: dict
+        :param css: the css selector the element must match.  if unspecified it is not checked.
+        :type css: str
+        :param displayed: whether the element must be displayed (or not.)  if unspecified it is not checked.
+        :type displayed: bool
+        :returns: the narrower :class:`ElementList`.
+        """
+        indices = self._filter_indices(text, attr, css, displayed, None)
+        label = "%s(filtered)" % self.label if self.label is not None else None
+
+        if len(indices) > 0:
+            positions = " or ".join(["position()=%d" % (i + 1) for i in indices])
+        else:
+            positions = "false()"
+
+        xpath = "(%s)[%s]" % (self.get_xpath(), positions)
+        return ElementList(self._owner(), XPATH, xpath.replace("%", "%%"), label).set_frame(*self.frame)
+
+    def find_first(self, text=None, attr=None, css=None, displayed=None):
+        """Find the first of these elements meeting all the criteria, evaluated inside the browser
+
+        See filter() for the criteria.  The search stops at the first match.
+
+        >>> row = rows.find_first(text="Bob")
+        >>> row.get_identifier()
+        (//tr)[3]
+
+        :returns: the matching :class:`Element`, or None if nothing matches.
+        """
+        indices = self._filter_indices(text, attr, css, displayed, 1)
+
+        if len(indices) == 0:
+            return None
+
+        return self._element_at(indices[0])
+
+    def _filter_indices(self, text, attr, css, displayed, limit):
+        self.web_app.delegate_wait()
+
+        self.web_app.use_frame(self.frame)
+        return filter_indices(self.web_app.driver, self.get_xpath(), text, attr, css, displayed, limit)
 
     def __str__(self):
         # TODO: fill with other usefull properties
@@ -144,21 +342,15 @@ class ElementList(object):
 
         :returns: this Element.
         """
-        if wait_in_seconds is None:
-            wait_in_seconds = self.web_app.default_wait
-
-        assert wait_in_seconds > 0
+        assert wait_in_seconds is None or wait_in_seconds >= 0
         ignoring = [
             StaleElementReferenceException,
             NoSuchElementException
         ]
-        wait = WebDriverWait(self.web_app.driver, wait_in_seconds, .25, ignoring)
-
-        if exists:
-            wait.until(self._exists_for_wait)
-        else:
-            wait.until_not(self._exists_for_wait)
-
+        wait = "wait_until_%sexists" % ("" if exists else "not_")
+        wait_in_seconds = self.web_app.element_wait(self, wait, wait_in_seconds)
+        operation = "%s %s" % (self.label or self.get_identifier(), wait)
+        self.web_app.wait_until(self._exists_for_wait, exists, wait_in_seconds, ignoring, operation)
         return self
 
     def _wait_until_displayed_or_not(self, displayed, wait_in_seconds=None):
@@ -166,27 +358,22 @@ class ElementList(object):
 
         :returns: this Element.
         """
-        if wait_in_seconds is None:
-            wait_in_seconds = self.web_app.default_wait
-
-        assert wait_in_seconds > 0
+        assert wait_in_seconds is None or wait_in_seconds >= 0
         ignoring = [
             StaleElementReferenceException,
             NoSuchElementException
         ]
-        wait = WebDriverWait(self.web_app.driver, wait_in_seconds, .25, ignoring)
-
-        if displayed:
-            wait.until(self._is_displayed_for_wait)
-        else:
-            wait.until_not(self._is_displayed_for_wait)
-
+        wait = "wait_until_%sdisplayed" % ("" if displayed else "not_")
+        wait_in_seconds = self.web_app.element_wait(self, wait, wait_in_seconds)
+        operation = "%s %s" % (self.label or self.get_identifier(), wait)
+        self.web_app.wait_until(self._is_displayed_for_wait, displayed, wait_in_seconds, ignoring, operation)
         return self
 
+    @monitored(WAIT)
     def wait_until_exists(self, wait_in_seconds=None):
         """Wait until this Element exists on the page.
 
-        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default is used.
+        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default (or its adaptive timeout) is used.
         :type wait_in_seconds: int
         :returns: True if it **does** exist after the wait, False otherwise.
         """
@@ -197,10 +384,11 @@ class ElementList(object):
         finally:
             return self.exists()
 
+    @monitored(WAIT)
     def wait_until_not_exists(self, wait_in_seconds=None):
         """Wait until this Element no longer exists on the page.
 
-        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default is used.
+        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default (or its adaptive timeout) is used.
         :type wait_in_seconds: int
         :returns: True if it **does not** exist after the wait, False otherwise.
         """
@@ -211,10 +399,11 @@ class ElementList(object):
         finally:
             return not self.exists()
 
+    @monitored(WAIT)
     def wait_until_displayed(self, wait_in_seconds=None):
         """Wait until this Element is displayed (visible) on the page.
 
-        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default is used.
+        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default (or its adaptive timeout) is used.
         :type wait_in_seconds: int
         :returns: True if it **is** displayed after the wait, False otherwise.
         :raises: :class:`selenium.common.exceptions.NoSuchElementException`
@@ -226,10 +415,11 @@ class ElementList(object):
         finally:
             return self.is_displayed()
 
+    @monitored(WAIT)
     def wait_until_not_displayed(self, wait_in_seconds=None):
         """Wait until this Element is no longer displayed (visible) on the page.
 
-        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default is used.
+        :param wait_in_seconds: the number of seconds to wait.  if unspecified then the :class:`WebApp` default (or its adaptive timeout) is used.
         :type wait_in_seconds: int
         :returns: True if it **is not** displayed after the wait, False otherwise.
         :raises: :class:`selenium.common.exceptions.NoSuchElementException`
@@ -257,13 +447,43 @@ class ElementList(object):
 
     # methods which return bool
 
+    @monitored(LOOKUP)
     def count(self):
-        """Check if this Element exists on the page.
+        """Count these elements on the page.
 
-        :returns: True if it exists, False otherwise.
+        The count is taken inside the browser, so no element reference is transferred.
+
+        :returns: the number of elements.
+        :raises: :class:`UnknownStrategy`
+        """
+        self.web_app.delegate_wait()
+
+        try:
+            self.web_app.use_frame(self.frame)
+        except NoSuchElementException:
+            return 0
+
+        return count_matches(self.web_app.driver, self.get_xpath())
+
+    @monitored(LOOKUP)
+    def exists(self):
+        """Check if any of these elements exist on the page.
+
+        :returns: True if at least one exists, False otherwise.
+        """
+        return self.count() > 0
+
+    @monitored(LOOKUP)
+    def is_displayed(self):
+        """Check if any of these elements is displayed (visible.)
+
+        The check is made inside the browser, stopping at the first displayed element.
+
+        :returns: True if at least one is displayed, False otherwise (including when there are none.)
         """
-        return len(self.get_web_elements())
+        return self.find_first(displayed=True) is not None
 
+    @monitored(READ)
     def displayed_list(self):
         """Check if this Element is displayed (visible.)
 
@@ -272,6 +492,7 @@ class ElementList(object):
         """
         return [e.is_displayed() for e in self.get_web_elements()]
 
+    @monitored(READ)
     def enabled_list(self):
         """Check if this Element is enabled.
 
@@ -280,6 +501,7 @@ class ElementList(object):
         """
         return [e.is_enabled() for e in self.get_web_elements()]
 
+    @monitored(READ)
     def selected_list(self):
         """Check if this Element is selected.
 
@@ -290,6 +512,7 @@ class ElementList(object):
 
     # methods which return something (other than Element)
 
+    @monitored(READ)
     def location_list(self):
         """Get the location of this Element.
 
@@ -298,6 +521,7 @@ class ElementList(object):
         """
         return [e.location for e in self.get_web_elements()]
 
+    @monitored(READ)
     def size_list(self):
         """Get the size of this Element.
 
@@ -306,6 +530,7 @@ class ElementList(object):
         """
         return [e.size for e in self.get_web_elements()]
 
+    @monitored(READ)
     def text_list(self):
         """Get the html text of this Element.
 
@@ -314,6 +539,7 @@ class ElementList(object):
         """
         return [e.text for e in self.get_web_elements()]
 
+    @monitored(READ)
     def tag_name_list(self):
         """Get the tag name of this Element.
 
@@ -322,6 +548,7 @@ class ElementList(object):
         """
         return [e.tag_name for e in self.get_web_elements()]
 
+    @monitored(READ)
     def attribute_list(self, name):
         """Get the value of attribute for this Element.
 
@@ -332,6 +559,7 @@ class ElementList(object):
         """
         return [e.get_attribute(name) for e in self.get_web_elements()]
 
+    @monitored(READ)
     def value_list(self):
         """Get the value for this Element.
 
@@ -340,6 +568,7 @@ class ElementList(object):
         """
         return [e.get_attribute("value") for e in self.get_web_element()]
 
+    @monitored(READ)
     def css_value_list(self, prop):
         """Get the value of the css property for this Element.
 
@@ -0,0 +1,60 @@
+from element import Element
+
+
+class FallbackElement(Element):
+    """FallbackElement is an Element which can be located by any of several (strategy, identifier) candidates.
+
+    The candidates are tried in turn until one finds the element.  The winner is remembered in the
+    :class:`WebApp`'s :class:`LocatorMemory` and tried first from then on, so the normal case costs a
+    single (cheap) lookup, while the other candidates remain as a fallback.  An Element parented by a FallbackElement
+    is located under each candidate in turn as well.
+
+    >>> e = FallbackElement(my_container, [(ID, "login"), (XPATH, "//form//button[@type='submit']")], "login")
+    >>> e.click()
+    >>> e.strategy
+    xpath
+
+    :param container_or_web_app: either the abstraction :class:`Container` which holds this element or the application :class:`WebApp`.
+    :type container_or_web_app: :class:`Container` or :class:`WebApp`
+    :param candidates: the ordered (strategy, identifier) pairs this element may be located by.
+    :type candidates: list
+    :param label: the label (name) of this element.
+    :type label: str
+
+    :var candidates: the (strategy, identifier) pairs this element may be located by.  strategy (and the identifier) is that of the candidate currently in use.
+    """
+    def __init__(self, container_or_web_app, candidates, label=None):
+        assert len(candidates) > 0
+        super(FallbackElement, self).__init__(container_or_web_app, candidates[0][0], candidates[0][1], label)
+        self.candidates = list(candidates)
+        self._current = 0
+        self._key = "%s|%s" % (label, "|".join(["%s=%s" % c for c in self.candidates]))
+        learned = self.web_app.locator_memory.get(self._key)
+
+        if learned is not None and 0 <= learned < len(self.candidates):
+            self._use(learned)
+
+    def _use(self, index):
+        self._current = index
+        self.strategy, self._identifier = self.candidates[index]
+
+    def _alternatives(self):
+        """Step through each candidate (with the alternatives of its parents), the current one first.
+        """
+        first = self._current
+        order = [first] + [i for i in range(len(self.candidates)) if i != first]
+
+        for i in order:
+            self._use(i)
+
+            for _ in super(FallbackElement, self)._alternatives():
+                yield
+
+        # nothing found it; keep leading with the candidate we started with
+        self._use(first)
+
+    def _found(self):
+        """Learn the current candidate as the winner.
+        """
+        self.web_app.locator_memory.put(self._key, self._current)
+        super(FallbackElement, self)._found()
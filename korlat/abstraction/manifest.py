@@ -0,0 +1,155 @@
+from copy import deepcopy
+from importlib import import_module
+import json
+
+from container import Container
+from element import Element
+from elementlist import ElementList
+from korlat.core.webapp import WebApp
+
+
+FORMAT_VERSION = 1
+"""The version of the manifest format written by export().
+"""
+
+
+def export(container):
+    """Export a Container tree to a manifest, which can be loaded (bound to another WebApp) in another process.
+
+    The tree is the Container, every Element and ElementList it holds (with their parents, frames and sub-Elements),
+    and every Container they link to.  Each object's state is exported as is: labels, strategies, identifiers,
+    required flags, links, size constraints and so on.  References to the :class:`WebApp` are left out, to be bound
+    on load.  An object may list the attributes which are only a cache of the page in _transient, a dict of each
+    attribute to the value it is reset to.
+
+    >>> manifest = dumps(LoginContainer(web_app))
+    >>> # in a worker process
+    >>> login = load(manifest, WebApp(webdriver.Firefox(), "http://coolsite.com"))
+    >>> login.get("username").send_keys("bob")
+
+    :param container: the root of the tree.
+    :type container: :class:`Container`
+    :returns: the manifest, a json compatible dict.
+    :raises: ValueError (if an attribute can't be exported)
+    """
+    assert isinstance(container, Container)
+    return _Exporter().export(container)
+
+
+def dumps(container):
+    """Export a Container tree to a compact json manifest (see :func:`export`.)
+
+    :returns: the manifest as a str.
+    """
+    return json.dumps(export(container), separators=(",", ":"))
+
+
+def load(manifest, web_app):
+    """Load a Container tree from a manifest, bound to the WebApp.
+
+    The objects are restored as exported; no __init__() (nor _build_elements()) is run.
+
+    :param manifest: the manifest, as a dict from :func:`export` or a str from :func:`dumps`.
+    :type manifest: dict or str
+    :param web_app: the :class:`WebApp` to bind the tree to.
+    :type web_app: :class:`WebApp`
+    :returns: the root :class:`Container`.
+    """
+    assert isinstance(web_app, WebApp)
+
+    if isinstance(manifest, basestring):
+        manifest = json.loads(manifest)
+
+    assert manifest["korlat_manifest"] == FORMAT_VERSION
+    objects = [_class(c).__new__(_class(c)) for c, state in manifest["objects"]]
+
+    def decode(value):
+        if isinstance(value, list):
+            return [decode(v) for v in value]
+        elif not isinstance(value, dict):
+            return value
+        elif "$o" in value:
+            return objects[value["$o"]]
+        elif "$w" in value:
+            return web_app
+        elif "$t" in value:
+            return tuple([decode(v) for v in value["$t"]])
+        elif "$d" in value:
+            return dict([(decode(k), decode(v)) for k, v in value["$d"]])
+        else:
+            return _class(value["$k"])
+
+    for obj, (clss, state) in zip(objects, manifest["objects"]):
+        obj.__dict__.update(dict([(str(k), decode(v)) for k, v in state.items()]))
+        obj.__dict__.update(deepcopy(getattr(obj, "_transient", {})))
+
+    return objects[manifest["root"]]
+
+
+class _Exporter(object):
+    def __init__(self):
+        super(_Exporter, self).__init__()
+        self.ids = {}
+        self.objects = []
+
+    def export(self, container):
+        root = self.reference(container)
+        i = 0
+
+        # objects found while encoding are appended, and encoded in turn
+        while i < len(self.objects):
+            obj = self.objects[i][0]
+            transient = getattr(obj, "_transient", {})
+            state = {}
+
+            for key, value in obj.__dict__.items():
+                if key not in transient:
+                    try:
+                        state[key] = self.encode(value)
+                    except ValueError as e:
+                        raise ValueError("%s.%s: %s" % (obj.__class__.__name__, key, e))
+
+            self.objects[i] = [_path(obj.__class__), state]
+            i += 1
+
+        return {"korlat_manifest": FORMAT_VERSION, "root": root["$o"], "objects": self.objects}
+
+    def reference(self, obj):
+        if id(obj) not in self.ids:
+            self.ids[id(obj)] = len(self.objects)
+            # keeps obj alive (so its id isn't reused) until it is encoded
+            self.objects.append([obj, None])
+
+        return {"$o": self.ids[id(obj)]}
+
+    def encode(self, value):
+        if value is None or isinstance(value, (bool, int, long, float, basestring)):
+            return value
+        elif isinstance(value, (Container, Element, ElementList)):
+            return self.reference(value)
+        elif isinstance(value, WebApp):
+            return {"$w": 0}
+        elif isinstance(value, list):
+            return [self.encode(v) for v in value]
+        elif isinstance(value, tuple):
+            return {"$t": [self.encode(v) for v in value]}
+        elif isinstance(value, dict):
+            return {"$d": [[self.encode(k), self.encode(v)] for k, v in value.items()]}
+        elif isinstance(value, type):
+            return {"$k": _path(value)}
+
+        raise ValueError("can't export %s" % value.__class__.__name__)
+
+
+def _path(clss):
+    path = "%s.%s" % (clss.__module__, clss.__name__)
+
+    if _class(path) is not clss:
+        raise ValueError("%s isn't importable (ie: defined in a function)" % path)
+
+    return path
+
+
+def _class(path):
+    module, name = path.rsplit(".", 1)
+    return getattr(import_module(module), name)
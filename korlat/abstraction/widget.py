@@ -1,4 +1,9 @@
+from selenium.common.exceptions import NoSuchElementException
+
 from element import Element
+from korlat.core.monitor import monitored, LOOKUP
+from korlat.core.script import probe
+from korlat.exception import CheckError
 
 
 class Widget(Element):
@@ -6,27 +11,143 @@ class Widget(Element):
 
     A basic example of what you may use a Widget for is a search area.  These are often comprised of a
     textbox + button.  You could create a SearchWidget which defines custom the custom method
-    use_search(text) and overrides exists() and is_displayed() to verify both textbox and button exist
-    and are displayed.
+    use_search(text) and puts the textbox and button as its sub-Elements.  exists() and is_displayed()
+    then verify the widget, the textbox and the button all exist and are displayed, probing all of them
+    in a single browser call.
+
+    >>> class SearchWidget(Widget):
+    >>>     def _build_elements(self):
+    >>>         self.put(Element(self.web_app, XPATH, "//input", "textbox").set_parent(self)) \\
+    >>>             .put(Element(self.web_app, XPATH, "//button", "button").set_parent(self))
+    >>>
+    >>>     def use_search(self, text):
+    >>>         self.get("textbox").send_keys(text)
+    >>>         self.get("button").click()
     """
     def __init__(self, container_or_web_app, strategy, identifier, label=None):
+        # before the Element is made, as it may be set into its Container's frame
+        self._elements = {}
         super(Widget, self).__init__(container_or_web_app, strategy, identifier, label)
+        self._build_elements()
 
-    def exists():
-        """Same as Element.exists()
+    def _build_elements(self):
+        """Populate this Widget's sub-Elements.
 
         .. note::
-            must be overridden
+            override to put sub-Elements.  by default a Widget has none, and behaves as a single Element.
         """
-        raise NotImplementedError()
+        pass
 
-    def is_displayed():
-        """Same as Element.is_displayed()
+    def set_frame(self, *frames):
+        """Set the frame this Widget is inside of (see set_frame() from :class:`Element`.)
 
-        .. note::
-            must be overridden
+        The sub-Elements inside of this Widget's frame move along with it; those set into another frame stay put.
+
+        :param frames: the frame Elements (iframe, frame), outermost first.  none for the top level document.
+        :type frames: :class:`Element`
+        :returns: this Widget.
         """
-        raise NotImplementedError()
+        previous = self.frame
+        super(Widget, self).set_frame(*frames)
+
+        for element in self._elements.values():
+            if element.frame == previous:
+                element.set_frame(*frames)
+
+        return self
+
+    def put(self, element):
+        """Put a sub-Element into this Widget.
+
+        :param element: the **labelled** :class:`Element` to add.
+        :type element: :class:`Element`
+        :result: element is added to this Widget's sub-Elements, under the key element.label.  if this Widget already had an element keyed by the element.label, then it is replaced.  an element without a frame of its own is set to be inside of this Widget's frame.
+        :returns: this Widget.
+        """
+        assert element is not None
+        assert element.label is not None and len(element.label) > 0
+
+        if len(element.frame) == 0 and len(self.frame) > 0:
+            element.set_frame(*self.frame)
+
+        self._elements[element.label] = element
+        return self
+
+    def get(self, label):
+        """Get the sub-Element from this Widget.
+
+        :param label: the label to find the element by.
+        :type label: str
+        :returns: the :class:`Element` found to be keyed by label.  if one cannot be found, then KeyError is raised.
+        """
+        assert label is not None and len(label) > 0
+        return self._elements[label]
+
+    def get_elements(self, clss=None):
+        """Get the (sub-)set of sub-Elements in this Widget.
+
+        :param clss: the specific class of :class:`Element` to get.
+        :type clss: a sub-class of :class:`Element`
+        :returns: the list of sub-:class:`Element` s in this Widget which meet the specified criteria.  unspecified criteria are ignored.
+        """
+        if clss is not None:
+            return [e for e in self._elements.values() if isinstance(e, clss)]
+        else:
+            return self._elements.values()
+
+    def probe(self):
+        """Probe this Widget and its sub-Elements on the page.
+
+        All the elements in the same frame are probed by a single browser call.
+
+        :returns: the list of (element, result) pairs, this Widget first.  each result is a dict of "exists", "displayed", "width" and "height".
+        """
+        self.web_app.delegate_wait()
+
+        elements = [self] + self.get_elements()
+        by_frame = {}
+
+        for element in elements:
+            by_frame.setdefault(element.frame, []).append(element)
+
+        results = {}
+
+        for frame, group in by_frame.items():
+            self.web_app.use_frame(frame)
+
+            for element, result in zip(group, probe(self.web_app.driver, [e.get_xpath() for e in group])):
+                results[id(element)] = result
+
+        return [(e, results[id(e)]) for e in elements]
+
+    @monitored(LOOKUP)
+    def exists(self):
+        """Check if this Widget and all its sub-Elements exist on the page.
+
+        :returns: True if they all exist, False otherwise.
+        """
+        return all([result["exists"] for element, result in self.probe()])
+
+    @monitored(LOOKUP)
+    def is_displayed(self, ignore=False):
+        """Check if this Widget and all its sub-Elements are displayed (visible.)
+
+        :param ignore: specify whether NoSuchElementExceptions should be ignored or not.  if ignored, a missing element will return as False.
+        :type ignore: bool
+        :returns: True if they are all displayed, False otherwise.
+        :raises: :class:`selenium.common.exceptions.NoSuchElementException`
+        """
+        results = self.probe()
+
+        for element, result in results:
+            if not result["exists"]:
+                if ignore:
+                    return False
+
+                raise NoSuchElementException("%s (of widget %s)" % (element.get_xpath(), self.label))
+
+        return all([result["displayed"] for element, result in results])
+
 
 class CheckableWidget(Widget):
     """CheckableWidget can be used to add common checks (assertions) to Widgets.
@@ -36,16 +157,27 @@ class CheckableWidget(Widget):
     of Elements.
     """
     def __init__(self, container_or_web_app, strategy, identifier, label=None):
-        super(Widget, self).__init__(container_or_web_app, strategy, identifier, label)
+        super(CheckableWidget, self).__init__(container_or_web_app, strategy, identifier, label)
 
     def check_appearance(self):
-        """Override to assert this Widget is layed out correctly.
+        """Assert this Widget is layed out correctly.
+
+        By default, this Widget and all its sub-Elements are expected to be displayed, and sub-Elements with
+        size constraints (those with a check_size(), such as :class:`AestheticElement`) must meet them.  Everything
+        is checked from a single probe() rather than element by element.
 
         :result: this Widget is inspected in regards to its appearance.
         :returns: this CheckableWidget.
         :raises: :class:`CheckError`
         """
-        raise NotImplementedError()
+        for element, result in self.probe():
+            if not result["displayed"]:
+                raise CheckError("%s expected to be displayed" % (element.label or element.get_xpath()))
+
+            if element is not self and hasattr(element, "check_size"):
+                element.check_size({"width": result["width"], "height": result["height"]})
+
+        return self
 
     def check_behaviour(self):
         """Override to assert this Widget can be used and interacted with correctly.
@@ -55,4 +187,3 @@ class CheckableWidget(Widget):
         :raises: :class:`CheckError`
         """
         raise NotImplementedError()
-
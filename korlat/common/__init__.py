@@ -1,2 +1,3 @@
-import checkbox
-import elementbase
+from korlat.lazy import install
+
+install(__name__, ["elementbase", "objects", "table", "unique", "util"])
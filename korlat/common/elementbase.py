@@ -26,21 +26,21 @@ class AestheticElement(CheckableElement):
             raise CheckError("expected to be displayed")
 
         if len(self.minimum_size) > 0 or len(self.exact_size) > 0:
-            size = self.get_size()
+            self.check_size(self.get_size())
 
-            if self.minimum_size.has_key("height"):
-                if self.minimum_size["height"] > size["height"]:
-                    raise CheckAtLeastError(self.minimum_size["height"], size["height"], "height:")
+    def check_size(self, size):
+        if self.minimum_size.has_key("height"):
+            if self.minimum_size["height"] > size["height"]:
+                raise CheckAtLeastError(self.minimum_size["height"], size["height"], "height:")
 
-            if self.minimum_size.has_key("width"):
-                if self.minimum_size["width"] > size["width"]:
-                    raise CheckAtLeastError(self.minimum_size["width"], size["width"], "width:")
+        if self.minimum_size.has_key("width"):
+            if self.minimum_size["width"] > size["width"]:
+                raise CheckAtLeastError(self.minimum_size["width"], size["width"], "width:")
 
-            if self.exact_size.has_key("height"):
-                if self.exact_size["height"] != size["height"]:
-                    raise CheckEqualError(self.exact_size["height"], size["height"], "height:")
-
-            if self.exact_size.has_key("width"):
-                if self.exact_size["width"] != size["width"]:
-                    raise CheckEqualError(self.exact_size["width"], size["width"], "width:")
+        if self.exact_size.has_key("height"):
+            if self.exact_size["height"] != size["height"]:
+                raise CheckEqualError(self.exact_size["height"], size["height"], "height:")
 
+        if self.exact_size.has_key("width"):
+            if self.exact_size["width"] != size["width"]:
+                raise CheckEqualError(self.exact_size["width"], size["width"], "width:")
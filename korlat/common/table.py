@@ -0,0 +1,149 @@
+from korlat.abstraction.widget import Widget
+from korlat.core.script import table_data
+
+
+class TableWidget(Widget):
+    """TableWidget models a <table>, reading its whole contents at once.
+
+    The headers, cell text and any selected cell attributes are extracted by a single script call into columns,
+    rather than a round trip per cell.  The contents are cached until refresh() is called, so get_row(), get_cell()
+    and column() never touch the page (other than the first, which fetches them.)
+
+    >>> t = TableWidget(my_container, strategy.ID, "results", "results").set_attributes("class")
+    >>> t.get_headers()
+    [u'Name', u'Age']
+    >>> t.get_cell(1, "Name")
+    u'Bob'
+    >>> t.column("Age")
+    [u'31', u'27']
+    >>> t.refresh().row_count()
+    3
+
+    :param container_or_web_app: either the abstraction :class:`Container` which holds this table or the application :class:`WebApp`.
+    :type container_or_web_app: :class:`Container` or :class:`WebApp`
+    :param strategy: the lookup strategy used to locate the table.
+    :type strategy: :py:const:`strategy`
+    :param identifier: the identifier used to locate the table.
+    :type identifier: str
+    :param label: the label (name) of this table.
+    :type label: str
+
+    :var attributes: the names of the cell attributes extracted along with the text.
+    """
+    # the cached contents, which a manifest (see korlat.abstraction.manifest) leaves out
+    _transient = {"_data": None, "_header_index": {}}
+
+    def __init__(self, container_or_web_app, strategy, identifier, label=None):
+        super(TableWidget, self).__init__(container_or_web_app, strategy, identifier, label)
+        self.attributes = []
+        self._data = None
+        self._header_index = {}
+
+    def set_attributes(self, *names):
+        """Set the cell attributes to extract along with the text
+
+        :param names: the attribute names.
+        :type names: str
+        :returns: this TableWidget.
+        """
+        self.attributes = list(names)
+        self._data = None
+        return self
+
+    def refresh(self):
+        """Re-read the contents of the table from the page.
+
+        :returns: this TableWidget.
+        :raises: :class:`selenium.common.exceptions.NoSuchElementException`
+        """
+        self._data = table_data(self.web_app.driver, self.get_web_element(), self.attributes)
+        self._header_index = {}
+
+        for i in range(len(self._data["headers"])):
+            self._header_index.setdefault(self._data["headers"][i], i)
+
+        return self
+
+    def _get_data(self):
+        if self._data is None:
+            self.refresh()
+
+        return self._data
+
+    def get_headers(self):
+        """Get the header text of each column.
+
+        :returns: the list of headers.  empty if the table has no header.
+        """
+        return self._get_data()["headers"]
+
+    def row_count(self):
+        """Get the number of (data) rows.
+
+        :returns: the number of rows.
+        """
+        columns = self._get_data()["columns"]
+        return len(columns[0]) if len(columns) > 0 else 0
+
+    def column_count(self):
+        """Get the number of columns.
+
+        :returns: the number of columns.
+        """
+        return len(self._get_data()["columns"])
+
+    def _column_index(self, column):
+        if isinstance(column, basestring):
+            self._get_data()
+
+            if column not in self._header_index:
+                raise KeyError(column)
+
+            return self._header_index[column]
+
+        return column
+
+    def get_row(self, row):
+        """Get the cell text of a row.
+
+        :param row: the (0 based) index of the row.
+        :type row: int
+        :returns: the list of cell text, one per column.
+        """
+        return [c[row] for c in self._get_data()["columns"]]
+
+    def get_cell(self, row, column):
+        """Get the text of a cell.
+
+        :param row: the (0 based) index of the row.
+        :type row: int
+        :param column: the (0 based) index or the header of the column.
+        :type column: int or str
+        :returns: the cell text.  None if the row doesn't have that cell.
+        :raises: KeyError (if there is no column by that header.)
+        """
+        return self._get_data()["columns"][self._column_index(column)][row]
+
+    def get_cell_attribute(self, row, column, name):
+        """Get an attribute of a cell.
+
+        :param row: the (0 based) index of the row.
+        :type row: int
+        :param column: the (0 based) index or the header of the column.
+        :type column: int or str
+        :param name: the attribute name (which must be one of the extracted attributes.)
+        :type name: str
+        :returns: the attribute value.  None if the cell doesn't have it.
+        """
+        assert name in self.attributes
+        return self._get_data()["attributes"][name][self._column_index(column)][row]
+
+    def column(self, column):
+        """Get the cell text of a column.
+
+        :param column: the (0 based) index or the header of the column.
+        :type column: int or str
+        :returns: the list of cell text, one per row.
+        :raises: KeyError (if there is no column by that header.)
+        """
+        return list(self._get_data()["columns"][self._column_index(column)])
@@ -1,3 +1,6 @@
+import math
+
+
 def canonical_class(obj):
     """Get the canonical class name of the object
 
@@ -12,10 +15,33 @@ def canonical_class(obj):
     :type obj: object
     :returns: a dot (.) delimited string which absolutely identifies the inheritance chain of the specified object
     """
-    if obj.__class__ != object.__class__:
+    if not isinstance(obj, type):
         return canonical_class(obj.__class__)
     elif obj.__base__ is not None:
         return "%s.%s" % (canonical_class(obj.__base__), obj.__name__)
     else:
         return obj.__name__
 
+
+def percentile(values, p):
+    """Get the p-th percentile of the values (nearest rank)
+
+    >>> percentile([4, 1, 3, 2], 50)
+    2
+    >>> percentile([4, 1, 3, 2], 95)
+    4
+
+    :param values: the values to find the percentile of.
+    :type values: list
+    :param p: the percentile, from 0 to 100.
+    :type p: int or float
+    :returns: the value at the p-th percentile, or None if there are no values.
+    """
+    assert 0 <= p <= 100
+
+    if len(values) == 0:
+        return None
+
+    ordered = sorted(values)
+    rank = int(math.ceil(p / 100.0 * len(ordered))) - 1
+    return ordered[max(0, rank)]
@@ -1,3 +1,4 @@
-import strategy
-import waitdelegate
-import webapp
+from korlat.lazy import install
+
+install(__name__, ["adaptive", "browser", "budget", "capture", "deadline", "locatormemory", "monitor", "proxy", "replay",
+                   "script", "strategy", "timing", "trace", "transport", "waitdelegate", "webapp"])
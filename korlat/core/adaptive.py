@@ -0,0 +1,134 @@
+from threading import Lock
+
+from korlat.common.util import canonical_class, percentile
+from monitor import Monitor, OK, WAIT
+from timing import load
+
+
+MULTIPLE = 3
+"""The default multiple of the observed wait time an adaptive timeout allows.
+"""
+PERCENTILE = 95
+"""The default percentile of the observed wait times the timeout is a multiple of.
+"""
+MINIMUM_SAMPLES = 5
+"""The default number of observed waits needed before an Element's timeout adapts.
+"""
+MINIMUM_WAIT_IN_SECONDS = 1
+"""The default shortest adaptive timeout.  1 second.
+"""
+WINDOW = 100
+"""The number of most recent waits kept per Element and wait.
+"""
+
+
+class AdaptiveTimeouts(Monitor):
+    """AdaptiveTimeouts learns how long each labelled Element's waits take, and shortens their timeout accordingly.
+
+    Once an Element's wait has been seen to succeed minimum_samples times, waiting on it without specifying the time
+    waits for multiple times the percentile of its observed durations (but at least minimum_wait), instead of the
+    :class:`WebApp` default.  The default remains the ceiling, and a wait given an explicit time is left alone.
+
+    Only successful waits are learned; one which timed out says nothing about how long the Element takes.  Waits are
+    learned as they happen, and across runs from a :class:`TimingStore`.
+
+    >>> adaptive = AdaptiveTimeouts(multiple=3).learn_from("/var/korlat/timings.jsonl")
+    >>> web_app.set_adaptive_timeouts(adaptive)
+    >>> # waits about 3 x its p95 (rather than 10 seconds) once the spinner is known to go in ~200ms
+    >>> results.get("spinner").wait_until_not_displayed()
+
+    :param multiple: the multiple of the percentile to wait for.
+    :type multiple: int or float
+    :param percentile: the percentile of the observed durations, from 0 to 100.
+    :type percentile: int or float
+    :param minimum_samples: the number of observed waits needed before the timeout adapts.
+    :type minimum_samples: int
+    :param minimum_wait: the shortest timeout, in seconds.
+    :type minimum_wait: int or float
+
+    :var multiple: the multiple of the percentile waited for.
+    :var percentile: the percentile of the observed durations.
+    :var minimum_samples: the number of observed waits needed before the timeout adapts.
+    :var minimum_wait: the shortest timeout, in seconds.
+    """
+    def __init__(self, multiple=MULTIPLE, percentile=PERCENTILE, minimum_samples=MINIMUM_SAMPLES,
+                 minimum_wait=MINIMUM_WAIT_IN_SECONDS):
+        super(AdaptiveTimeouts, self).__init__()
+        assert multiple > 0
+        assert 0 <= percentile <= 100
+        assert minimum_samples > 0
+        assert minimum_wait >= 0
+        self.multiple = multiple
+        self.percentile = percentile
+        self.minimum_samples = minimum_samples
+        self.minimum_wait = minimum_wait
+        self._lock = Lock()
+        self._samples = {}
+
+    def learn(self, container, label, operation, seconds):
+        """Learn how long a wait took.
+
+        :param container: the canonical class of the Element's :class:`Container`.  can be None.
+        :type container: str
+        :param label: the label of the Element.
+        :type label: str
+        :param operation: the wait (ie: wait_until_displayed.)
+        :type operation: str
+        :param seconds: the time the wait took to succeed.
+        :type seconds: float
+        :returns: this AdaptiveTimeouts.
+        """
+        with self._lock:
+            samples = self._samples.setdefault((container, label, operation), [])
+            samples.append(seconds)
+
+            if len(samples) > WINDOW:
+                del samples[0]
+
+        return self
+
+    def learn_from(self, path):
+        """Learn the successful waits recorded in a timing store (see :class:`TimingStore`.)
+
+        :param path: the file of the store.
+        :type path: str
+        :returns: this AdaptiveTimeouts.
+        """
+        for record in load(path):
+            if record["kind"] == WAIT and record["outcome"] == OK:
+                self.learn(record["container"], record["label"], record["operation"], record["ms"] / 1000.0)
+
+        return self
+
+    def record(self, element, kind, operation, started, seconds, outcome):
+        """See record() from :class:`Monitor`.
+        """
+        if kind == WAIT and outcome == OK and element.label is not None:
+            self.learn(_container_of(element), element.label, operation, seconds)
+
+    def timeout(self, element, operation, ceiling):
+        """Get the time to wait for an Element.
+
+        :param element: the Element waited on.
+        :type element: :class:`Element`
+        :param operation: the wait (ie: wait_until_displayed.)
+        :type operation: str
+        :param ceiling: the longest time to wait (ie: the :class:`WebApp` default.)
+        :type ceiling: int or float
+        :returns: the seconds to wait.  the ceiling, if the Element is unlabelled or hasn't been observed enough.
+        """
+        if element.label is None:
+            return ceiling
+
+        with self._lock:
+            samples = list(self._samples.get((_container_of(element), element.label, operation), []))
+
+        if len(samples) < self.minimum_samples:
+            return ceiling
+
+        return min(ceiling, max(self.minimum_wait, self.multiple * percentile(samples, self.percentile)))
+
+
+def _container_of(element):
+    container = getattr(element, "container", None)
+    return canonical_class(container) if container is not None else None
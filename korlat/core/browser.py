@@ -0,0 +1,263 @@
+import os
+import shutil
+import sys
+import tempfile
+from threading import Lock, Thread
+from time import sleep, time
+from uuid import uuid4
+
+from selenium import webdriver
+from selenium.webdriver.firefox.firefox_profile import FirefoxProfile
+
+from webapp import WebApp
+
+
+TMPFS = "/dev/shm"
+"""The memory backed directory the disk cache is put in, when it exists.
+"""
+PREFERENCES = {
+    # no first-run, welcome or what's new pages
+    "browser.startup.page": 0,
+    "browser.startup.homepage": "about:blank",
+    "browser.startup.homepage_override.mstone": "ignore",
+    "startup.homepage_welcome_url": "about:blank",
+    "startup.homepage_welcome_url.additional": "",
+    "browser.shell.checkDefaultBrowser": False,
+    "browser.rights.3.shown": True,
+    # no updates
+    "app.update.enabled": False,
+    "app.update.auto": False,
+    "extensions.update.enabled": False,
+    "browser.search.update": False,
+    # no telemetry
+    "toolkit.telemetry.enabled": False,
+    "toolkit.telemetry.unified": False,
+    "datareporting.healthreport.uploadEnabled": False,
+    "datareporting.policy.dataSubmissionEnabled": False,
+    # no background traffic
+    "browser.safebrowsing.enabled": False,
+    "browser.safebrowsing.malware.enabled": False,
+    "network.prefetch-next": False,
+    "network.http.speculative-parallel-limit": 0,
+}
+"""The preferences of a trimmed Firefox profile.
+"""
+
+
+class ProfileTemplate(object):
+    """ProfileTemplate is a trimmed Firefox profile, built once and cloned for every session.
+
+    The template is a preferences-only profile: it is never launched, so the browser still initializes each clone on
+    its first start.  What it saves is writing the profile, and the first-run pages, updates, telemetry and background
+    traffic the preferences turn off; its disk cache is on tmpfs.  Each clone is a copy of the template's directory,
+    with its own cache directory.
+
+    >>> template = ProfileTemplate()
+    >>> driver = webdriver.Firefox(firefox_profile=template.clone())
+
+    :param preferences: the preferences of the template.  if unspecified, PREFERENCES is used.
+    :type preferences: dict
+    :param cache_directory: the directory the clones' disk caches go under.  if unspecified, TMPFS (when it exists.)
+    :type cache_directory: str
+
+    :var preferences: the preferences of the template.
+    :var path: the directory of the template.  None until it is built.
+    """
+    def __init__(self, preferences=None, cache_directory=None):
+        super(ProfileTemplate, self).__init__()
+        self.preferences = dict(preferences if preferences is not None else PREFERENCES)
+        self.path = None
+        self._lock = Lock()
+        self._cache_directory = cache_directory
+        self._cache = None
+
+        if self._cache_directory is None and os.path.isdir(TMPFS):
+            self._cache_directory = TMPFS
+
+    def build(self):
+        """Build the template, if it isn't already.
+
+        :returns: this ProfileTemplate.
+        """
+        with self._lock:
+            if self.path is None:
+                profile = FirefoxProfile()
+
+                for key, value in self.preferences.items():
+                    profile.set_preference(key, value)
+
+                profile.update_preferences()
+
+                if self._cache_directory is not None:
+                    self._cache = tempfile.mkdtemp(prefix="korlat-cache-", dir=self._cache_directory)
+
+                self.path = profile.path
+
+        return self
+
+    def clone(self):
+        """Clone the template into a new profile.
+
+        :returns: the :class:`FirefoxProfile`, ready to be launched.
+        """
+        self.build()
+        profile = FirefoxProfile(self.path)
+
+        if self._cache is not None:
+            profile.set_preference("browser.cache.disk.parent_directory", os.path.join(self._cache, uuid4().hex))
+
+        return profile
+
+    def remove(self):
+        """Remove the template, and the disk caches of its clones.
+
+        :returns: this ProfileTemplate.
+        """
+        with self._lock:
+            for path in [self.path, self._cache]:
+                if path is not None:
+                    shutil.rmtree(path, ignore_errors=True)
+
+            self.path = None
+            self._cache = None
+
+        return self
+
+
+class DriverFactory(object):
+    """DriverFactory launches browsers from a ProfileTemplate, launching the next one in the background.
+
+    With prewarming, every get() hands over the browser launched in the background while the previous test ran, and
+    starts launching the next.  Call close() when done, to quit the spare browser.
+
+    >>> factory = DriverFactory()
+    >>> class LoginTest(unittest.TestCase):
+    >>>     def setUp(self):
+    >>>         self.web_app = WebApp(factory.get(), "http://coolsite.com")
+
+    :param template: the template to clone profiles from.  if unspecified, a new :class:`ProfileTemplate`.
+    :type template: :class:`ProfileTemplate`
+    :param launch: the function launching a browser, which is passed the profile.  if unspecified, Firefox is launched.
+    :type launch: function
+    :param prewarm: whether to launch the next browser in the background.
+    :type prewarm: bool
+
+    :var template: the template profiles are cloned from.
+    :var prewarm: whether the next browser is launched in the background.
+    """
+    def __init__(self, template=None, launch=None, prewarm=True):
+        super(DriverFactory, self).__init__()
+        self.template = template if template is not None else ProfileTemplate()
+        self.prewarm = prewarm
+        self._launch = launch if launch is not None else _launch_firefox
+        self._lock = Lock()
+        self._spare = None
+
+    def get(self):
+        """Get a browser.
+
+        :returns: the WebDriver, which is the caller's to quit.
+        :raises: whatever launching the browser raised.
+        """
+        with self._lock:
+            spare = self._spare
+            self._spare = None
+
+        driver = spare.result() if spare is not None else self._start()
+
+        if self.prewarm:
+            self._start_spare()
+
+        return driver
+
+    def close(self):
+        """Quit the spare browser, if there is one.
+
+        :returns: this DriverFactory.
+        """
+        with self._lock:
+            spare = self._spare
+            self._spare = None
+
+        if spare is not None:
+            try:
+                spare.result().quit()
+            except Exception:
+                # it never launched; nothing to quit
+                pass
+
+        return self
+
+    def _start(self):
+        return self._launch(self.template.clone())
+
+    def _start_spare(self):
+        spare = _Launch(self._start)
+
+        with self._lock:
+            self._spare = spare
+
+        spare.start()
+
+
+class _Launch(Thread):
+    def __init__(self, start):
+        super(_Launch, self).__init__()
+        self.daemon = True
+        self._start_driver = start
+        self._driver = None
+        self._error = None
+
+    def run(self):
+        try:
+            self._driver = self._start_driver()
+        except Exception:
+            self._error = sys.exc_info()
+
+    def result(self):
+        self.join()
+
+        if self._error is not None:
+            raise self._error[0], self._error[1], self._error[2]
+
+        return self._driver
+
+
+def benchmark(get_driver, url, runs=5, pause=0):
+    """Measure the latency from asking for a browser to the end of its first go_to().
+
+    >>> cold = benchmark(webdriver.Firefox, "http://coolsite.com")
+    >>> warm = benchmark(DriverFactory().get, "http://coolsite.com")
+
+    :param get_driver: the function to get a browser from (ie: get() from :class:`DriverFactory`.)
+    :type get_driver: function
+    :param url: the URL to go_to().
+    :type url: str
+    :param runs: the number of browsers to time.
+    :type runs: int
+    :param pause: the seconds between browsers, standing in for a test (and giving a prewarmed launch its time.)
+    :type pause: int or float
+    :returns: the list of latencies, in seconds.
+    """
+    assert runs > 0
+    assert pause >= 0
+    latencies = []
+
+    for i in range(runs):
+        if i > 0:
+            sleep(pause)
+
+        started = time()
+        driver = get_driver()
+
+        try:
+            WebApp(driver, url).go_to()
+            latencies += [time() - started]
+        finally:
+            driver.quit()
+
+    return latencies
+
+
+def _launch_firefox(profile):
+    return webdriver.Firefox(firefox_profile=profile)
@@ -0,0 +1,209 @@
+from functools import wraps
+from threading import Lock
+from time import time
+
+from korlat.exception import BudgetExceeded
+from monitor import Monitor
+
+
+OUTSIDE = "-"
+"""The element name commands sent outside of any Element operation (ie: go_to, or through a raw WebElement) are
+counted under.
+"""
+
+
+class CommandBudget(Monitor):
+    """CommandBudget counts the driver commands (and time) spent within it, and fails when they exceed the budget.
+
+    Budgets are made through :func:`korlat_budget`.  Each command is attributed to the Element operation which sent
+    it, so a failure shows where the round-trips went.
+
+    :param web_app: the :class:`WebApp` whose driver commands are counted.  if None, the budget can only be used as a
+        decorator of a method whose instance has a web_app (ie: a test case.)
+    :type web_app: :class:`WebApp`
+    :param max_commands: the most commands allowed.  if unspecified, commands aren't limited.
+    :type max_commands: int
+    :param max_seconds: the most time allowed, in seconds.  if unspecified, time isn't limited.
+    :type max_seconds: int or float
+
+    :var web_app: the :class:`WebApp` whose driver commands are counted.
+    :var max_commands: the most commands allowed.  can be None.
+    :var max_seconds: the most time allowed.  can be None.
+    :var commands: the list of (element, command) pairs counted, in the order they were sent.
+    :var seconds: the time spent within the budget.  None until it exits.
+    """
+    def __init__(self, web_app, max_commands=None, max_seconds=None):
+        super(CommandBudget, self).__init__()
+        assert max_commands is None or max_commands >= 0
+        assert max_seconds is None or max_seconds > 0
+        self.web_app = web_app
+        self.max_commands = max_commands
+        self.max_seconds = max_seconds
+        self.commands = []
+        self.seconds = None
+        self._lock = Lock()
+        self._pending = []
+        self._connection = None
+        self._started = None
+
+    def __enter__(self):
+        assert self.web_app is not None
+        self.commands = []
+        self.seconds = None
+        self._pending = []
+        self._connection = _CountingConnection(self.web_app.driver.command_executor, self)
+        self.web_app.driver.command_executor = self._connection
+        self.web_app.add_monitor(self)
+        self._started = time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.seconds = time() - self._started
+        self.web_app.remove_monitor(self)
+
+        if self.web_app.driver.command_executor is self._connection:
+            self.web_app.driver.command_executor = self._connection.executor
+
+        with self._lock:
+            self._assign(OUTSIDE, None)
+
+        # an error raised within the budget is more relevant than the budget
+        if exc_type is None:
+            self.check()
+
+        return False
+
+    def __call__(self, method):
+        @wraps(method)
+        def wrapper(instance, *args, **kwargs):
+            budget = self if self.web_app is not None else \
+                CommandBudget(instance.web_app, self.max_commands, self.max_seconds)
+
+            with budget:
+                return method(instance, *args, **kwargs)
+
+        return wrapper
+
+    def count(self, command):
+        """Count a command as it is sent.
+
+        :param command: the name of the driver command.
+        :type command: str
+        :returns: this CommandBudget.
+        """
+        with self._lock:
+            self._pending += [(time(), command)]
+
+        return self
+
+    def record(self, element, kind, operation, started, seconds, outcome):
+        """See record() from :class:`Monitor`.
+        """
+        container = getattr(element, "container", None)
+        name = element.label if element.label is not None else element.get_identifier()
+
+        if container is not None:
+            name = "%s/%s" % (container.__class__.__name__, name)
+
+        with self._lock:
+            # an operation is recorded once it completes, after any operation nested in it
+            self._assign(name, started)
+
+    def _assign(self, name, started):
+        kept = []
+
+        for sent, command in self._pending:
+            if started is None or sent >= started:
+                self.commands += [(name, command)]
+            else:
+                kept += [(sent, command)]
+
+        self._pending = kept
+
+    def exceeded(self):
+        """Check whether the budget is exceeded.
+
+        :returns: True if more commands were sent (or more time spent) than allowed, False otherwise.
+        """
+        seconds = self.seconds if self.seconds is not None else time() - self._started
+        return (self.max_commands is not None and len(self.commands) + len(self._pending) > self.max_commands) or \
+            (self.max_seconds is not None and seconds > self.max_seconds)
+
+    def check(self):
+        """Assert the budget isn't exceeded.
+
+        :returns: this CommandBudget.
+        :raises: :class:`BudgetExceeded`
+        """
+        if self.exceeded():
+            raise BudgetExceeded(self.report())
+
+        return self
+
+    def breakdown(self):
+        """Get the commands counted per Element and command.
+
+        :returns: the list of (element, command, count), most commands first.
+        """
+        counts = {}
+
+        for key in self.commands:
+            counts[key] = counts.get(key, 0) + 1
+
+        return sorted([(e, c, n) for (e, c), n in counts.items()], key=lambda t: (-t[2], t[0], t[1]))
+
+    def report(self):
+        """Get what was spent against the budget.
+
+        :returns: the report as a str: the totals against their limits, then a line per Element and command.
+        """
+        seconds = self.seconds if self.seconds is not None else time() - self._started
+        lines = ["%d commands%s in %.3fs%s" % (
+            len(self.commands), " (max %d)" % self.max_commands if self.max_commands is not None else "",
+            seconds, " (max %.3fs)" % self.max_seconds if self.max_seconds is not None else "")]
+        lines += ["%6d  %s %s" % (n, element, command) for element, command, n in self.breakdown()]
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.report()
+
+
+class _CountingConnection(object):
+    def __init__(self, executor, budget):
+        super(_CountingConnection, self).__init__()
+        self.executor = executor
+        self.budget = budget
+
+    def execute(self, command, params):
+        self.budget.count(command)
+        return self.executor.execute(command, params)
+
+
+def korlat_budget(web_app=None, max_commands=None, max_seconds=None):
+    """Budget the driver commands (and time) a block of page-object code may spend.
+
+    Works as a context manager, or as a decorator.  Decorating a method without a web_app takes the web_app of the
+    method's instance (ie: the test case.)  Exceeding the budget fails with a breakdown by Element and command.
+
+    >>> with korlat_budget(web_app, max_commands=20, max_seconds=2):
+    >>>     texts = [row.get_text() for row in results.get("row")]
+    BudgetExceeded: 31 commands (max 20) in 0.812s (max 2.000s)
+         1  ResultsContainer/row[0] findElement
+         1  ResultsContainer/row[0] getElementText
+         1  ResultsContainer/row[1] findElement
+         ...
+
+    >>> class SearchTest(unittest.TestCase):
+    >>>     @korlat_budget(max_commands=50)
+    >>>     def test_search(self):
+    >>>         ...
+
+    :param web_app: the :class:`WebApp` whose driver commands are counted.
+    :type web_app: :class:`WebApp`
+    :param max_commands: the most commands allowed.  if unspecified, commands aren't limited.
+    :type max_commands: int
+    :param max_seconds: the most time allowed, in seconds.  if unspecified, time isn't limited.
+    :type max_seconds: int or float
+    :returns: the :class:`CommandBudget`.
+    """
+    return CommandBudget(web_app, max_commands, max_seconds)
@@ -0,0 +1,171 @@
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+from Queue import Queue, Full
+from threading import Thread, Lock
+
+
+DEFAULT_QUEUE_SIZE = 32
+"""The default number of failures a FailureCapture buffers before dropping new ones.
+"""
+INDEX_FILE = "failures.jsonl"
+"""The name of the file (in the capture directory) listing every captured failure, one json object per line.
+"""
+
+
+class Failure(object):
+    """Failure holds the raw artifacts grabbed from the browser at the moment something failed.
+
+    :param reason: a description of what failed.
+    :type reason: str
+    :param test: the label of the test which owns the failure.  can be None.
+    :type test: str
+    :param element: the label (or identifier) of the Element which failed.  can be None.
+    :type element: str
+    :param screenshot: the base64 encoded png screenshot.  can be None.
+    :type screenshot: str
+    :param source: the page source.  can be None.
+    :type source: unicode
+    :param logs: the browser log entries.  can be None.
+    :type logs: list
+    """
+    def __init__(self, reason, test=None, element=None, screenshot=None, source=None, logs=None):
+        super(Failure, self).__init__()
+        self.reason = reason
+        self.test = test
+        self.element = element
+        self.screenshot = screenshot
+        self.source = source
+        self.logs = logs
+
+
+class FailureCapture(object):
+    """FailureCapture writes failure artifacts to disk from a background worker.
+
+    The test thread only grabs the raw data from the driver and hands it off through a bounded queue; decoding,
+    compressing and writing all happen on the worker.  Page sources are gzipped and stored once per distinct
+    content (by sha1), and every failure is listed in INDEX_FILE along with the test and Element it belongs to.
+    If the worker falls behind by more than **queue_size** failures, new failures are dropped (and counted) rather
+    than slowing down the tests.
+
+    >>> web_app.set_failure_capture(FailureCapture("/tmp/failures"))
+    >>> with web_app.capturing_failures("test_login"):
+    >>>     login.check_appearance()
+
+    :param directory: the directory to write artifacts into.  it is created if it doesn't exist.
+    :type directory: str
+    :param queue_size: the maximum number of failures waiting to be written.
+    :type queue_size: int
+    :param capture_timeouts: whether Element wait timeouts are captured (as well as failed checks.)  off by default, as
+        grabbing the artifacts costs the test round trips to the browser on every wait which returns False.
+    :type capture_timeouts: bool
+
+    :var directory: the directory artifacts are written into.
+    :var capture_timeouts: whether Element wait timeouts are captured.
+    :var written: the number of failures written so far.
+    :var dropped: the number of failures dropped because the queue was full.
+    :var failed: the number of failures which couldn't be written (ie: the disk is full.)  each is logged.
+    """
+    def __init__(self, directory, queue_size=DEFAULT_QUEUE_SIZE, capture_timeouts=False):
+        super(FailureCapture, self).__init__()
+        assert queue_size > 0
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.directory = directory
+        self.capture_timeouts = capture_timeouts
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue = Queue(queue_size)
+        self._sources = set()
+        self._lock = Lock()
+        self._worker = Thread(target=self._run, name="korlat-failure-capture")
+        self._worker.daemon = True
+        self._worker.start()
+
+    def submit(self, failure):
+        """Queue the failure to be written.  This never blocks.
+
+        :param failure: the failure to write.
+        :type failure: :class:`Failure`
+        :returns: True if the failure was queued, False if it was dropped.
+        """
+        try:
+            self._queue.put_nowait(failure)
+            return True
+        except Full:
+            with self._lock:
+                self.dropped += 1
+
+            return False
+
+    def flush(self):
+        """Block until every queued failure has been written.
+
+        :returns: this FailureCapture.
+        """
+        self._queue.join()
+        return self
+
+    def _run(self):
+        while True:
+            failure = self._queue.get()
+
+            try:
+                self._write(failure)
+            except Exception:
+                # one unwritable failure mustn't stop the rest from being written
+                with self._lock:
+                    self.failed += 1
+
+                logging.getLogger(__name__).exception("couldn't write failure: %s", failure.reason)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, failure):
+        # only this worker writes, so the number is taken (and the count made) once the record is on disk; a failure
+        # that can't be written leaves the number to the next one, which overwrites any of its partial artifacts
+        n = self.written + 1
+
+        record = {
+            "n": n,
+            "reason": failure.reason,
+            "test": failure.test,
+            "element": failure.element,
+            "screenshot": None,
+            "source": None,
+            "logs": failure.logs,
+        }
+
+        if failure.screenshot is not None:
+            record["screenshot"] = "%d-screenshot.png" % n
+
+            with open(os.path.join(self.directory, record["screenshot"]), "wb") as f:
+                f.write(base64.b64decode(failure.screenshot))
+
+        if failure.source is not None:
+            source = failure.source.encode("utf-8") if isinstance(failure.source, unicode) else failure.source
+            digest = hashlib.sha1(source).hexdigest()
+            record["source"] = "source-%s.html.gz" % digest
+
+            if digest not in self._sources:
+                f = gzip.open(os.path.join(self.directory, record["source"]), "wb")
+
+                try:
+                    f.write(source)
+                finally:
+                    f.close()
+
+                # only once it's on disk, so a failed write is retried by the next record with the same source
+                self._sources.add(digest)
+
+        with open(os.path.join(self.directory, INDEX_FILE), "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+        with self._lock:
+            self.written += 1
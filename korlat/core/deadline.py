@@ -0,0 +1,70 @@
+from time import time
+
+
+class Deadline(object):
+    """Deadline is a time budget shared by every korlat wait made within it.
+
+    Deadlines are made through :meth:`WebApp.deadline`.  Each wait inside one waits at most for the time remaining,
+    rather than its own full timeout, and records how long it took.
+
+    >>> with web_app.deadline(5) as deadline:
+    >>>     login.wait_until_visible()
+    >>>     login.get("submit").click()
+    >>>     home.wait_until_visible()
+    >>> print deadline.report()
+
+    :param seconds: the budget, in seconds.
+    :type seconds: int or float
+    :param parent: the enclosing Deadline, which this one can't outlast.  can be None.
+    :type parent: :class:`Deadline`
+
+    :var seconds: the budget, in seconds.
+    :var started: the time (epoch seconds) the deadline started.
+    :var expires: the time (epoch seconds) the deadline expires.
+    :var spent: the list of (operation, seconds) pairs, in the order the waits were made.
+    """
+    def __init__(self, seconds, parent=None):
+        super(Deadline, self).__init__()
+        assert seconds > 0
+        self.seconds = seconds
+        self.started = time()
+        self.expires = self.started + seconds
+        self.spent = []
+
+        if parent is not None:
+            self.expires = min(self.expires, parent.expires)
+
+    def remaining(self):
+        """Get the time left before this deadline expires.
+
+        :returns: the seconds remaining.  zero or less if expired.
+        """
+        return self.expires - time()
+
+    def record(self, operation, seconds):
+        """Record the time a wait took.
+
+        :param operation: the description of the wait.
+        :type operation: str
+        :param seconds: the time it took.
+        :type seconds: float
+        :returns: this Deadline.
+        """
+        self.spent += [(operation, seconds)]
+        return self
+
+    def report(self):
+        """Get where the time went.
+
+        :returns: the report as a str: a line per wait, then the total and the remaining (or overrun) time.
+        """
+        now = time()
+        remaining = self.expires - now
+        lines = ["%8.3fs  %s" % (seconds, operation) for operation, seconds in self.spent]
+        lines += ["%8.3fs  elapsed of %.3fs (%.3fs waiting), %.3fs %s" %
+                  (now - self.started, self.seconds, sum([s for o, s in self.spent]), abs(remaining),
+                   "remaining" if remaining >= 0 else "over")]
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.report()
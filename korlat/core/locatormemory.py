@@ -0,0 +1,64 @@
+import json
+import os
+from threading import Lock
+
+
+class LocatorMemory(object):
+    """LocatorMemory remembers which locator candidate found an Element, so it can be tried first next time.
+
+    With a **path**, the memory is loaded from (and saved to) a json file, carrying the learned order across runs.
+
+    >>> web_app.set_locator_memory(LocatorMemory("/tmp/locators.json"))
+
+    :param path: the file to persist the memory in.  if unspecified, the memory lasts as long as this object.
+    :type path: str
+
+    :var path: the file the memory is persisted in.  can be None.
+    """
+    def __init__(self, path=None):
+        super(LocatorMemory, self).__init__()
+        self.path = path
+        self._lock = Lock()
+        self._winners = {}
+
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                self._winners = json.load(f)
+
+    def get(self, key):
+        """Get the index of the candidate which last found the Element keyed by key.
+
+        :param key: the key of the Element.
+        :type key: str
+        :returns: the index of the candidate, or None if nothing has been learned.
+        """
+        return self._winners.get(key)
+
+    def put(self, key, index):
+        """Remember the candidate which found the Element keyed by key.
+
+        :param key: the key of the Element.
+        :type key: str
+        :param index: the index of the winning candidate.
+        :type index: int
+        :result: the memory is updated (and saved, if it has a path.)
+        :returns: this LocatorMemory.
+        """
+        with self._lock:
+            if self._winners.get(key) != index:
+                self._winners[key] = index
+                self._save()
+
+        return self
+
+    def _save(self):
+        if self.path is None:
+            return
+
+        # write then rename, so a concurrent reader never sees half a file
+        temporary = "%s.%d.tmp" % (self.path, os.getpid())
+
+        with open(temporary, "w") as f:
+            json.dump(self._winners, f, indent=1, sort_keys=True)
+
+        os.rename(temporary, self.path)
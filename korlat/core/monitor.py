@@ -0,0 +1,114 @@
+from functools import wraps
+import logging
+from threading import local
+from time import time
+
+
+LOOKUP = "lookup"
+"""The kind of operation which finds an element on the page.
+"""
+WAIT = "wait"
+"""The kind of operation which waits on the state of an element.
+"""
+ACTION = "action"
+"""The kind of operation which interacts with an element.
+"""
+READ = "read"
+"""The kind of operation which reads the state of an element (ie: its text or attributes.)
+"""
+
+OK = "ok"
+"""The outcome of an operation which succeeded.
+"""
+FALSE = "false"
+"""The outcome of a wait which gave up (returned False.)
+"""
+
+_active = local()
+
+
+class Monitor(object):
+    """Monitor is notified of every monitored korlat operation.
+
+    Monitors are added to a :class:`WebApp` through add_monitor().
+
+    >>> class PrintMonitor(Monitor):
+    >>>     def record(self, element, kind, operation, started, seconds, outcome):
+    >>>         print element.label, operation, seconds
+    >>> web_app.add_monitor(PrintMonitor())
+    """
+    def __init__(self):
+        super(Monitor, self).__init__()
+
+    def record(self, element, kind, operation, started, seconds, outcome):
+        """Record a completed operation.
+
+        :param element: the Element (or ElementList) operated on.
+        :type element: :class:`Element`
+        :param kind: the kind of operation (:py:const:`LOOKUP`, :py:const:`WAIT`, :py:const:`ACTION` or :py:const:`READ`.)
+        :type kind: str
+        :param operation: the name of the operation (ie: click.)
+        :type operation: str
+        :param started: the time (epoch seconds) the operation started.
+        :type started: float
+        :param seconds: the time the operation took.
+        :type seconds: float
+        :param outcome: :py:const:`OK`, :py:const:`FALSE`, or the name of the exception raised.
+        :type outcome: str
+        """
+        raise NotImplementedError()
+
+
+def monitored(kind):
+    """Decorate an Element (or ElementList) method so its duration and outcome reach the WebApp's monitors.
+
+    Nothing is measured while the WebApp has no monitors.  Only the outermost operation is recorded; those made
+    within it (ie: the lookups a wait polls with, or the one a click makes) are part of it, so no time is counted
+    twice.  A monitor failing to record doesn't affect the operation.
+
+    >>> class Element(object):
+    >>>     @monitored(ACTION)
+    >>>     def click(self):
+    >>>         ...
+
+    :param kind: the kind of operation (:py:const:`LOOKUP`, :py:const:`WAIT`, :py:const:`ACTION` or :py:const:`READ`.)
+    :type kind: str
+    :returns: the decorator.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            monitors = self.web_app.monitors
+
+            if len(monitors) == 0 or getattr(_active, "depth", 0) > 0:
+                return method(self, *args, **kwargs)
+
+            outcome = OK
+            started = time()
+            _active.depth = 1
+
+            try:
+                result = method(self, *args, **kwargs)
+
+                if kind == WAIT and result is False:
+                    outcome = FALSE
+
+                return result
+            except Exception as e:
+                outcome = e.__class__.__name__
+                raise
+            finally:
+                seconds = time() - started
+                _active.depth = 0
+
+                for monitor in monitors:
+                    try:
+                        monitor.record(self, kind, method.__name__, started, seconds, outcome)
+                    except Exception:
+                        # mustn't replace the operation's result (or exception)
+                        logging.getLogger(__name__).exception("%s failed to record %s", monitor.__class__.__name__,
+                                                              method.__name__)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,455 @@
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from fnmatch import fnmatchcase
+import httplib
+import select
+import socket
+from SocketServer import ThreadingMixIn
+from threading import Lock, Thread
+from time import time
+import urllib2
+from urlparse import urlsplit
+
+
+BLOCK = "block"
+"""The rule answering a request with an empty response (or refusing an https connection.)
+"""
+STUB = "stub"
+"""The rule answering a request with a stub body.
+"""
+MEASURE_TIMEOUT_IN_SECONDS = 10
+"""The time a blocked resource is given to be fetched, when measuring what blocking it saves.
+"""
+FORWARD_TIMEOUT_IN_SECONDS = 300
+"""The time a forwarded request (or an https tunnel) waits on the origin for its next bytes, so long polls and slow
+backends are answered.
+"""
+TUNNEL_BUFFER = 65536
+"""The bytes relayed at once through an https tunnel, or of a forwarded response.
+"""
+
+
+class ResourceStat(object):
+    """ResourceStat is what answering one URL from the proxy saved.
+
+    :var url: the URL (for https, only the origin is known.)
+    :var rule: the rule which matched (:py:const:`BLOCK` or :py:const:`STUB`.)
+    :var hits: the number of requests answered.
+    :var size: the bytes of the real resource.  None unless measured.
+    :var seconds: the time fetching the real resource took.  None unless measured.
+    """
+    def __init__(self, url, rule):
+        super(ResourceStat, self).__init__()
+        self.url = url
+        self.rule = rule
+        self.hits = 0
+        self.size = None
+        self.seconds = None
+
+    def bytes_saved(self):
+        """Get the bytes not downloaded.
+
+        :returns: the bytes, or None if not measured.
+        """
+        return self.size * self.hits if self.size is not None else None
+
+    def time_saved(self):
+        """Get the time not spent downloading.
+
+        :returns: the seconds, or None if not measured.
+        """
+        return self.seconds * self.hits if self.seconds is not None else None
+
+
+class ResourceProxy(object):
+    """ResourceProxy is a local intercepting proxy which blocks or stubs the resources matching its rules.
+
+    Third party analytics, fonts and ad scripts often dominate a page load, and add nothing to a test.  Requests
+    matching a rule are answered at once (empty for :py:const:`BLOCK`, the stub body for :py:const:`STUB`); everything
+    else is forwarded.  Rules are shell style patterns matched against the URL, the first to match wins.  https is
+    tunnelled rather than decrypted, so only its origin is seen (matched as https://host/), and a match refuses the
+    connection.
+
+    The browser is pointed at the proxy when it is launched (see configure()), then the WebApp is given the proxy.
+
+    >>> proxy = ResourceProxy(measure=True) \\
+    >>>     .block("*google-analytics.com/*") \\
+    >>>     .block("https://fonts.googleapis.com/") \\
+    >>>     .stub("*/ads.js", "window.ads = [];", "application/javascript") \\
+    >>>     .start()
+    >>> driver = webdriver.Firefox(firefox_profile=proxy.configure(FirefoxProfile()))
+    >>> web_app = WebApp(driver, "http://coolsite.com").set_resource_proxy(proxy)
+    >>> web_app.go_to()
+    >>> print proxy.report()
+
+    :param port: the local port to listen on.  if unspecified, a free port is picked.
+    :type port: int
+    :param measure: whether to fetch each blocked (or stubbed) http URL once, in the background, to measure what
+        blocking it saves.
+    :type measure: bool
+
+    :var port: the port listened on.  None until started.
+    :var measure: whether blocked URLs are measured.
+    """
+    def __init__(self, port=0, measure=False):
+        super(ResourceProxy, self).__init__()
+        self.port = None
+        self.measure = measure
+        self._requested_port = port
+        self._rules = []
+        self._stats = {}
+        self._lock = Lock()
+        self._server = None
+        self._measuring = []
+
+    def block(self, pattern):
+        """Block the URLs matching the pattern.
+
+        :param pattern: the shell style pattern (ie: \\*doubleclick.net/\\*.)
+        :type pattern: str
+        :returns: this ResourceProxy.
+        """
+        self._rules += [(pattern, BLOCK, None, None)]
+        return self
+
+    def stub(self, pattern, body="", content_type="text/plain"):
+        """Answer the URLs matching the pattern with a stub body.
+
+        :param pattern: the shell style pattern (ie: \\*/ads.js.)
+        :type pattern: str
+        :param body: the body to answer with.
+        :type body: str
+        :param content_type: the Content-Type of the body.
+        :type content_type: str
+        :returns: this ResourceProxy.
+        """
+        self._rules += [(pattern, STUB, body, content_type)]
+        return self
+
+    def match(self, url):
+        """Find the rule matching the URL.
+
+        :param url: the URL.
+        :type url: str
+        :returns: the (pattern, rule, body, content_type) of the first matching rule, or None.
+        """
+        for rule in self._rules:
+            if fnmatchcase(url, rule[0]):
+                return rule
+
+        return None
+
+    def start(self):
+        """Start listening, in the background.
+
+        :returns: this ResourceProxy.
+        """
+        assert self._server is None
+        self._server = _ProxyServer(("127.0.0.1", self._requested_port), _ProxyHandler)
+        self._server.proxy = self
+        self.port = self._server.server_address[1]
+        thread = Thread(target=self._server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        """Stop listening.
+
+        :returns: this ResourceProxy.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+        return self
+
+    def configure(self, profile):
+        """Point a Firefox profile at this proxy (for every protocol, including localhost.)
+
+        :param profile: the profile to launch Firefox with.
+        :type profile: :class:`FirefoxProfile`
+        :returns: the profile.
+        """
+        for key, value in self.firefox_preferences().items():
+            profile.set_preference(key, value)
+
+        return profile
+
+    def firefox_preferences(self):
+        """Get the Firefox preferences pointing at this proxy (ie: to add to a :class:`ProfileTemplate`.)
+
+        :returns: the dict of preferences.
+        """
+        assert self.port is not None
+        return {
+            "network.proxy.type": 1,
+            "network.proxy.http": "127.0.0.1",
+            "network.proxy.http_port": self.port,
+            "network.proxy.ssl": "127.0.0.1",
+            "network.proxy.ssl_port": self.port,
+            "network.proxy.no_proxies_on": "",
+        }
+
+    def address(self):
+        """Get the host:port of this proxy (ie: for the proxy capabilities of a remote driver.)
+
+        :returns: the address as a str.
+        """
+        assert self.port is not None
+        return "127.0.0.1:%d" % self.port
+
+    def stats(self):
+        """Get what the rules saved, per URL.
+
+        :returns: the list of :class:`ResourceStat`, most time saved (then most hits) first.
+        """
+        with self._lock:
+            stats = self._stats.values()
+
+        return sorted(stats, key=lambda s: (-(s.time_saved() or 0), -s.hits, s.url))
+
+    def wait_for_measurements(self):
+        """Wait until the URLs being measured are.
+
+        :returns: this ResourceProxy.
+        """
+        while True:
+            with self._lock:
+                if len(self._measuring) == 0:
+                    return self
+
+                thread = self._measuring[0]
+
+            thread.join()
+
+            with self._lock:
+                if thread in self._measuring:
+                    self._measuring.remove(thread)
+
+    def report(self):
+        """Get what the rules saved, per URL.
+
+        :returns: the report as a str: a line per URL, then the totals.
+        """
+        stats = self.stats()
+        lines = ["%6s %12s %10s  %s" % ("hits", "bytes saved", "s saved", "url")]
+        lines += ["%6d %12s %10s  %s %s" % (s.hits, _or_unknown("%d", s.bytes_saved()), _or_unknown("%.3f", s.time_saved()),
+                                            s.rule, s.url) for s in stats]
+        lines += ["%6d %12d %10.3f  total" % (sum([s.hits for s in stats]), sum([s.bytes_saved() or 0 for s in stats]),
+                                              sum([s.time_saved() or 0 for s in stats]))]
+        return "\n".join(lines)
+
+    def _hit(self, url, rule):
+        with self._lock:
+            first = url not in self._stats
+
+            if first:
+                self._stats[url] = ResourceStat(url, rule)
+
+            self._stats[url].hits += 1
+
+            if first and self.measure and url.startswith("http://"):
+                thread = Thread(target=self._measure, args=(self._stats[url],))
+                thread.daemon = True
+                self._measuring.append(thread)
+                thread.start()
+
+    def _measure(self, stat):
+        started = time()
+
+        try:
+            # directly, rather than through any proxy from the environment
+            opener = urllib2.build_opener(urllib2.ProxyHandler({}))
+            size = len(opener.open(stat.url, timeout=MEASURE_TIMEOUT_IN_SECONDS).read())
+        except Exception:
+            # unreachable or failing: there's nothing to report as saved
+            return
+
+        with self._lock:
+            stat.size = size
+            stat.seconds = time() - started
+
+
+class _ProxyServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_CONNECT(self):
+        host, port = self.path.rsplit(":", 1)
+        url = "https://%s/" % host
+        rule = self.server.proxy.match(url)
+
+        if rule is not None:
+            self.server.proxy._hit(url, rule[1])
+            self._answer(403, "", "text/plain")
+            return
+
+        try:
+            upstream = socket.create_connection((host, int(port)), FORWARD_TIMEOUT_IN_SECONDS)
+        except socket.error:
+            self._answer(502, "", "text/plain")
+            return
+
+        self.send_response(200, "Connection established")
+        self.end_headers()
+        self.close_connection = 1
+        _tunnel(self.connection, upstream)
+
+    def do_GET(self):
+        self._handle()
+
+    do_HEAD = do_GET
+    do_POST = do_GET
+    do_PUT = do_GET
+    do_DELETE = do_GET
+    do_OPTIONS = do_GET
+    do_PATCH = do_GET
+
+    def _handle(self):
+        url = self.path
+        rule = self.server.proxy.match(url)
+        length = int(self.headers.getheader("Content-Length") or 0)
+        body = self.rfile.read(length) if length > 0 else None
+
+        if rule is not None:
+            self.server.proxy._hit(url, rule[1])
+
+            if rule[1] == BLOCK:
+                self._answer(204, "", None)
+            else:
+                self._answer(200, rule[2], rule[3])
+
+            return
+
+        parts = urlsplit(url)
+        path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        headers = dict([(k, v) for k, v in self.headers.items() if k.lower() not in _HOP_BY_HOP])
+        upstream = httplib.HTTPConnection(parts.hostname, parts.port or 80, timeout=FORWARD_TIMEOUT_IN_SECONDS)
+
+        try:
+            upstream.request(self.command, path, body, headers)
+            # read from the socket directly (rather than through getresponse()), so the body is relayed as it arrives
+            sock = upstream.sock
+            response = httplib.HTTPResponse(sock, method=self.command)
+            response.begin()
+        except (socket.error, httplib.HTTPException):
+            upstream.close()
+            self._answer(502, "", "text/plain")
+            return
+
+        try:
+            self.send_response(response.status, response.reason)
+
+            for line in response.msg.headers:
+                key, value = line.split(":", 1)
+
+                if key.strip().lower() not in _HOP_BY_HOP \
+                        and (key.strip().lower() != "content-length" or response.length is not None):
+                    self.send_header(key.strip(), value.strip())
+
+            if response.length is None:
+                # the body (chunked, or up to the origin closing) ends when this connection closes
+                self.send_header("Connection", "close")
+                self.close_connection = 1
+
+            self.end_headers()
+
+            for data in _relay(response, sock):
+                self.wfile.write(data)
+        except (socket.error, httplib.HTTPException, ValueError):
+            # the response is underway; all that's left is to drop the connection
+            self.close_connection = 1
+        finally:
+            response.close()
+            upstream.close()
+
+    def _answer(self, status, body, content_type):
+        self.send_response(status)
+
+        if content_type is not None:
+            self.send_header("Content-Type", content_type)
+
+        if status != 204:
+            self.send_header("Content-Length", str(len(body)))
+
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        if self.command != "HEAD" and status != 204:
+            self.wfile.write(body)
+
+    def finish(self):
+        try:
+            BaseHTTPRequestHandler.finish(self)
+        except socket.error:
+            # the browser went away (ie: it gave up on a refused connection); nothing is left to answer
+            pass
+
+    def log_message(self, format, *args):
+        # quiet; the stats are the report
+        pass
+
+
+_HOP_BY_HOP = set(["connection", "keep-alive", "proxy-connection", "proxy-authorization", "te", "trailers",
+                   "transfer-encoding", "upgrade"])
+
+
+def _relay(response, sock):
+    if response.chunked:
+        while True:
+            size = int(response.fp.readline().split(";", 1)[0], 16)
+
+            if size == 0:
+                break
+
+            yield response.fp.read(size)
+            response.fp.readline()
+
+        # the trailers, up to the blank line
+        while response.fp.readline() not in ["\r\n", "\n", ""]:
+            pass
+    else:
+        remaining = response.length
+
+        while remaining is None or remaining > 0:
+            data = sock.recv(TUNNEL_BUFFER if remaining is None else min(TUNNEL_BUFFER, remaining))
+
+            if len(data) == 0:
+                if remaining is not None:
+                    raise httplib.IncompleteRead("")
+
+                return
+
+            if remaining is not None:
+                remaining -= len(data)
+
+            yield data
+
+
+def _tunnel(client, upstream):
+    sockets = [client, upstream]
+
+    try:
+        while True:
+            readable, writable, broken = select.select(sockets, [], sockets, FORWARD_TIMEOUT_IN_SECONDS)
+
+            if len(broken) > 0 or len(readable) == 0:
+                return
+
+            for source in readable:
+                data = source.recv(TUNNEL_BUFFER)
+
+                if len(data) == 0:
+                    return
+
+                (upstream if source is client else client).sendall(data)
+    finally:
+        upstream.close()
+
+
+def _or_unknown(format, value):
+    return format % value if value is not None else "?"
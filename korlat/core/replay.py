@@ -0,0 +1,220 @@
+from collections import deque
+from contextlib import contextmanager
+import gzip
+import json
+from threading import local, Lock
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from korlat.exception import ReplayDivergence
+
+
+FORMAT_VERSION = 2
+"""The version of the session file format written by RecordingConnection.
+"""
+POLL_WINDOW = 4
+"""The number of the most recent polls of a wait which may be repeated without diverging.
+"""
+
+_polling = local()
+
+
+@contextmanager
+def polling():
+    """Mark the driver commands sent within the context as a wait polling its condition.
+
+    A recording marks them, so that a replay may repeat them (see :class:`ReplayConnection`.)
+    :meth:`WebApp.wait_until` polls within this context.
+    """
+    _polling.depth = getattr(_polling, "depth", 0) + 1
+
+    try:
+        yield
+    finally:
+        _polling.depth -= 1
+
+
+def is_polling():
+    """Check whether the current thread is polling the condition of a wait (see :func:`polling`.)
+
+    :returns: True if polling, False otherwise.
+    """
+    return getattr(_polling, "depth", 0) > 0
+
+
+def record(driver, path):
+    """Start recording every command the driver sends (and the responses it gets back.)
+
+    Recording should start before the :class:`WebApp` is created, so that the replay sees the same
+    command sequence from the very start.
+
+    >>> driver = webdriver.Firefox()
+    >>> recording = record(driver, "/tmp/login.session")
+    >>> web_app = WebApp(driver, "http://coolsite.com").go_to()
+    >>> LoginContainer(web_app).get("username").send_keys("bob")
+    >>> driver.quit()
+    >>> recording.close()
+
+    :param driver: the selenium.WebDriver instance.
+    :type driver: :class:`WebDriver`
+    :param path: the session file to write.
+    :type path: str
+    :returns: the :class:`RecordingConnection` now installed as the driver's command executor.
+    """
+    recording = RecordingConnection(driver, path)
+    driver.command_executor = recording
+    return recording
+
+
+class RecordingConnection(object):
+    """RecordingConnection is a command executor which logs every command and response to a session file.
+
+    It wraps the driver's current command executor (whatever that is), so it can be combined with
+    other transports.  The session file is gzipped json, one command per line, each marked with whether a wait
+    sent it while polling.
+
+    :param driver: the selenium.WebDriver instance whose commands are recorded.
+    :type driver: :class:`WebDriver`
+    :param path: the session file to write.
+    :type path: str
+
+    :var executor: the command executor being recorded.
+    :var path: the session file being written.
+    :var count: the number of commands recorded so far.
+    """
+    def __init__(self, driver, path):
+        super(RecordingConnection, self).__init__()
+        self.executor = driver.command_executor
+        self.path = path
+        self.count = 0
+        self._lock = Lock()
+        self._file = gzip.open(path, "wb")
+        self._write({
+            "korlat_session": FORMAT_VERSION,
+            "session_id": driver.session_id,
+            "capabilities": driver.capabilities,
+        })
+
+    def execute(self, command, params):
+        response = self.executor.execute(command, params)
+
+        with self._lock:
+            # the driver modifies the response after we hand it back, so it is serialized right away
+            self._write([command, params, response, is_polling()])
+            self.count += 1
+
+        return response
+
+    def close(self):
+        """Finish the session file.
+
+        :returns: this RecordingConnection.
+        """
+        with self._lock:
+            self._file.close()
+
+        return self
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+
+class ReplayConnection(object):
+    """ReplayConnection is a command executor which serves the responses from a session file.
+
+    Every command executed must match the next recorded command (name and parameters), otherwise
+    :class:`ReplayDivergence` is raised.  The one exception is a poll: replay runs faster than the recording,
+    so a wait may poll more often than it did while recording.  A wait repeating one of the last POLL_WINDOW
+    commands its recorded counterpart polled with is therefore answered with the same response it got the last time.
+    Any other repeated command diverges.
+
+    :param path: the session file to replay.
+    :type path: str
+
+    :var path: the session file being replayed.
+    :var session_id: the id of the recorded session.
+    :var capabilities: the capabilities of the recorded session.
+    :var position: the number of recorded commands served so far.
+    """
+    def __init__(self, path):
+        super(ReplayConnection, self).__init__()
+        self.path = path
+        f = gzip.open(path, "rb")
+
+        try:
+            header = json.loads(f.readline())
+            assert header.get("korlat_session") == FORMAT_VERSION
+            self._entries = [json.loads(line) for line in f]
+        finally:
+            f.close()
+
+        self.session_id = header["session_id"]
+        self.capabilities = header["capabilities"]
+        self.position = 0
+        self._recent = deque(maxlen=POLL_WINDOW)
+
+    def execute(self, command, params):
+        # compare against the parameters as they would have been written
+        params = json.loads(json.dumps(params))
+
+        if self.position < len(self._entries):
+            expected_command, expected_params, response, polled = self._entries[self.position]
+
+            if command == expected_command and params == expected_params:
+                self.position += 1
+
+                if polled:
+                    self._recent.appendleft(self._entries[self.position - 1])
+                else:
+                    # the wait is over; its polls can't be repeated anymore
+                    self._recent.clear()
+
+                return json.loads(json.dumps(response))
+        else:
+            expected_command, expected_params = None, None
+
+        if is_polling():
+            for recent_command, recent_params, response, polled in self._recent:
+                if recent_command == command and recent_params == params:
+                    return json.loads(json.dumps(response))
+
+        raise ReplayDivergence(self.position, (expected_command, expected_params), (command, params))
+
+    def remaining(self):
+        """Get the number of recorded commands not yet replayed.
+
+        :returns: the number of commands left.
+        """
+        return len(self._entries) - self.position
+
+    def check_complete(self):
+        """Check that the whole recording was replayed.
+
+        :returns: this ReplayConnection.
+        :raises: :class:`ReplayDivergence` (if recorded commands were never issued)
+        """
+        if self.remaining() > 0:
+            expected_command, expected_params, response, polled = self._entries[self.position]
+            raise ReplayDivergence(self.position, (expected_command, expected_params), None)
+
+        return self
+
+
+class ReplayDriver(WebDriver):
+    """ReplayDriver is a selenium WebDriver which replays a recorded session instead of driving a browser.
+
+    >>> web_app = WebApp(ReplayDriver("/tmp/login.session"), "http://coolsite.com").go_to()
+    >>> LoginContainer(web_app).get("username").send_keys("bob")
+    >>> web_app.driver.command_executor.check_complete()
+
+    :param path: the session file to replay.
+    :type path: str
+    """
+    def __init__(self, path):
+        super(ReplayDriver, self).__init__(ReplayConnection(path), {})
+
+    def start_session(self, desired_capabilities, browser_profile=None):
+        # the recorded session is already started
+        self.session_id = self.command_executor.session_id
+        self.capabilities = self.command_executor.capabilities
+        self.w3c = "specificationLevel" in self.capabilities
@@ -0,0 +1,226 @@
+_SNAPSHOT = """
+function korlatSnapshot(xpath) {
+    var found = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var nodes = [];
+    for (var i = 0; i < found.snapshotLength; i++) {
+        nodes.push(found.snapshotItem(i));
+    }
+    return nodes;
+}
+function korlatDisplayed(e) {
+    if (e.offsetWidth === 0 && e.offsetHeight === 0 && e.getClientRects().length === 0) {
+        return false;
+    }
+    var style = window.getComputedStyle(e);
+    return style.visibility !== 'hidden' && style.display !== 'none';
+}
+"""
+
+FILTER_SCRIPT = _SNAPSHOT + """
+var nodes = korlatSnapshot(arguments[0]);
+var criteria = arguments[1];
+var limit = arguments[2];
+var matches = [];
+for (var i = 0; i < nodes.length && (limit === null || matches.length < limit); i++) {
+    var e = nodes[i];
+    if (criteria.text !== null && (e.textContent || '').indexOf(criteria.text) < 0) {
+        continue;
+    }
+    var attributes = true;
+    for (var name in criteria.attr) {
+        var value = e.getAttribute(name);
+        if (value === null || (criteria.attr[name] !== null && value !== criteria.attr[name])) {
+            attributes = false;
+            break;
+        }
+    }
+    if (!attributes) {
+        continue;
+    }
+    if (criteria.css !== null) {
+        var matchesSelector = e.matches || e.msMatchesSelector || e.webkitMatchesSelector;
+        if (!matchesSelector.call(e, criteria.css)) {
+            continue;
+        }
+    }
+    if (criteria.displayed !== null && korlatDisplayed(e) !== criteria.displayed) {
+        continue;
+    }
+    matches.push(i);
+}
+return matches;
+"""
+"""Get the (0 based) indices of the nodes matched by an xpath which also meet the criteria.
+
+arguments: the xpath, the criteria ({text, attr, css, displayed}, None to ignore), the maximum number of indices (or None.)
+"""
+
+
+def filter_indices(driver, xpath, text=None, attr=None, css=None, displayed=None, limit=None):
+    """Get the indices of the nodes matched by the xpath which meet all the criteria, evaluated in a single script call.
+
+    >>> filter_indices(driver, "//tr", text="Bob", displayed=True)
+    [2, 7]
+
+    :param driver: the driver of the page to evaluate on (switched to the relevant frame.)
+    :type driver: :class:`selenium.webdriver.remote.webdriver.WebDriver`
+    :param xpath: the xpath locating the nodes to filter.
+    :type xpath: str
+    :param text: the text the node's text must contain.
+    :type text: str
+    :param attr: the attributes the node must have, mapped to their exact value (or None to only require the attribute.)
+    :type attr: dict
+    :param css: the css selector the node must match.
+    :type css: str
+    :param displayed: whether the node must be displayed (or not.)
+    :type displayed: bool
+    :param limit: the maximum number of indices to find.
+    :type limit: int
+    :returns: the (0 based) list of indices, in document order.
+    """
+    criteria = {
+        "text": text,
+        "attr": attr or {},
+        "css": css,
+        "displayed": displayed
+    }
+    return driver.execute_script(FILTER_SCRIPT, xpath, criteria, limit)
+
+
+TABLE_SCRIPT = """
+var table = arguments[0];
+var names = arguments[1];
+var headers = [];
+var rows = [];
+for (var i = 0; i < table.rows.length; i++) {
+    var row = table.rows[i];
+    var heading = row.parentNode.tagName === 'THEAD' ||
+        (rows.length === 0 && row.cells.length > 0 && row.querySelector('td') === null);
+    if (heading) {
+        headers = [];
+        for (var c = 0; c < row.cells.length; c++) {
+            headers.push(row.cells[c].textContent.trim());
+        }
+    } else {
+        rows.push(row);
+    }
+}
+var width = headers.length;
+for (var r = 0; r < rows.length; r++) {
+    width = Math.max(width, rows[r].cells.length);
+}
+var columns = [];
+var attributes = {};
+for (var n = 0; n < names.length; n++) {
+    attributes[names[n]] = [];
+}
+for (var c = 0; c < width; c++) {
+    var column = [];
+    for (var n = 0; n < names.length; n++) {
+        attributes[names[n]].push([]);
+    }
+    for (var r = 0; r < rows.length; r++) {
+        var cell = rows[r].cells[c];
+        column.push(cell ? cell.textContent.trim() : null);
+        for (var n = 0; n < names.length; n++) {
+            attributes[names[n]][c].push(cell ? cell.getAttribute(names[n]) : null);
+        }
+    }
+    columns.push(column);
+}
+return {'headers': headers, 'columns': columns, 'attributes': attributes};
+"""
+"""Get the headers, and the cell text (and attributes) column by column, of a table.
+
+arguments: the table, the names of the cell attributes to extract.
+"""
+
+
+def table_data(driver, table, attributes=[]):
+    """Get the contents of the table in a single script call.
+
+    The header is the last row of the thead (or the leading row of only th cells.)  Every other row is a data row.
+    Missing (ragged) cells are None.
+
+    :param driver: the driver of the page to evaluate on (switched to the relevant frame.)
+    :type driver: :class:`selenium.webdriver.remote.webdriver.WebDriver`
+    :param table: the table.
+    :type table: :class:`selenium.webdriver.remote.webelement.WebElement`
+    :param attributes: the names of the cell attributes to extract.
+    :type attributes: list
+    :returns: a dict of the "headers" list, the "columns" (a list of each column's cell text) and the "attributes" (each name mapped to its columns.)
+    """
+    return driver.execute_script(TABLE_SCRIPT, table, list(attributes))
+
+
+PROBE_SCRIPT = _SNAPSHOT + """
+var out = [];
+for (var i = 0; i < arguments[0].length; i++) {
+    var e = document.evaluate(arguments[0][i], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (e === null) {
+        out.push({'exists': false, 'displayed': false, 'width': 0, 'height': 0});
+    } else {
+        var rect = e.getBoundingClientRect();
+        out.push({'exists': true, 'displayed': korlatDisplayed(e), 'width': Math.round(rect.width), 'height': Math.round(rect.height)});
+    }
+}
+return out;
+"""
+"""Get whether the first node of each xpath exists, is displayed, and its size.
+
+arguments: the list of xpaths.
+"""
+
+
+def probe(driver, xpaths):
+    """Probe the first node located by each xpath, all in a single script call.
+
+    >>> probe(driver, ["//*[@id='search']", "//*[@id='search']//button"])
+    [{u'exists': True, u'displayed': True, u'width': 200, u'height': 24}, {u'exists': False, ...}]
+
+    :param driver: the driver of the page to evaluate on (switched to the relevant frame.)
+    :type driver: :class:`selenium.webdriver.remote.webdriver.WebDriver`
+    :param xpaths: the xpaths to probe.
+    :type xpaths: list
+    :returns: a dict of "exists", "displayed", "width" and "height" per xpath, in the same order.
+    """
+    return driver.execute_script(PROBE_SCRIPT, list(xpaths))
+
+
+GENERATION_SCRIPT = """
+var generation = window.__korlat_generation;
+if (!generation) {
+    if (typeof MutationObserver === 'undefined') {
+        return null;
+    }
+    generation = window.__korlat_generation = {'id': Math.random().toString(36).slice(2), 'count': 0};
+    new MutationObserver(function(mutations) {
+        generation.count += mutations.length;
+    }).observe(document, {'childList': true, 'subtree': true, 'attributes': true, 'characterData': true});
+}
+return generation.id + ':' + generation.count;
+"""
+"""Get the generation of the current document: an id unique to the document, and the number of DOM mutations seen
+since korlat started observing it.  Installs the observer the first time.  null if mutations can't be observed.
+"""
+
+
+COUNT_SCRIPT = """
+return document.evaluate('count(' + arguments[0] + ')', document, null, XPathResult.NUMBER_TYPE, null).numberValue;
+"""
+"""Get the number of nodes matched by an xpath.
+
+arguments: the xpath.
+"""
+
+
+def count_matches(driver, xpath):
+    """Count the nodes matched by the xpath, without transferring a reference to any of them.
+
+    :param driver: the driver of the page to evaluate on (switched to the relevant frame.)
+    :type driver: :class:`selenium.webdriver.remote.webdriver.WebDriver`
+    :param xpath: the xpath to count.
+    :type xpath: str
+    :returns: the number of matching nodes.
+    """
+    return int(driver.execute_script(COUNT_SCRIPT, xpath))
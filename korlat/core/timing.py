@@ -0,0 +1,112 @@
+import json
+import os
+from threading import Lock
+from time import strftime
+
+from korlat.common.util import canonical_class
+from monitor import Monitor
+
+
+FLUSH_SIZE = 200
+"""The number of records a TimingStore buffers before appending them to its file.
+"""
+FIELDS = ["run", "container", "label", "kind", "operation", "ms", "outcome"]
+"""The fields of a timing record, in the order they are stored.
+"""
+
+
+class TimingStore(Monitor):
+    """TimingStore appends the duration of every korlat lookup, wait, action and read to a local file, across runs.
+
+    Each record is keyed by the run, the canonical class of the Element's :class:`Container` and the Element's label,
+    and is stored as a compact json array (see FIELDS) on its own line.  Records are buffered and appended
+    FLUSH_SIZE at a time; call close() at the end of the run.  The store is read back by
+    :mod:`korlat.tools.timingreport`.
+
+    >>> store = TimingStore("/var/korlat/timings.jsonl", run="release-1.4")
+    >>> web_app.add_monitor(store)
+    >>> ...
+    >>> store.close()
+
+    :param path: the file to append to.
+    :type path: str
+    :param run: the name of this run.  if unspecified, the current time is used.
+    :type run: str
+
+    :var path: the file appended to.
+    :var run: the name of this run.
+    """
+    def __init__(self, path, run=None):
+        super(TimingStore, self).__init__()
+        self.path = path
+        self.run = run if run is not None else strftime("%Y%m%d-%H%M%S")
+        self._lock = Lock()
+        self._buffer = []
+
+    def record(self, element, kind, operation, started, seconds, outcome):
+        """See record() from :class:`Monitor`.
+        """
+        container = getattr(element, "container", None)
+        entry = [
+            self.run,
+            canonical_class(container) if container is not None else None,
+            element.label if element.label is not None else element.get_identifier(),
+            kind,
+            operation,
+            round(seconds * 1000, 2),
+            outcome
+        ]
+
+        with self._lock:
+            self._buffer += [entry]
+
+            if len(self._buffer) >= FLUSH_SIZE:
+                self._flush()
+
+    def flush(self):
+        """Append the buffered records to the file.
+
+        :returns: this TimingStore.
+        """
+        with self._lock:
+            self._flush()
+
+        return self
+
+    def _flush(self):
+        if len(self._buffer) == 0:
+            return
+
+        with open(self.path, "a") as f:
+            f.write("".join([json.dumps(entry, separators=(",", ":")) + "\n" for entry in self._buffer]))
+
+        self._buffer = []
+
+    def close(self):
+        """Flush the remaining records.  The store may still be used afterwards.
+
+        :returns: this TimingStore.
+        """
+        return self.flush()
+
+
+def load(path):
+    """Load the records of a timing store.
+
+    :param path: the file of the store.
+    :type path: str
+    :returns: the list of records, each a dict keyed by FIELDS.  empty if the store doesn't exist.
+    """
+    records = []
+
+    if not os.path.exists(path):
+        return records
+
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+
+            if len(line) > 0:
+                records += [dict(zip(FIELDS, json.loads(line)))]
+
+    return records
@@ -0,0 +1,203 @@
+from contextlib import contextmanager
+from functools import wraps
+import json
+import os
+from threading import current_thread, Lock
+from time import time
+
+from monitor import Monitor, OK
+
+
+TEST = "test"
+"""The category of a span opened around a test (or any block of a test.)
+"""
+CONTAINER = "container"
+"""The category of a span of a Container (or WebApp) method.
+"""
+DELEGATE = "wait_delegate"
+"""The category of a span of the WebApp's :class:`WaitDelegate`.
+"""
+COMMAND = "command"
+"""The category of a span of a driver command.
+"""
+
+
+class Tracer(Monitor):
+    """Tracer collects nested spans of a test's korlat operations, and exports them as a Chrome trace.
+
+    Spans nest as: the test, Container (and WebApp) methods, the WaitDelegate, Element methods (the outermost lookup,
+    wait, action or read, see :class:`Monitor`) and the driver commands they send.  Each span carries its labels,
+    identifiers and outcome.  The trace file loads in chrome://tracing, Perfetto or speedscope.
+
+    Nothing is traced until the Tracer is set on a :class:`WebApp`; without one, korlat only checks for its absence.
+
+    >>> tracer = Tracer()
+    >>> web_app.set_tracer(tracer)
+    >>> with tracer.span("test_login"):
+    >>>     web_app.go_to(ready=login)
+    >>>     login.get("username").send_keys("bob")
+    >>> tracer.save("/tmp/test_login.trace.json")
+
+    :var events: the trace events collected so far.
+    """
+    def __init__(self):
+        super(Tracer, self).__init__()
+        self.events = []
+        self._lock = Lock()
+        self._pid = os.getpid()
+
+    @contextmanager
+    def span(self, name, category=TEST, **args):
+        """Trace the block within the context as a span.
+
+        :param name: the name of the span.
+        :type name: str
+        :param category: the category of the span.
+        :type category: str
+        :param args: the details to attach to the span.
+        :result: the span is recorded once the block exits, with the outcome :py:const:`OK` or the name of the exception raised.
+        """
+        outcome = OK
+        started = time()
+
+        try:
+            yield self
+        except Exception as e:
+            outcome = e.__class__.__name__
+            raise
+        finally:
+            args["outcome"] = outcome
+            self.add(name, category, started, time() - started, args)
+
+    def record(self, element, kind, operation, started, seconds, outcome):
+        """See record() from :class:`Monitor`.
+        """
+        container = getattr(element, "container", None)
+        args = {
+            "label": element.label,
+            "identifier": element.get_identifier(),
+            "outcome": outcome,
+        }
+
+        if container is not None:
+            args["container"] = container.__class__.__name__
+
+        name = element.label if element.label is not None else element.get_identifier()
+        self.add("%s %s" % (name, operation), kind, started, seconds, args)
+
+    def add(self, name, category, started, seconds, args=None):
+        """Add a completed span.
+
+        :param name: the name of the span.
+        :type name: str
+        :param category: the category of the span.
+        :type category: str
+        :param started: the time (epoch seconds) the span started.
+        :type started: float
+        :param seconds: the duration of the span.
+        :type seconds: float
+        :param args: the details to attach to the span.
+        :type args: dict
+        :returns: this Tracer.
+        """
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": int(started * 1000000),
+            "dur": int(seconds * 1000000),
+            "pid": self._pid,
+            "tid": current_thread().ident,
+            "args": args or {},
+        }
+
+        with self._lock:
+            self.events.append(event)
+
+        return self
+
+    def clear(self):
+        """Drop the spans collected so far.
+
+        :returns: this Tracer.
+        """
+        with self._lock:
+            self.events = []
+
+        return self
+
+    def save(self, path):
+        """Write the spans collected so far as a Chrome trace (json) file.
+
+        :param path: the file to write.
+        :type path: str
+        :returns: this Tracer.
+        """
+        with self._lock:
+            # outer spans first, so viewers nest every span under its parent
+            events = sorted(self.events, key=lambda e: (e["ts"], -e["dur"]))
+
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, separators=(",", ":"))
+
+        return self
+
+
+class TracingConnection(object):
+    """TracingConnection is a command executor which traces every command sent through it.
+
+    It wraps the driver's current command executor (whatever that is), so it can be combined with other
+    transports.  It is installed by set_tracer() from :class:`WebApp`.
+
+    :param executor: the command executor to trace.
+    :type executor: :class:`RemoteConnection`
+    :param tracer: the tracer to add the command spans to.
+    :type tracer: :class:`Tracer`
+
+    :var executor: the command executor being traced.
+    :var tracer: the :class:`Tracer` the commands are added to.
+    """
+    def __init__(self, executor, tracer):
+        super(TracingConnection, self).__init__()
+        self.executor = executor
+        self.tracer = tracer
+
+    def execute(self, command, params):
+        outcome = OK
+        started = time()
+
+        try:
+            return self.executor.execute(command, params)
+        except Exception as e:
+            outcome = e.__class__.__name__
+            raise
+        finally:
+            self.tracer.add(command, COMMAND, started, time() - started, {"outcome": outcome})
+
+
+def traced(category=CONTAINER):
+    """Decorate a Container (or WebApp) method so it is traced as a span, when the WebApp has a Tracer.
+
+    >>> class LoginContainer(Container):
+    >>>     @traced()
+    >>>     def log_in(self, username, password):
+    >>>         ...
+
+    :param category: the category of the span.
+    :type category: str
+    :returns: the decorator.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            web_app = getattr(self, "web_app", self)
+
+            if web_app.tracer is None:
+                return method(self, *args, **kwargs)
+
+            with web_app.tracer.span("%s.%s" % (self.__class__.__name__, method.__name__), category):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,263 @@
+import base64
+import httplib
+import socket
+import string
+from Queue import LifoQueue, Empty, Full
+from threading import Lock
+from time import time
+from urlparse import urlparse
+
+from selenium.webdriver.remote import utils
+from selenium.webdriver.remote.errorhandler import ErrorCode
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+
+DEFAULT_POOL_SIZE = 4
+"""The default number of idle keep-alive connections held by a PooledConnection.
+"""
+BODY_CACHE_SIZE = 256
+"""The number of serialized command bodies a PooledConnection remembers before starting over.
+"""
+
+
+class CommandTiming(object):
+    """CommandTiming accumulates the round trip durations of a single WebDriver command.
+
+    :param command: the name of the WebDriver command being timed.
+    :type command: str
+
+    :var command: the name of the WebDriver command.
+    :var count: the number of times the command was executed.
+    :var total: the total number of seconds spent executing the command.
+    :var maximum: the longest single execution of the command, in seconds.
+    """
+    def __init__(self, command):
+        super(CommandTiming, self).__init__()
+        self.command = command
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds):
+        """Add a single execution to this CommandTiming.
+
+        :param seconds: the duration of the execution.
+        :type seconds: float
+        :returns: this CommandTiming.
+        """
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+        return self
+
+    def mean(self):
+        """Get the average duration of this command.
+
+        :returns: the mean duration in seconds, or 0.0 if the command was never executed.
+        """
+        return self.total / self.count if self.count > 0 else 0.0
+
+    def __str__(self):
+        return "%s: %d x %.1fms (max %.1fms)" % (self.command, self.count, self.mean() * 1000, self.maximum * 1000)
+
+
+class PooledConnection(RemoteConnection):
+    """PooledConnection is a WebDriver command executor which keeps its HTTP connections alive.
+
+    Every korlat operation is (at least) one HTTP command to the driver.  The stock executor
+    opens and tears down a connection per command; this one hands out persistent connections
+    from a pool, pre-compiles the command url templates, re-uses serialized bodies for repeated
+    commands (think polling waits), and times each command.
+
+    >>> transport = PooledConnection.for_driver(web_app.driver)
+    >>> web_app.set_transport(transport)
+    >>> print transport.get_timings()["isElementDisplayed"]
+    isElementDisplayed: 40 x 3.2ms (max 9.8ms)
+
+    :param remote_server_addr: the url of the driver server (ie: http://127.0.0.1:4444/wd/hub).
+    :type remote_server_addr: str
+    :param pool_size: the maximum number of idle connections to hold on to.
+    :type pool_size: int
+    :param resolve_ip: whether to resolve the host of remote_server_addr to an ip up front.
+    :type resolve_ip: bool
+
+    :var pool_size: the maximum number of idle connections held.
+    :var connections_opened: the number of connections opened over the life of this PooledConnection.
+    """
+    def __init__(self, remote_server_addr, pool_size=DEFAULT_POOL_SIZE, resolve_ip=True):
+        super(PooledConnection, self).__init__(remote_server_addr, keep_alive=False, resolve_ip=resolve_ip)
+        assert pool_size > 0
+        self.pool_size = pool_size
+        self.connections_opened = 0
+
+        parsed = urlparse(self._url)
+        self._host = parsed.hostname
+        self._port = parsed.port
+        self._prefix = parsed.path.rstrip("/")
+        self._headers = {
+            "Connection": "keep-alive",
+            "Content-Type": "application/json;charset=UTF-8",
+            "Accept": "application/json",
+        }
+
+        if parsed.username:
+            auth = "%s:%s" % (parsed.username, parsed.password or "")
+            self._headers["Authorization"] = "Basic %s" % base64.b64encode(auth)
+
+        self._pool = LifoQueue(pool_size)
+        self._templates = {}
+        self._bodies = {}
+        self._timings = {}
+        self._timings_lock = Lock()
+
+    @classmethod
+    def for_driver(cls, driver, pool_size=DEFAULT_POOL_SIZE):
+        """Build a PooledConnection talking to the same server as driver's current executor.
+
+        :param driver: the selenium.WebDriver instance.
+        :type driver: :class:`WebDriver`
+        :param pool_size: the maximum number of idle connections to hold on to.
+        :type pool_size: int
+        :returns: a new PooledConnection.
+        """
+        return cls(driver.command_executor._url, pool_size, resolve_ip=False)
+
+    def execute(self, command, params):
+        """Send a command to the driver server over a pooled connection.
+
+        :param command: the name of the WebDriver command.
+        :type command: str
+        :param params: the parameters of the command (also used to fill in the url.)
+        :type params: dict
+        :returns: the driver's response as a dict.
+        """
+        method, path = self._commands[command]
+        template = self._templates.get(command)
+
+        if template is None:
+            template = self._templates[command] = string.Template(path)
+
+        body = self._serialize(command, params) if method in ("POST", "PUT") else None
+        started = time()
+
+        try:
+            return self._request_pooled(method, self._prefix + template.substitute(params), body)
+        finally:
+            self._record(command, time() - started)
+
+    def get_timings(self):
+        """Get the timings of every command executed through this PooledConnection.
+
+        :returns: a dict of {str: :class:`CommandTiming`} keyed by command name.
+        """
+        with self._timings_lock:
+            return dict(self._timings)
+
+    def reset_timings(self):
+        """Forget the timings collected so far.
+
+        :returns: this PooledConnection.
+        """
+        with self._timings_lock:
+            self._timings = {}
+
+        return self
+
+    def close(self):
+        """Close every idle connection in the pool.
+
+        :returns: this PooledConnection.
+        """
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except Empty:
+                return self
+
+    def _serialize(self, command, params):
+        try:
+            key = (command, tuple(sorted(params.items())))
+            body = self._bodies.get(key)
+        except TypeError:
+            # un-hashable parameters (ie: script arguments) are never cached
+            return utils.dump_json(params)
+
+        if body is None:
+            if len(self._bodies) >= BODY_CACHE_SIZE:
+                self._bodies = {}
+
+            body = self._bodies[key] = utils.dump_json(params)
+
+        return body
+
+    def _record(self, command, seconds):
+        with self._timings_lock:
+            timing = self._timings.get(command)
+
+            if timing is None:
+                timing = self._timings[command] = CommandTiming(command)
+
+            timing.add(seconds)
+
+    def _connect(self):
+        self.connections_opened += 1
+        return httplib.HTTPConnection(self._host, self._port, timeout=self._timeout)
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except Empty:
+            return self._connect()
+
+    def _release(self, connection):
+        try:
+            self._pool.put_nowait(connection)
+        except Full:
+            connection.close()
+
+    def _request_pooled(self, method, path, body):
+        for attempt in (1, 2):
+            connection = self._acquire() if attempt == 1 else self._connect()
+            # a connection with a socket has been used before, and the server may have
+            # dropped it while it sat idle in the pool
+            reused = connection.sock is not None
+
+            try:
+                connection.request(method, path, body, self._headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (httplib.HTTPException, socket.error):
+                connection.close()
+
+                if not reused or attempt == 2:
+                    raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(connection)
+
+        if 300 <= response.status < 304:
+            return self._request_pooled("GET", urlparse(response.getheader("location")).path, None)
+
+        text = data.decode("utf-8").replace("\x00", "").strip()
+
+        if 399 < response.status <= 500:
+            return {"status": response.status, "value": text}
+
+        if (response.getheader("Content-Type") or "").startswith("image/png"):
+            return {"status": ErrorCode.SUCCESS, "value": text}
+
+        try:
+            value = utils.load_json(text)
+        except ValueError:
+            status = ErrorCode.SUCCESS if 199 < response.status < 300 else ErrorCode.UNKNOWN_ERROR
+            return {"status": status, "value": text}
+
+        assert isinstance(value, dict)
+
+        if "value" not in value:
+            value["value"] = None
+
+        return value
@@ -1,6 +1,18 @@
-from time import sleep
+from contextlib import contextmanager
+from time import sleep, time
 from urlparse import urlparse
+from uuid import uuid4
 
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.wait import WebDriverWait
+
+from capture import Failure
+from deadline import Deadline
+from korlat.exception import CheckError
+from locatormemory import LocatorMemory
+from replay import polling
+from script import GENERATION_SCRIPT
+from trace import traced, DELEGATE, TEST, TracingConnection
 from waitdelegate import WaitDelegate
 
 
@@ -10,6 +22,33 @@ DEFAULT_WAIT_IN_SECONDS = 10
 MAIN_WINDOW = "main_window"
 """The key locating the primary window.
 """
+SOFT_RESET_WAIT_IN_SECONDS = 1
+"""The time a soft reset go_to() gives its **ready** Container before falling back to a full navigation.  1 second.
+"""
+INTERACTIVE = "interactive"
+"""The go_to() readiness which is met as soon as the DOM is parsed (DOMContentLoaded), ignoring sub-resources.
+"""
+
+_NAVIGATE_SCRIPT = """
+var url = new URL(arguments[0], window.location.href);
+// a change of the fragment alone stays in this document, so it isn't tagged as the outgoing one
+if (url.hash === '' || url.href.split('#')[0] !== window.location.href.split('#')[0]) {
+    window.__korlat_navigation = arguments[1];
+}
+window.location.href = arguments[0];
+"""
+_NAVIGATED_SCRIPT = "return window.__korlat_navigation !== arguments[0] && (!arguments[1] || document.readyState !== 'loading');"
+_SOFT_RESET_SCRIPT = """
+// compared as the browser normalises it (ie: http://coolsite.com is http://coolsite.com/)
+var url = new URL(arguments[0], window.location.href).href;
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+if (window.location.href !== url) {
+    window.history.replaceState(null, '', url);
+    window.dispatchEvent(new PopStateEvent('popstate', {state: null}));
+}
+return window.location.href === url && document.readyState === 'complete';
+"""
 
 
 class WebApp(object):
@@ -31,6 +70,14 @@ class WebApp(object):
     :var url: the URL of the web application.
     :var wait_delegate: the :class:`WaitDelegate` for this WebApp.
     :var default_wait: the default time to wait, in seconds.
+    :var transport: the command executor set through set_transport().  can be None.
+    :var failure_capture: the :class:`FailureCapture` failures are handed to.  can be None.
+    :var locator_memory: the :class:`LocatorMemory` which remembers the winning locator of each :class:`FallbackElement`.
+    :var fingerprinting: whether results are cached by page generation (see cached_until_changed().)
+    :var monitors: the :class:`Monitor` s notified of every lookup, wait and action.
+    :var tracer: the :class:`Tracer` spans are traced to.  can be None.
+    :var adaptive_timeouts: the :class:`AdaptiveTimeouts` Element waits are shortened by.  can be None.
+    :var resource_proxy: the :class:`ResourceProxy` the browser loads pages through.  can be None.
     """
     def __init__(self, driver, url):
         super(WebApp, self).__init__()
@@ -43,6 +90,17 @@ class WebApp(object):
         self.url = url
         self.wait_delegate = None
         self.default_wait = DEFAULT_WAIT_IN_SECONDS
+        self.transport = None
+        self.failure_capture = None
+        self.locator_memory = LocatorMemory()
+        self.fingerprinting = False
+        self.monitors = []
+        self.tracer = None
+        self.adaptive_timeouts = None
+        self.resource_proxy = None
+        self._test = None
+        self._generations = {}
+        self._deadlines = []
 
         # No implicit wait as waiting is controlled at the element
         # level via "wait_until_*"
@@ -50,6 +108,7 @@ class WebApp(object):
         assert len(self.driver.window_handles) == 1
         self._windows = {MAIN_WINDOW: self.driver.window_handles[0]}
         self._current_window = None
+        self._frame = ()
 
     def _destroy_windows(self):
         while len(self.driver.window_handles) > 1:
@@ -59,21 +118,374 @@ class WebApp(object):
         self._windows = {}
         self.put_window(MAIN_WINDOW, self.driver.window_handles[0])
 
-    def go_to(self):
+    @traced()
+    def go_to(self, ready=None, wait_in_seconds=None, soft=False):
         """Go to this WebApp.
 
+        By default this blocks until the whole page has loaded (third party assets included.)  Specifying **ready**
+        instead navigates without waiting on the page load, and returns as soon as the ready condition is met.
+
+        A **soft** go_to skips the navigation altogether when the browser is already on this WebApp's origin.  Instead,
+        the cookies and local/session storage are cleared and the url is restored through the history api (so client
+        side routing follows.)  A full navigation still happens if the origin differs, the url can't be restored,
+        or **ready** isn't visible afterwards.
+
+        >>> # return once the login form is usable, even though the page is still pulling in images and ads
+        >>> web_app.go_to(ready=LoginContainer(web_app))
+        >>> # return once the DOM is parsed
+        >>> web_app.go_to(ready=INTERACTIVE)
+
+        :param ready: either a :class:`Container` whose required Elements must be visible, or :py:const:`INTERACTIVE`.
+        :type ready: :class:`Container` or str
+        :param wait_in_seconds: the number of seconds to wait for **ready**.  if unspecified, then the default is used.
+        :type wait_in_seconds: int
+        :param soft: whether to reset the application state in place rather than navigating, when possible.
+        :type soft: bool
         :result: the WebDriver navigates to the defined WebApp.url, and any existing windows attached to this WebDriver are closed.
         :returns: this WebApp.
+        :raises: :class:`selenium.common.exceptions.TimeoutException` (if **ready** is not met in time)
         """
+        wait_in_seconds = self.effective_wait(wait_in_seconds)
         self._destroy_windows()
         self.use_window(MAIN_WINDOW)
+        self._generations = {}
+
+        if soft and self._soft_reset(ready, wait_in_seconds):
+            return self
 
         pre_handles = set(self.driver.window_handles)
-        self.driver.get(str(self.url))
+
+        if ready is None:
+            self.driver.get(str(self.url))
+        else:
+            self._navigate_until(ready, wait_in_seconds)
+
         post_handles = set(self.driver.window_handles)
         assert len(pre_handles) == len(post_handles)
         return self
 
+    def _soft_reset(self, ready, wait_in_seconds):
+        """Reset the application state without navigating.
+
+        :returns: True if the reset took, False if a full navigation is needed.
+        """
+        if not _same_origin(self.driver.current_url, str(self.url)):
+            return False
+
+        self.driver.delete_all_cookies()
+
+        if not self.driver.execute_script(_SOFT_RESET_SCRIPT, str(self.url)):
+            return False
+
+        if ready is None or ready == INTERACTIVE:
+            return True
+
+        return self._wait_ready(ready, min(wait_in_seconds, SOFT_RESET_WAIT_IN_SECONDS))
+
+    def _navigate_until(self, ready, wait_in_seconds):
+        """Navigate to WebApp.url via script, which (unlike driver.get()) doesn't block on the page load.
+
+        The outgoing document is tagged so the incoming one can be told apart from it, making the
+        readiness check deterministic.  A same document navigation (to another fragment) is ready at once.
+        """
+        wait_in_seconds = max(wait_in_seconds, 0)
+        interactive = ready == INTERACTIVE
+        token = uuid4().hex
+        started = time()
+        self.driver.execute_script(_NAVIGATE_SCRIPT, str(self.url), token)
+        # the outgoing document may fail the script while it unloads
+        self.wait_until(lambda driver: driver.execute_script(_NAVIGATED_SCRIPT, token, interactive), True,
+                        wait_in_seconds, [WebDriverException], "go_to")
+
+        if not interactive and not self._wait_ready(ready, wait_in_seconds - (time() - started)):
+            raise TimeoutException("%s not visible after navigating to %s" % (ready.__class__.__name__, self.url))
+
+    def _wait_ready(self, ready, wait_in_seconds):
+        """Wait until every required Element of the ready Container is visible, within wait_in_seconds overall.
+
+        :returns: True if they all are, False otherwise.
+        """
+        required_elements = ready.get_elements(required=True)
+        assert len(required_elements) > 0
+        started = time()
+
+        for element in required_elements:
+            if not element.wait_until_displayed(max(wait_in_seconds - (time() - started), 0), ignore=True):
+                return False
+
+        return True
+
+    @contextmanager
+    def deadline(self, seconds):
+        """Share a time budget between every wait made within the context.
+
+        Each korlat wait inside waits at most for the time remaining, instead of its own timeout (or the default.)
+        A nested deadline can't outlast the one it is in.  Once the budget is spent, waits evaluate their condition
+        once rather than waiting.  The :class:`Deadline` reports where the time went.
+
+        >>> with web_app.deadline(5) as deadline:
+        >>>     login.wait_until_visible()
+        >>>     login.get("submit").click()
+        >>>     home.wait_until_visible()
+        >>> print deadline.report()
+           1.204s  username wait_until_displayed
+           3.796s  welcome wait_until_displayed
+           5.010s  elapsed of 5.000s (5.000s waiting), 0.010s over
+
+        :param seconds: the budget, in seconds.
+        :type seconds: int or float
+        :returns: the :class:`Deadline`, to use as a context manager.
+        """
+        deadline = Deadline(seconds, self._deadlines[-1] if len(self._deadlines) > 0 else None)
+        self._deadlines.append(deadline)
+
+        try:
+            yield deadline
+        finally:
+            self._deadlines.pop()
+
+    def effective_wait(self, wait_in_seconds=None):
+        """Get the time a wait may actually take, given the active deadline.
+
+        :param wait_in_seconds: the number of seconds the wait asks for.  if unspecified, then the default is used.
+        :type wait_in_seconds: int
+        :returns: the seconds to wait.  zero or less if the deadline is spent.
+        """
+        if wait_in_seconds is None:
+            wait_in_seconds = self.default_wait
+
+        if len(self._deadlines) > 0:
+            wait_in_seconds = min(wait_in_seconds, self._deadlines[-1].remaining())
+
+        return wait_in_seconds
+
+    def element_wait(self, element, wait, wait_in_seconds=None):
+        """Get the time an Element's wait should take.
+
+        :param element: the Element (or ElementList) waited on.
+        :type element: :class:`Element`
+        :param wait: the wait (ie: wait_until_displayed.)
+        :type wait: str
+        :param wait_in_seconds: the number of seconds the caller asked for.  can be None.
+        :type wait_in_seconds: int
+        :returns: wait_in_seconds if specified, otherwise the adaptive timeout if this WebApp has AdaptiveTimeouts, otherwise None (the default.)
+        """
+        if wait_in_seconds is not None or self.adaptive_timeouts is None:
+            return wait_in_seconds
+
+        return self.adaptive_timeouts.timeout(element, wait, self.default_wait)
+
+    def wait_until(self, condition, until=True, wait_in_seconds=None, ignoring=None, operation=None):
+        """Wait until the condition is met (or not), within the active deadline.
+
+        With no time left, the condition is evaluated exactly once.
+
+        :param condition: the condition, which is passed the driver.
+        :type condition: function
+        :param until: whether to wait for the condition to be met (True) or to not be met (False.)
+        :type until: bool
+        :param wait_in_seconds: the number of seconds to wait.  if unspecified, then the default is used.
+        :type wait_in_seconds: int
+        :param ignoring: the exceptions which count as the condition not being met.
+        :type ignoring: list
+        :param operation: the description the time taken is recorded under, in the active deadlines.
+        :type operation: str
+        :returns: this WebApp.
+        :raises: :class:`selenium.common.exceptions.TimeoutException`
+        """
+        wait_in_seconds = self.effective_wait(wait_in_seconds)
+        ignoring = tuple(ignoring or [])
+        started = time()
+        condition = _polled(condition)
+
+        try:
+            if wait_in_seconds > 0:
+                wait = WebDriverWait(self.driver, wait_in_seconds, .25, ignoring)
+
+                if until:
+                    wait.until(condition)
+                else:
+                    wait.until_not(condition)
+            else:
+                try:
+                    met = bool(condition(self.driver)) == until
+                except ignoring:
+                    # as WebDriverWait: an ignored exception means the condition is not met
+                    met = not until
+
+                if not met:
+                    raise TimeoutException("no time left to wait for %s" % (operation or "the condition"))
+        finally:
+            for deadline in self._deadlines:
+                deadline.record(operation or "wait", time() - started)
+
+        return self
+
+    def add_monitor(self, monitor):
+        """Add a monitor, to be notified of every Element lookup, wait and action.
+
+        :param monitor: the monitor (ie: a :class:`TimingStore`.)
+        :type monitor: :class:`Monitor`
+        :returns: this WebApp.
+        """
+        self.monitors = self.monitors + [monitor]
+        return self
+
+    def remove_monitor(self, monitor):
+        """Remove a monitor.
+
+        :param monitor: the monitor to remove.
+        :type monitor: :class:`Monitor`
+        :returns: this WebApp.
+        """
+        self.monitors = [m for m in self.monitors if m is not monitor]
+        return self
+
+    def set_adaptive_timeouts(self, adaptive):
+        """Set the AdaptiveTimeouts for this WebApp.
+
+        The adaptive timeouts are added as a monitor, so they keep learning from this WebApp's waits.
+
+        :param adaptive: the adaptive timeouts to shorten Element waits by, or None to always wait the default.
+        :type adaptive: :class:`AdaptiveTimeouts`
+        :returns: this WebApp.
+        """
+        if self.adaptive_timeouts is not None:
+            self.remove_monitor(self.adaptive_timeouts)
+
+        self.adaptive_timeouts = adaptive
+
+        if adaptive is not None:
+            self.add_monitor(adaptive)
+
+        return self
+
+    def set_resource_proxy(self, proxy):
+        """Set the ResourceProxy the browser loads pages through.
+
+        The browser must already be pointed at the proxy (see configure() from :class:`ResourceProxy`), as a proxy can't
+        be changed once the browser is launched.  So the proxy must already be started.
+
+        >>> proxy = ResourceProxy().block("*google-analytics.com/*").start()
+        >>> web_app = WebApp(webdriver.Firefox(firefox_profile=proxy.configure(FirefoxProfile())), url)
+        >>> web_app.set_resource_proxy(proxy).go_to()
+        >>> print web_app.resource_proxy.report()
+
+        :param proxy: the proxy blocking and stubbing resources, or None.
+        :type proxy: :class:`ResourceProxy`
+        :returns: this WebApp.
+        """
+        assert proxy is None or proxy.port is not None
+        self.resource_proxy = proxy
+        return self
+
+    def set_tracer(self, tracer):
+        """Set the Tracer for this WebApp.
+
+        The tracer is added as a monitor, and the driver's command executor is wrapped so every command is traced.
+        Set the tracer after set_transport(), which replaces the command executor.
+
+        :param tracer: the tracer to trace spans to, or None to stop tracing.
+        :type tracer: :class:`Tracer`
+        :returns: this WebApp.
+        """
+        if self.tracer is not None:
+            self.remove_monitor(self.tracer)
+
+            if isinstance(self.driver.command_executor, TracingConnection):
+                self.driver.command_executor = self.driver.command_executor.executor
+
+        self.tracer = tracer
+
+        if tracer is not None:
+            self.add_monitor(tracer)
+            self.driver.command_executor = TracingConnection(self.driver.command_executor, tracer)
+
+        return self
+
+    def delegate_wait(self):
+        """Wait on the WaitDelegate, if this WebApp has one.
+
+        :returns: this WebApp.
+        """
+        if self.wait_delegate is None:
+            return self
+
+        if self.tracer is None:
+            self.wait_delegate.wait()
+        else:
+            with self.tracer.span(self.wait_delegate.__class__.__name__, DELEGATE):
+                self.wait_delegate.wait()
+
+        return self
+
+    def set_fingerprinting(self, enabled):
+        """Set whether results are cached by page generation
+
+        When enabled, Container waits and checks which already succeeded are skipped as long as the page hasn't
+        changed since.  See cached_until_changed().
+
+        :param enabled: whether to cache.
+        :type enabled: bool
+        :returns: this WebApp.
+        """
+        self.fingerprinting = enabled
+        self._generations = {}
+        return self
+
+    def page_generation(self, frames=()):
+        """Get the generation of the page: a token which changes on every DOM mutation and on navigation.
+
+        The first call on a document installs a MutationObserver which counts its mutations.  Changes which don't
+        touch the DOM (ie: css :hover, media queries, animations) don't move the generation.
+
+        >>> web_app.page_generation()
+        u'k3j9x0q2:0'
+        >>> web_app.driver.execute_script("document.body.appendChild(document.createElement('div'))")
+        >>> web_app.page_generation()
+        u'k3j9x0q2:1'
+
+        :param frames: the frame Elements whose document to fingerprint, outermost first.  empty for the top level document.
+        :type frames: list of :class:`Element`
+        :returns: the generation token, or None if the page can't be fingerprinted.
+        """
+        try:
+            self.use_frame(frames)
+            return self.driver.execute_script(GENERATION_SCRIPT)
+        except WebDriverException:
+            return None
+
+    def cached_until_changed(self, key, evaluate, frames=()):
+        """Get the result of evaluate(), reusing the last result for key while the page generation hasn't moved.
+
+        Only successful (truthy, non-raising) results are cached, and only when fingerprinting is enabled.
+        The generation is read before evaluating, so a mutation during the evaluation discards the result.
+        The cache is also dropped by go_to().
+
+        :param key: the key the result is cached under.
+        :type key: hashable
+        :param evaluate: the function to evaluate.
+        :type evaluate: function
+        :param frames: the frame Elements whose document the evaluation depends on, outermost first.
+        :type frames: list of :class:`Element`
+        :returns: the result of evaluate(), or the cached result.
+        """
+        if not self.fingerprinting:
+            return evaluate()
+
+        generation = self.page_generation(frames)
+
+        if generation is not None and key in self._generations and self._generations[key][0] == generation:
+            return self._generations[key][1]
+
+        self._generations.pop(key, None)
+        result = evaluate()
+
+        if generation is not None and result:
+            self._generations[key] = (generation, result)
+
+        return result
+
     def put_window(self, key, handle):
         """Add the window by reference key.
 
@@ -96,6 +508,51 @@ class WebApp(object):
         """
         self.driver.switch_to_window(self._windows[key])
         self._current_window = key
+        # switching windows always lands at the top level document
+        self._frame = ()
+        return self
+
+    def use_frame(self, frames):
+        """Switch into the frame path, issuing only the switches the driver actually needs.
+
+        The current frame is tracked, so consecutive operations in the same frame don't switch at all, going deeper
+        only switches into the frames below the current one, and the driver only returns to the default content when
+        leaving the current frame path.
+
+        >>> web_app.use_frame([outer_frame_element, inner_frame_element])
+
+        :param frames: the frame Elements (iframe, frame) to switch into, outermost first.  an empty path is the top level document.
+        :type frames: list of :class:`Element`
+        :result: the WebDriver operates within the innermost frame.
+        :returns: this WebApp.
+        :raises: :class:`selenium.common.exceptions.NoSuchElementException` (if a frame can't be found)
+        """
+        frames = tuple(frames)
+
+        if frames == self._frame:
+            return self
+
+        if self._frame != frames[:len(self._frame)]:
+            self.driver.switch_to_default_content()
+            self._frame = ()
+
+        for i in range(len(self._frame), len(frames)):
+            # each frame Element lives in the frames before it, which is exactly where we are
+            self.driver.switch_to_frame(frames[i].get_web_element())
+            self._frame = frames[:i + 1]
+
+        return self
+
+    def reset_frame(self):
+        """Forget the current frame.
+
+        Use this after switching frames behind korlat's back (ie: through the driver directly.)
+
+        :result: the next use_frame() starts by returning to the default content.
+        :returns: this WebApp.
+        """
+        self.driver.switch_to_default_content()
+        self._frame = ()
         return self
 
     def get_windows(self):
@@ -146,3 +603,121 @@ class WebApp(object):
         assert wait_in_seconds >= 0
         self.default_wait = wait_in_seconds
 
+    def set_transport(self, transport):
+        """Set the transport (command executor) the driver sends its commands over.
+
+        >>> web_app.set_transport(PooledConnection.for_driver(web_app.driver))
+
+        :param transport: the command executor to use, ie: a :class:`PooledConnection`.
+        :type transport: :class:`RemoteConnection`
+        :result: every following command issued through this WebApp's driver is sent over transport.
+        :returns: this WebApp.
+        """
+        assert transport is not None
+        self.driver.command_executor = transport
+        self.transport = transport
+        return self
+
+    def set_locator_memory(self, memory):
+        """Set the LocatorMemory for this WebApp.
+
+        :param memory: the memory to learn the winning locator of each :class:`FallbackElement` in.
+        :type memory: :class:`LocatorMemory`
+        :returns: this WebApp.
+        """
+        assert isinstance(memory, LocatorMemory)
+        self.locator_memory = memory
+        return self
+
+    def set_failure_capture(self, capture):
+        """Set the FailureCapture for this WebApp.
+
+        :param capture: the capture to hand failure artifacts to, or None to stop capturing.
+        :type capture: :class:`FailureCapture`
+        :returns: this WebApp.
+        """
+        self.failure_capture = capture
+        return self
+
+    def capture_failure(self, reason, element=None, timeout=False):
+        """Grab the screenshot, page source and browser logs, and hand them to the FailureCapture.
+
+        Only the raw data is fetched here; everything else happens in the background.  Whatever the browser fails to
+        give is left out.
+
+        :param reason: a description of what failed.
+        :type reason: str
+        :param element: the Element which failed.  can be None.
+        :type element: :class:`Element`
+        :param timeout: whether the failure is a wait timing out (which is only captured if the FailureCapture captures timeouts.)
+        :type timeout: bool
+        :result: if this WebApp has a FailureCapture, the failure is queued to be written.
+        :returns: this WebApp.
+        """
+        if self.failure_capture is None or (timeout and not self.failure_capture.capture_timeouts):
+            return self
+
+        label = None
+
+        if element is not None:
+            label = element.label if element.label is not None else element.get_identifier()
+
+        # a dead (or hung) browser mustn't replace the failure being reported
+        screenshot = _or_none(self.driver.get_screenshot_as_base64)
+        source = _or_none(lambda: self.driver.page_source)
+        logs = _or_none(self.driver.get_log, "browser")
+        self.failure_capture.submit(Failure(reason, self._test, label, screenshot, source, logs))
+        return self
+
+    @contextmanager
+    def capturing_failures(self, test):
+        """Capture the failure if a check or wait fails within this context.
+
+        >>> with web_app.capturing_failures(self.id()):
+        >>>     my_container.get("username").check_appearance()
+
+        :param test: the label of the test (recorded with every failure captured within the context.)
+        :type test: str
+        :result: a :class:`CheckError` or :class:`TimeoutException` escaping the context is captured, then re-raised.  with a :class:`Tracer`, the context is traced as the test's span.
+        """
+        previous = self._test
+        self._test = test
+
+        try:
+            if self.tracer is None:
+                yield self
+            else:
+                with self.tracer.span(test, TEST):
+                    yield self
+        except (CheckError, TimeoutException) as e:
+            self.capture_failure("%s: %s" % (e.__class__.__name__, e))
+            raise
+        finally:
+            self._test = previous
+
+
+def _or_none(fetch, *args):
+    try:
+        return fetch(*args)
+    except WebDriverException:
+        return None
+
+
+def _polled(condition):
+    # marked, so a replay knows the commands a wait polls with may repeat
+    def polled(driver):
+        with polling():
+            return condition(driver)
+
+    return polled
+
+
+def _same_origin(url_a, url_b):
+    a = urlparse(url_a)
+    b = urlparse(url_b)
+
+    if a.scheme != b.scheme or a.netloc != b.netloc:
+        return False
+
+    # every file is its own origin
+    return a.scheme != "file" or a.path == b.path
@@ -7,6 +7,17 @@ class UnknownStrategy(AutomationException):
     pass
 
 
+class ReplayDivergence(AutomationException):
+    def __init__(self, position, expected, actual):
+        super(ReplayDivergence, self).__init__(position, expected, actual)
+        self.position = position
+        self.expected = expected
+        self.actual = actual
+
+    def __str__(self):
+        return "command %d: expected <%s> - got <%s>" % (self.position, str(self.expected), str(self.actual))
+
+
 class CheckError(AssertionError):
     pass
 
@@ -49,3 +60,6 @@ class CheckAtMostError(CheckError):
     def __str__(self):
         return "%sexpected at most <%s> - got <%s>" % (self.extra, str(self.maximum), str(self.actual))
 
+
+class BudgetExceeded(CheckError):
+    pass
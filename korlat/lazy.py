@@ -0,0 +1,48 @@
+from importlib import import_module
+import sys
+from types import ModuleType
+
+
+class LazyPackage(ModuleType):
+    """LazyPackage is a package whose submodules are imported the first time they are accessed.
+
+    It stands in for the package module (see :func:`install`), so that importing a package (or a single module of it)
+    doesn't import every sibling module, and their dependencies (ie: selenium.)
+
+    >>> import korlat
+    >>> korlat.common.unique.identifier()  # imports korlat.common.unique now
+
+    :var submodules: the names of the submodules which are imported on access.
+    """
+    def __init__(self, name, submodules):
+        super(LazyPackage, self).__init__(name)
+        self.submodules = frozenset(submodules)
+
+    def __getattr__(self, name):
+        # only called when the attribute isn't there (yet)
+        if name in self.submodules:
+            return import_module("%s.%s" % (self.__name__, name))
+
+        raise AttributeError("'module' object has no attribute '%s'" % name)
+
+    def __dir__(self):
+        return sorted(set(self.__dict__.keys()) | self.submodules)
+
+
+def install(name, submodules):
+    """Make the package lazy.  Called from the package's __init__, in place of importing its submodules.
+
+    >>> from korlat.lazy import install
+    >>> install(__name__, ["container", "element"])
+
+    :param name: the name of the package (ie: __name__.)
+    :type name: str
+    :param submodules: the names of the submodules to import on access.
+    :type submodules: list
+    :returns: the :class:`LazyPackage`, which replaces the package in sys.modules.
+    """
+    package = sys.modules[name]
+    lazy = LazyPackage(name, submodules)
+    lazy.__dict__.update(package.__dict__)
+    sys.modules[name] = lazy
+    return lazy
@@ -5,7 +5,10 @@ GUINEA_PIG = "file:///home/dionyses/projects/korlat/korlat/tests/guineapig.html"
 from korlat.tests import unit
 from unit import strategy, element, container, \
     windowlinks, containervisibility, elementlist, \
-    unique, util
+    unique, util, transport, webapp, capture, replay, \
+    locatorcost, fallback, frame, table, widget, \
+    deadline, timing, trace, budget, adaptive, \
+    shard, browser, imports, manifest, proxy
 
 
 def all_unit():
@@ -18,6 +21,25 @@ def all_unit():
         containervisibility.suite(),
         unique.suite(),
         util.suite(),
+        transport.suite(),
+        webapp.suite(),
+        capture.suite(),
+        replay.suite(),
+        locatorcost.suite(),
+        fallback.suite(),
+        frame.suite(),
+        table.suite(),
+        widget.suite(),
+        deadline.suite(),
+        timing.suite(),
+        trace.suite(),
+        budget.suite(),
+        adaptive.suite(),
+        shard.suite(),
+        browser.suite(),
+        imports.suite(),
+        manifest.suite(),
+        proxy.suite(),
     ]
 
     return unittest.TestSuite(suites)
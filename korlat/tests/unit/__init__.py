@@ -1,9 +1,28 @@
+import adaptive
+import browser
+import budget
+import capture
 import commonelements
 import container
+import deadline
 import containervisibility
 import element
 import elementlist
+import fallback
+import frame
+import imports
+import locatorcost
+import manifest
+import proxy
+import replay
+import shard
 import strategy
+import table
+import timing
+import trace
+import transport
 import windowlinks
 import unique
 import util
+import webapp
+import widget
@@ -0,0 +1,94 @@
+from mock import Mock
+import os
+import shutil
+import tempfile
+import unittest
+
+import selenium
+
+from korlat.abstraction.container import Container
+from korlat.abstraction.element import Element
+from korlat.core.adaptive import AdaptiveTimeouts
+from korlat.core.strategy import ID
+from korlat.core.timing import TimingStore
+from korlat.core.webapp import WebApp
+
+
+class LoginContainer(Container):
+    def _build_elements(self):
+        self.put(Element(self, ID, "username", "username"), True)
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.mock_driver = Mock()
+        self.mock_driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+        self.mock_driver.window_handles = ["a"]
+        self.mock_driver.find_elements_by_id.return_value = [Mock()]
+        self.web_app = WebApp(self.mock_driver, "http://coolsite.com")
+        self.adaptive = AdaptiveTimeouts(multiple=3, percentile=95, minimum_samples=3, minimum_wait=1)
+        self.username = LoginContainer(self.web_app).get("username")
+        self.container = "object.Container.LoginContainer"
+
+    def test_timeout(self):
+        self.assertEquals(10, self.adaptive.timeout(self.username, "wait_until_displayed", 10))
+
+        for seconds in [.2, .5, 2]:
+            self.adaptive.learn(self.container, "username", "wait_until_displayed", seconds)
+
+        self.assertEquals(6, self.adaptive.timeout(self.username, "wait_until_displayed", 10))
+        # the default is the ceiling
+        self.assertEquals(5, self.adaptive.timeout(self.username, "wait_until_displayed", 5))
+        # each wait is learned on its own
+        self.assertEquals(10, self.adaptive.timeout(self.username, "wait_until_not_displayed", 10))
+        # unlabelled elements never adapt
+        self.assertEquals(10, self.adaptive.timeout(Element(self.web_app, ID, "username"), "wait_until_displayed", 10))
+
+        for seconds in [.1, .1, .1]:
+            self.adaptive.learn(None, "other", "wait_until_exists", seconds)
+
+        self.assertEquals(1, self.adaptive.timeout(Element(self.web_app, ID, "x", "other"), "wait_until_exists", 10))
+
+    def test_element_wait(self):
+        self.assertEquals(None, self.web_app.element_wait(self.username, "wait_until_displayed"))
+        self.web_app.set_adaptive_timeouts(self.adaptive)
+        self.assertEquals([self.adaptive], self.web_app.monitors)
+
+        for i in range(3):
+            self.assertTrue(self.username.wait_until_displayed())
+
+        # learned from the waits so far, which were (near) instant
+        self.assertEquals(1, self.web_app.element_wait(self.username, "wait_until_displayed"))
+        self.assertEquals(4, self.web_app.element_wait(self.username, "wait_until_displayed", 4))
+
+        self.mock_driver.find_elements_by_id.return_value = []
+        self.assertFalse(self.username.wait_until_exists(0))
+        self.assertEquals(10, self.web_app.element_wait(self.username, "wait_until_exists"))
+
+        self.web_app.set_adaptive_timeouts(None)
+        self.assertEquals([], self.web_app.monitors)
+        self.assertEquals(None, self.web_app.element_wait(self.username, "wait_until_displayed"))
+
+    def test_learn_from(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            path = os.path.join(directory, "timings.jsonl")
+            store = TimingStore(path)
+
+            for seconds in [.5, 1, 1.5]:
+                store.record(self.username, "wait", "wait_until_displayed", 0, seconds, "ok")
+
+            store.record(self.username, "wait", "wait_until_displayed", 0, 10, "false")
+            store.record(self.username, "action", "click", 0, 1, "ok")
+            store.close()
+
+            self.adaptive.learn_from(path)
+            self.assertEquals(4.5, self.adaptive.timeout(self.username, "wait_until_displayed", 10))
+            self.assertEquals(10, self.adaptive.timeout(self.username, "click", 10))
+        finally:
+            shutil.rmtree(directory)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
@@ -0,0 +1,101 @@
+from mock import Mock
+import os
+import shutil
+import tempfile
+from threading import Event
+import unittest
+
+import selenium
+from selenium.common.exceptions import WebDriverException
+
+from korlat.core.browser import benchmark, DriverFactory, ProfileTemplate
+
+
+def mock_driver():
+    driver = Mock()
+    driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+    driver.window_handles = ["a"]
+    return driver
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.template = ProfileTemplate({"app.update.enabled": False}, self.directory)
+        self.launched = []
+
+    def tearDown(self):
+        self.template.remove()
+        shutil.rmtree(self.directory)
+
+    def launch(self, profile):
+        driver = mock_driver()
+        self.launched += [(profile, driver)]
+        return driver
+
+    def test_template(self):
+        self.assertEquals(None, self.template.path)
+        first = self.template.clone()
+        path = self.template.path
+        second = self.template.clone()
+
+        self.assertEquals(path, self.template.build().path)
+        self.assertNotEquals(first.path, second.path)
+        self.assertFalse(first.default_preferences["app.update.enabled"])
+
+        caches = [p.default_preferences["browser.cache.disk.parent_directory"] for p in [first, second]]
+        self.assertNotEquals(caches[0], caches[1])
+        self.assertTrue(all([c.startswith(self.directory) for c in caches]))
+
+        self.template.remove()
+        self.assertEquals(None, self.template.path)
+        self.assertFalse(os.path.exists(path))
+        self.assertEquals([], os.listdir(self.directory))
+
+    def test_cold(self):
+        factory = DriverFactory(self.template, self.launch, prewarm=False)
+        driver = factory.get()
+
+        self.assertEquals(1, len(self.launched))
+        self.assertEquals(driver, self.launched[0][1])
+        factory.close()
+        self.assertFalse(driver.quit.called)
+
+    def test_prewarm(self):
+        factory = DriverFactory(self.template, self.launch)
+        first = factory.get()
+        second = factory.get()
+
+        self.assertEquals([first, second], [d for p, d in self.launched[:2]])
+        factory.close()
+        self.assertEquals(3, len(self.launched))
+        self.launched[2][1].quit.assert_called_once_with()
+
+    def test_prewarm_failure(self):
+        released = Event()
+
+        def launch(profile):
+            released.wait()
+            raise WebDriverException("no browser")
+
+        factory = DriverFactory(self.template, launch)
+        released.set()
+
+        with self.assertRaises(WebDriverException):
+            factory.get()
+
+        with self.assertRaises(WebDriverException):
+            factory.get()
+
+        factory.close()
+
+    def test_benchmark(self):
+        drivers = [mock_driver(), mock_driver()]
+        latencies = benchmark(lambda: drivers.pop(0), "http://coolsite.com", 2)
+
+        self.assertEquals(2, len(latencies))
+        self.assertEquals([], drivers)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
@@ -0,0 +1,122 @@
+import unittest
+
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from korlat.abstraction.container import Container
+from korlat.abstraction.element import Element
+from korlat.abstraction.elementlist import ElementList
+from korlat.core.budget import korlat_budget, OUTSIDE
+from korlat.core.strategy import ID, XPATH
+from korlat.core.webapp import WebApp
+from korlat.exception import BudgetExceeded, CheckError
+
+
+class RowsBrowser(object):
+    """A command executor standing in for a browser showing a list of rows.
+    """
+    def __init__(self):
+        self.count = 0
+
+    def execute(self, command, params):
+        self.count += 1
+        value = None
+
+        if command == Command.NEW_SESSION:
+            return {"status": 0, "sessionId": "fake", "value": {"browserName": "fake"}}
+        elif command == Command.GET_WINDOW_HANDLES:
+            value = ["window-1"]
+        elif command == Command.FIND_ELEMENT:
+            value = {"ELEMENT": params["value"]}
+        elif command == Command.FIND_ELEMENTS:
+            value = [{"ELEMENT": str(i)} for i in range(3)]
+        elif command == Command.GET_ELEMENT_TEXT:
+            value = "row %s" % params["id"]
+
+        return {"status": 0, "sessionId": "fake", "value": value}
+
+
+class ResultsContainer(Container):
+    def _build_elements(self):
+        self.put(Element(self, ID, "search", "search"), True) \
+            .put(ElementList(self, XPATH, "//li", "row"))
+
+    def get_texts(self):
+        return [web_element.text for web_element in self.get("row").get_web_elements()]
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.browser = RowsBrowser()
+        self.driver = WebDriver(self.browser, {})
+        self.web_app = WebApp(self.driver, "http://coolsite.com")
+        self.executor = self.driver.command_executor
+
+    def test_within(self):
+        c = ResultsContainer(self.web_app)
+
+        with korlat_budget(self.web_app, max_commands=10, max_seconds=5) as budget:
+            c.get("search").click()
+
+        self.assertEquals([("ResultsContainer/search", Command.FIND_ELEMENT),
+                           ("ResultsContainer/search", Command.CLICK_ELEMENT)], budget.commands)
+        self.assertFalse(budget.exceeded())
+        self.assertTrue(budget.seconds < 5)
+        self.assertTrue(self.executor is self.driver.command_executor)
+        self.assertEquals([], self.web_app.monitors)
+
+    def test_exceeded(self):
+        c = ResultsContainer(self.web_app)
+
+        with self.assertRaises(BudgetExceeded) as context:
+            with korlat_budget(self.web_app, max_commands=3):
+                self.driver.get("http://coolsite.com")
+                self.assertEquals(["row 0", "row 1", "row 2"], c.get_texts())
+
+        report = str(context.exception).split("\n")
+        self.assertTrue(report[0].startswith("5 commands (max 3) in "))
+        self.assertEquals(["     3  %s %s" % (OUTSIDE, Command.GET_ELEMENT_TEXT),
+                           "     1  %s %s" % (OUTSIDE, Command.GET),
+                           "     1  ResultsContainer/row %s" % Command.FIND_ELEMENTS], report[1:])
+        self.assertTrue(isinstance(context.exception, CheckError))
+        self.assertTrue(self.executor is self.driver.command_executor)
+
+    def test_per_row(self):
+        c = ResultsContainer(self.web_app)
+
+        with korlat_budget(self.web_app) as budget:
+            self.assertEquals(["row (//li)[1]", "row (//li)[2]", "row (//li)[3]"],
+                              [c.get("row")[i].get_text() for i in range(3)])
+
+        # each command is attributed to the row which sent it
+        self.assertEquals([("ResultsContainer/row[%d]" % i, command, 1) for i in range(3)
+                           for command in [Command.FIND_ELEMENT, Command.GET_ELEMENT_TEXT]], budget.breakdown())
+
+    def test_error_first(self):
+        with self.assertRaises(ValueError):
+            with korlat_budget(self.web_app, max_commands=0):
+                self.driver.get("http://coolsite.com")
+                raise ValueError()
+
+    def test_decorator(self):
+        test = self
+
+        class Case(object):
+            def __init__(self, web_app):
+                self.web_app = web_app
+
+            @korlat_budget(max_commands=1)
+            def run(self, clicks):
+                for i in range(clicks):
+                    test.driver.get("http://coolsite.com")
+
+                return clicks
+
+        self.assertEquals(1, Case(self.web_app).run(1))
+
+        with self.assertRaises(BudgetExceeded):
+            Case(self.web_app).run(2)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
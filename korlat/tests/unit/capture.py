@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+import base64
+import gzip
+import json
+from mock import Mock, patch, PropertyMock
+import os
+import shutil
+import tempfile
+from threading import Event
+import unittest
+
+import selenium
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from korlat.abstraction.element import Element
+from korlat.core.capture import FailureCapture, Failure, INDEX_FILE
+from korlat.core.strategy import ID
+from korlat.core.webapp import WebApp
+from korlat.exception import CheckError
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.capture = FailureCapture(self.directory)
+
+        self.mock_driver = Mock()
+        self.mock_driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+        self.mock_driver.window_handles = ["a"]
+        self.mock_driver.get_screenshot_as_base64.return_value = base64.b64encode("png bytes")
+        self.mock_driver.page_source = u"<html>你好</html>"
+        self.mock_driver.get_log.return_value = [{"message": "boom"}]
+        self.web_app = WebApp(self.mock_driver, "http://coolsite.com")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def index(self):
+        with open(os.path.join(self.directory, INDEX_FILE)) as f:
+            return [json.loads(l) for l in f]
+
+    def test_write(self):
+        self.capture.submit(Failure("bad", "test_a", "label", base64.b64encode("png"), u"<html/>", []))
+        self.capture.flush()
+        records = self.index()
+        self.assertEquals(1, len(records))
+        self.assertEquals("test_a", records[0]["test"])
+        self.assertEquals("label", records[0]["element"])
+
+        with open(os.path.join(self.directory, records[0]["screenshot"]), "rb") as f:
+            self.assertEquals("png", f.read())
+
+        f = gzip.open(os.path.join(self.directory, records[0]["source"]))
+        self.assertEquals("<html/>", f.read())
+        f.close()
+
+    def test_source_deduplicated(self):
+        for i in range(5):
+            self.capture.submit(Failure("bad", source=u"<html/>"))
+
+        self.capture.submit(Failure("bad", source=u"<html>different</html>"))
+        self.capture.flush()
+        self.assertEquals(6, len(self.index()))
+        self.assertEquals(2, len([n for n in os.listdir(self.directory) if n.startswith("source-")]))
+
+    def test_bounded_queue(self):
+        capture = FailureCapture(self.directory, queue_size=1)
+        started = Event()
+        release = Event()
+        write = capture._write
+
+        def slow_write(failure):
+            started.set()
+            release.wait()
+            write(failure)
+
+        capture._write = slow_write
+        self.assertTrue(capture.submit(Failure("bad")))
+        started.wait()
+
+        # the worker is stuck on the first, the queue holds one more, the rest are dropped
+        self.assertEquals([True, False, False, False], [capture.submit(Failure("bad")) for i in range(4)])
+        self.assertEquals(3, capture.dropped)
+        release.set()
+        capture.flush()
+        self.assertEquals(2, capture.written)
+
+    def test_write_error(self):
+        write = self.capture._write
+
+        def failing_write(failure):
+            if failure.reason == "unwritable":
+                raise IOError("No space left on device")
+
+            write(failure)
+
+        self.capture._write = failing_write
+        self.capture.submit(Failure("unwritable"))
+        self.capture.submit(Failure("bad"))
+        self.capture.flush()
+        self.assertEquals((1, 1), (self.capture.written, self.capture.failed))
+        # the unwritten failure doesn't take up a number
+        self.assertEquals([("bad", 1)], [(r["reason"], r["n"]) for r in self.index()])
+
+    def test_source_write_error(self):
+        opened = gzip.open
+        paths = []
+
+        def failing_open(path, mode):
+            paths.append(path)
+
+            if len(paths) == 1:
+                raise IOError("No space left on device")
+
+            return opened(path, mode)
+
+        with patch("korlat.core.capture.gzip.open", failing_open):
+            self.capture.submit(Failure("unwritable", source=u"<html/>"))
+            self.capture.submit(Failure("bad", source=u"<html/>"))
+            self.capture.flush()
+
+        records = self.index()
+        self.assertEquals(["bad"], [r["reason"] for r in records])
+        # the record with the same source writes it, rather than pointing at the file that was never written
+        self.assertEquals(2, len(paths))
+        f = gzip.open(os.path.join(self.directory, records[0]["source"]))
+        self.assertEquals("<html/>", f.read())
+        f.close()
+
+    def test_web_app_no_capture(self):
+        self.web_app.capture_failure("bad")
+        self.assertFalse(self.mock_driver.get_screenshot_as_base64.called)
+
+    def test_web_app_capture(self):
+        self.web_app.set_failure_capture(FailureCapture(self.directory, capture_timeouts=True))
+        e = Element(self.web_app, ID, "username", "username")
+
+        with self.assertRaises(CheckError):
+            with self.web_app.capturing_failures("test_login"):
+                self.web_app.capture_failure("timed out", e, timeout=True)
+                raise CheckError("expected to be displayed")
+
+        self.web_app.failure_capture.flush()
+        records = self.index()
+        self.assertEquals(2, len(records))
+        self.assertEquals(["test_login", "test_login"], [r["test"] for r in records])
+        self.assertEquals(["username", None], [r["element"] for r in records])
+        self.assertEquals("CheckError: expected to be displayed", records[1]["reason"])
+        self.assertEquals(records[0]["source"], records[1]["source"])
+        self.assertEquals([{"message": "boom"}], records[0]["logs"])
+
+    def test_web_app_capture_timeouts(self):
+        self.mock_driver.get_log.side_effect = WebDriverException("unsupported")
+        self.web_app.set_failure_capture(self.capture)
+        self.web_app.capture_failure("timed out", timeout=True)
+        self.assertFalse(self.mock_driver.get_screenshot_as_base64.called)
+
+        with self.assertRaises(TimeoutException):
+            with self.web_app.capturing_failures("test_wait"):
+                raise TimeoutException()
+
+        self.web_app.failure_capture.flush()
+        self.assertEquals([None], [r["logs"] for r in self.index()])
+
+    def test_web_app_dead_browser(self):
+        self.mock_driver.get_screenshot_as_base64.side_effect = WebDriverException("no such window")
+        type(self.mock_driver).page_source = PropertyMock(side_effect=WebDriverException("no such window"))
+        self.web_app.set_failure_capture(self.capture)
+
+        # the check failing is what's reported, not the browser
+        with self.assertRaises(CheckError):
+            with self.web_app.capturing_failures("test_dead"):
+                raise CheckError("expected to be displayed")
+
+        self.capture.flush()
+        records = self.index()
+        self.assertEquals([(None, None)], [(r["screenshot"], r["source"]) for r in records])
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
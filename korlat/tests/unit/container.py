@@ -1,11 +1,13 @@
 from mock import Mock
+import pickle
 import unittest
 
 import selenium
 
-from korlat.abstraction.container import Container
+from korlat.abstraction.container import Container, declare, Locator, required
 from korlat.abstraction.element import Element
-from korlat.core.strategy import ID
+from korlat.abstraction.fallback import FallbackElement
+from korlat.core.strategy import ID, XPATH
 from korlat.core.webapp import WebApp
 
 
@@ -32,6 +34,20 @@ class NoRequiredContainer(Container):
             .put(Element(self, ID, "id_2", "id_2"), False)
 
 
+class DeclaredContainer(Container):
+    id_1 = declare(Element, ID, "id_1")
+    id_2 = required(Element, ID, "id_2")
+    id_4 = declare(SimpleElement, ID, "id_4")
+
+
+class MoreDeclaredContainer(DeclaredContainer):
+    id_1 = declare(Element, XPATH, "//input")
+    options = declare(FallbackElement, [(ID, "options"), (XPATH, "//div[@class='options']")])
+
+    def _build_elements(self):
+        self.put(Element(self, ID, "id_3", "id_3"))
+
+
 class Tests(unittest.TestCase):
     def setUp(self):
         self.mock_driver = Mock()
@@ -96,6 +112,60 @@ class Tests(unittest.TestCase):
         with self.assertRaises(AssertionError):
             c.wait_until_visible()
 
+    def test_probes_never_raise(self):
+        self.mock_driver.find_element_by_id.side_effect = selenium.common.exceptions.NoSuchElementException()
+        self.mock_driver.find_elements_by_id.return_value = []
+        c = SimpleContainer(self.web_app)
+
+        self.assertFalse(c.get("id_1").exists())
+        self.assertFalse(c.is_visible())
+        self.assertTrue(c.get("id_1").wait_until_not_exists(.1))
+        self.assertTrue(c.wait_until_not_visible(.1))
+        self.assertFalse(self.mock_driver.find_element_by_id.called)
+
+    def test_declared(self):
+        self.assertEquals(Locator("id_2", Element, (ID, "id_2"), True), DeclaredContainer.id_2)
+        self.assertTrue(DeclaredContainer._locators is DeclaredContainer._locators)
+        c = DeclaredContainer(self.web_app)
+        self.assertEquals({}, c._elements) # nothing is made until used
+
+        e = c.id_1
+        self.assertTrue(e is c.get("id_1"))
+        self.assertEquals((ID, "id_1", "id_1"), (e.strategy, e.get_identifier(), e.label))
+        self.assertTrue(e.container is c and e.web_app is self.web_app)
+        self.assertEquals(1, len(c._elements))
+
+        self.assertEquals([c.id_2], c.get_elements(required=True))
+        self.assertEquals([c.id_4], c.get_elements(SimpleElement))
+        self.assertEquals(3, len(c.get_elements()))
+        # each instance makes its own
+        self.assertFalse(e is DeclaredContainer(self.web_app).id_1)
+
+    def test_declared_inheritance(self):
+        c = MoreDeclaredContainer(self.web_app)
+        self.assertEquals(["id_1", "id_2", "id_3", "id_4", "options"], sorted([e.label for e in c.get_elements()]))
+        self.assertEquals("//input", c.id_1.get_identifier())
+        self.assertEquals(2, len(c.options.candidates))
+        self.assertEquals((ID, "id_1"), DeclaredContainer.id_1.args)
+        self.assertEquals(DeclaredContainer._locators, pickle.loads(pickle.dumps(DeclaredContainer._locators)))
+        self.assertFalse("options" in DeclaredContainer._locators)
+
+        with self.assertRaises(TypeError):
+            DeclaredContainer._locators["options"] = MoreDeclaredContainer.options
+
+    def test_declared_frame(self):
+        frame = Element(self.web_app, ID, "frame")
+        c = DeclaredContainer(self.web_app)
+        e = c.id_1
+        c.set_frame(frame)
+        self.assertEquals((frame,), e.frame)
+        self.assertEquals((frame,), c.id_2.frame)
+
+    def test_declared_hides(self):
+        with self.assertRaises(AssertionError):
+            class BadContainer(Container):
+                get = declare(Element, ID, "get")
+
 
 def suite():
     return unittest.TestLoader().loadTestsFromTestCase(Tests)
@@ -0,0 +1,97 @@
+from mock import Mock
+from time import time
+import unittest
+
+import selenium
+from selenium.common.exceptions import NoSuchElementException
+
+from korlat.abstraction.container import Container
+from korlat.abstraction.element import Element
+from korlat.core.strategy import ID
+from korlat.core.webapp import WebApp
+
+
+class MissingContainer(Container):
+    def _build_elements(self):
+        self.put(Element(self, ID, "missing", "missing"), True)
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.mock_driver = Mock()
+        self.mock_driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+        self.mock_driver.window_handles = ["a"]
+        self.mock_driver.find_element_by_id.side_effect = NoSuchElementException()
+        self.mock_driver.find_elements_by_id.return_value = []
+        self.web_app = WebApp(self.mock_driver, "http://coolsite.com")
+
+    def test_effective_wait(self):
+        self.assertEquals(self.web_app.default_wait, self.web_app.effective_wait())
+        self.assertEquals(3, self.web_app.effective_wait(3))
+
+        with self.web_app.deadline(2):
+            self.assertTrue(self.web_app.effective_wait() <= 2)
+            self.assertEquals(1, self.web_app.effective_wait(1))
+
+            # nested deadlines can't outlast the outer one
+            with self.web_app.deadline(60):
+                self.assertTrue(self.web_app.effective_wait() <= 2)
+
+        self.assertEquals(self.web_app.default_wait, self.web_app.effective_wait())
+
+    def test_shared_budget(self):
+        missing = MissingContainer(self.web_app)
+        started = time()
+
+        with self.web_app.deadline(.5) as deadline:
+            self.assertFalse(missing.wait_until_visible())
+            # the budget is spent, so this is a single evaluation
+            self.assertFalse(missing.wait_until_visible())
+            self.assertFalse(Element(self.web_app, ID, "other").wait_until_exists(5))
+
+        self.assertTrue(time() - started < 1.5)
+        self.assertEquals(["missing wait_until_displayed", "missing wait_until_displayed", "other wait_until_exists"],
+                          [operation for operation, seconds in deadline.spent])
+        self.assertTrue(deadline.spent[0][1] >= .4)
+        self.assertTrue(deadline.spent[1][1] < .2)
+
+        report = deadline.report().split("\n")
+        self.assertEquals(4, len(report))
+        self.assertTrue("over" in report[-1])
+
+    def test_spent_single_evaluation(self):
+        with self.web_app.deadline(.01):
+            while self.web_app.effective_wait() > 0:
+                pass
+
+            e = Element(self.web_app, ID, "e", "e")
+            self.assertTrue(e.wait_until_not_exists())
+
+            self.mock_driver.find_element_by_id.side_effect = None
+            self.mock_driver.find_elements_by_id.return_value = [Mock()]
+            self.assertTrue(e.wait_until_exists())
+            self.assertTrue(e.wait_until_displayed())
+            self.assertFalse(e.wait_until_not_displayed())
+
+    def test_not_displayed_missing(self):
+        e = Element(self.web_app, ID, "e", "e")
+        self.assertTrue(e.wait_until_not_displayed(1, ignore=True))
+
+        with self.assertRaises(NoSuchElementException):
+            e.wait_until_not_displayed(1)
+
+    def test_nested_report(self):
+        with self.web_app.deadline(5) as outer:
+            with self.web_app.deadline(.2) as inner:
+                Element(self.web_app, ID, "a", "a").wait_until_exists()
+
+            self.mock_driver.find_element_by_id.side_effect = None
+            self.mock_driver.find_elements_by_id.return_value = [Mock()]
+            Element(self.web_app, ID, "b", "b").wait_until_exists()
+
+        self.assertEquals(["a wait_until_exists"], [o for o, s in inner.spent])
+        self.assertEquals(["a wait_until_exists", "b wait_until_exists"], [o for o, s in outer.spent])
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
@@ -1,18 +1,27 @@
-from mock import Mock
+from mock import DEFAULT, Mock
+import re
 from time import sleep
 import unittest
 
+import selenium
 from selenium import webdriver
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.keys import Keys
 
 from korlat.abstraction.container import Container
+from korlat.abstraction.element import Element
 from korlat.abstraction.elementlist import ElementList
+from korlat.core.script import COUNT_SCRIPT, FILTER_SCRIPT
 from korlat.core.strategy import ID, TAG, XPATH
 from korlat.core.webapp import WebApp
 from korlat.tests import GUINEA_PIG
 
 
+class RowsContainer(Container):
+    def _build_elements(self):
+        self.put(ElementList(self, TAG, "tr", "rows"))
+
+
 class Tests(unittest.TestCase):
     @classmethod
     def setUpClass(self):
@@ -29,7 +38,145 @@ class Tests(unittest.TestCase):
         self.assertEquals(4, labels.count())
 
 
+class LazyTests(unittest.TestCase):
+    def setUp(self):
+        self.mock_driver = Mock()
+        self.mock_driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+        self.mock_driver.window_handles = ["a"]
+        self.web_app = WebApp(self.mock_driver, "http://coolsite.com")
+
+        self.rows = range(250)
+        self.mock_driver.find_elements_by_xpath.side_effect = self.find_page
+        self.mock_driver.find_elements_by_tag_name.side_effect = lambda t: self.rows
+        self.mock_driver.execute_script.side_effect = lambda script, *args: len(self.rows) if script == COUNT_SCRIPT else DEFAULT
+
+    def find_page(self, xpath):
+        start, stop = re.search(r"position\(\) > (\d+) and position\(\) <= (\d+)", xpath).groups()
+        return self.rows[int(start):int(stop)]
+
+    def test_ith_identifier(self):
+        self.assertEquals("(//tr)[1]", ElementList(self.web_app, TAG, "tr").make_ith_identifier(0))
+        self.assertEquals("(//*[@id='row'])[5]", ElementList(self.web_app, ID, "row").make_ith_identifier(4))
+        self.assertEquals("(//tr[@class='x'])[3]", ElementList(self.web_app, XPATH, "//tr[@class='%s']").set_content("x").make_ith_identifier(2))
+
+        p = Element(self.web_app, ID, "results")
+        rows = ElementList(self.web_app, XPATH, "//tr").set_parent(p)
+        self.assertEquals("(//*[@id='results']//tr)[2]", rows.make_ith_identifier(1))
+
+    def test_getitem(self):
+        rows = ElementList(self.web_app, TAG, "tr", "rows")
+        e = rows[3]
+        self.assertEquals("(//tr)[4]", e.get_identifier())
+        self.assertEquals("rows[3]", e.label)
+        self.assertFalse(self.mock_driver.execute_script.called)
+
+        # negative indices need the count
+        self.assertEquals("(//tr)[250]", rows[-1].get_identifier())
+        self.mock_driver.execute_script.assert_called_once_with(COUNT_SCRIPT, "//tr")
+
+        with self.assertRaises(IndexError):
+            rows[-251]
+
+        # identifiers with a % aren't taken as templates
+        self.assertEquals("(//tr[@width='50%'])[1]", ElementList(self.web_app, XPATH, "//tr[@width='50%%']")[0].get_identifier())
+
+    def test_slice(self):
+        rows = ElementList(self.web_app, TAG, "tr")
+        self.assertEquals(["(//tr)[3]", "(//tr)[5]"], [e.get_identifier() for e in rows[2:6:2]])
+        self.assertFalse(self.mock_driver.execute_script.called)
+        self.assertEquals(["(//tr)[249]", "(//tr)[250]"], [e.get_identifier() for e in rows[-2:]])
+
+    def test_iter_chunks(self):
+        rows = ElementList(self.web_app, TAG, "tr")
+        chunks = rows.iter_chunks(100)
+        self.assertEquals(range(100), chunks.next())
+        # pages are only fetched as they are consumed
+        self.assertEquals(1, self.mock_driver.find_elements_by_xpath.call_count)
+        self.assertEquals([100, 50], [len(c) for c in chunks])
+        self.assertEquals(3, self.mock_driver.find_elements_by_xpath.call_count)
+        self.assertFalse(self.mock_driver.find_elements_by_tag_name.called)
+
+        self.rows = range(200)
+        self.assertEquals([100, 100], [len(c) for c in rows.iter_chunks(100)])
+        self.rows = []
+        self.assertEquals([], list(rows.iter_chunks(100)))
+
+    def test_iter(self):
+        rows = ElementList(self.web_app, TAG, "tr", "rows")
+        elements = list(rows)
+        self.assertEquals(250, len(elements))
+        self.assertTrue(all([isinstance(e, Element) for e in elements]))
+        self.assertEquals(rows[7].get_identifier(), elements[7].get_identifier())
+        self.assertEquals("rows[7]", elements[7].label)
+        # only the count is fetched
+        self.assertFalse(self.mock_driver.find_elements_by_xpath.called)
+
+    def test_container(self):
+        self.mock_driver.execute_script.return_value = [1]
+        c = RowsContainer(self.web_app)
+        rows = c.get("rows")
+        self.assertTrue(rows[0].container is c)
+        self.assertTrue(list(rows)[1].container is c)
+        self.assertTrue(rows.find_first(text="Bob").container is c)
+        self.assertTrue(rows.filter(text="Bob").container is c)
+
+    def test_count(self):
+        rows = ElementList(self.web_app, TAG, "tr")
+        self.assertEquals(250, rows.count())
+        self.assertTrue(rows.exists())
+        # counted in the browser, so no element is fetched
+        self.assertFalse(self.mock_driver.find_elements_by_tag_name.called)
+
+        self.rows = []
+        self.assertEquals(0, rows.count())
+        self.assertFalse(rows.exists())
+        self.assertTrue(rows.wait_until_not_exists(.1))
+
+    def test_filter(self):
+        self.mock_driver.execute_script.return_value = [2, 7]
+        rows = ElementList(self.web_app, TAG, "tr", "rows")
+        bobs = rows.filter(text="Bob", attr={"class": "x"}, displayed=True)
+
+        # a single script call, with the criteria evaluated in the browser
+        self.assertEquals(1, self.mock_driver.execute_script.call_count)
+        script, xpath, criteria, limit = self.mock_driver.execute_script.call_args[0]
+        self.assertEquals(FILTER_SCRIPT, script)
+        self.assertEquals("//tr", xpath)
+        self.assertEquals({"text": "Bob", "attr": {"class": "x"}, "css": None, "displayed": True}, criteria)
+        self.assertIsNone(limit)
+        self.assertFalse(self.mock_driver.find_elements_by_tag_name.called)
+
+        self.assertTrue(isinstance(bobs, ElementList))
+        self.assertEquals("(//tr)[position()=3 or position()=8]", bobs.get_identifier())
+        self.assertEquals("rows(filtered)", bobs.label)
+        self.assertEquals("((//tr)[position()=3 or position()=8])[2]", bobs[1].get_identifier())
+
+        self.mock_driver.execute_script.return_value = []
+        self.assertEquals("(//tr)[false()]", rows.filter(css="tr.x").get_identifier())
+
+    def test_find_first(self):
+        self.mock_driver.execute_script.return_value = [4]
+        rows = ElementList(self.web_app, XPATH, "//tr[@width='50%%']", "rows")
+        e = rows.find_first(text="Bob")
+        self.assertEquals(1, self.mock_driver.execute_script.call_args[0][3])
+        self.assertEquals("(//tr[@width='50%'])[5]", e.get_identifier())
+        self.assertEquals("rows[4]", e.label)
+
+        self.mock_driver.execute_script.return_value = []
+        self.assertIsNone(rows.find_first(text="Alice"))
+
+    def test_filter_frame(self):
+        self.mock_driver.execute_script.return_value = [0]
+        frame = Element(self.web_app, ID, "content")
+        rows = ElementList(self.web_app, TAG, "tr").set_frame(frame)
+        self.assertEquals((frame,), rows.filter(text="Bob").frame)
+        self.assertEquals((frame,), rows.find_first(text="Bob").frame)
+        self.assertTrue(self.mock_driver.switch_to_frame.called)
+
+
 def suite():
-    suite = unittest.TestLoader().loadTestsFromTestCase(Tests)
-    return suite
+    return unittest.TestSuite([
+        unittest.TestLoader().loadTestsFromTestCase(Tests),
+        unittest.TestLoader().loadTestsFromTestCase(LazyTests),
+    ])
 
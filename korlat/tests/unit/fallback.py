@@ -0,0 +1,132 @@
+from mock import Mock
+import os
+import shutil
+import tempfile
+import unittest
+
+import selenium
+from selenium.common.exceptions import NoSuchElementException
+
+from korlat.abstraction.element import Element
+from korlat.abstraction.fallback import FallbackElement
+from korlat.core.locatormemory import LocatorMemory
+from korlat.core.strategy import ID, XPATH
+from korlat.core.webapp import WebApp
+
+
+CANDIDATES = [(ID, "login"), (XPATH, "//form//button[@type='submit']")]
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.mock_driver = Mock()
+        self.mock_driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+        self.mock_driver.window_handles = ["a"]
+        self.mock_driver.find_element_by_id.side_effect = NoSuchElementException()
+        self.mock_driver.find_element_by_xpath.return_value = "button"
+        self.mock_driver.find_elements_by_id.return_value = []
+        self.mock_driver.find_elements_by_xpath.return_value = ["button"]
+        self.web_app = WebApp(self.mock_driver, "http://coolsite.com")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_fallback(self):
+        e = FallbackElement(self.web_app, CANDIDATES, "login")
+        self.assertEquals(ID, e.strategy)
+        self.assertEquals("button", e.get_web_element())
+        self.assertEquals(1, self.mock_driver.find_element_by_id.call_count)
+        self.assertEquals(XPATH, e.strategy)
+        self.assertEquals("//form//button[@type='submit']", e.get_identifier())
+
+        # the winner leads from now on
+        e.get_web_element()
+        self.assertEquals(1, self.mock_driver.find_element_by_id.call_count)
+        self.assertEquals(2, self.mock_driver.find_element_by_xpath.call_count)
+
+    def test_learned_per_web_app(self):
+        FallbackElement(self.web_app, CANDIDATES, "login").get_web_element()
+
+        # a new element with the same candidates starts with the winner
+        e = FallbackElement(self.web_app, CANDIDATES, "login")
+        self.assertEquals(XPATH, e.strategy)
+        e.get_web_element()
+        self.assertEquals(1, self.mock_driver.find_element_by_id.call_count)
+
+        # a different label is learned separately
+        self.assertEquals(ID, FallbackElement(self.web_app, CANDIDATES, "other").strategy)
+
+        # as is a different WebApp
+        other = WebApp(self.mock_driver, "http://coolsite.com")
+        self.assertEquals(ID, FallbackElement(other, CANDIDATES, "login").strategy)
+
+    def test_not_found(self):
+        self.mock_driver.find_element_by_xpath.side_effect = NoSuchElementException()
+        self.mock_driver.find_elements_by_xpath.return_value = []
+        e = FallbackElement(self.web_app, CANDIDATES, "login")
+
+        with self.assertRaises(NoSuchElementException):
+            e.get_web_element()
+
+        self.assertFalse(e.exists())
+        self.assertEquals(ID, e.strategy)
+
+    def test_exists(self):
+        e = FallbackElement(self.web_app, CANDIDATES, "login")
+        self.assertTrue(e.exists())
+        # probed without exceptions, and learned the same way
+        self.assertFalse(self.mock_driver.find_element_by_id.called)
+        self.assertEquals(XPATH, FallbackElement(self.web_app, CANDIDATES, "login").strategy)
+
+    def test_persisted(self):
+        path = os.path.join(self.directory, "locators.json")
+        self.web_app.set_locator_memory(LocatorMemory(path))
+        FallbackElement(self.web_app, CANDIDATES, "login").get_web_element()
+        self.assertTrue(os.path.exists(path))
+
+        # the next run
+        other = WebApp(self.mock_driver, "http://coolsite.com").set_locator_memory(LocatorMemory(path))
+        self.assertEquals(XPATH, FallbackElement(other, CANDIDATES, "login").strategy)
+
+    def test_parent(self):
+        self.mock_driver.find_element_by_id.side_effect = None
+        p = FallbackElement(self.web_app, [(ID, "form"), (XPATH, "//form")], "form")
+        e = Element(self.web_app, XPATH, "/button").set_parent(p)
+        self.assertEquals("//*[@id='form']/button", e.get_identifier())
+
+    def test_parent_fallback(self):
+        # there is no form with the id, only the second candidate finds it
+        found = {"//form/button": "button"}
+
+        def find_element_by_xpath(xpath):
+            if xpath not in found:
+                raise NoSuchElementException(xpath)
+
+            return found[xpath]
+
+        self.mock_driver.find_element_by_xpath.side_effect = find_element_by_xpath
+        self.mock_driver.find_elements_by_xpath.side_effect = lambda xpath: [found[xpath]] if xpath in found else []
+        p = FallbackElement(self.web_app, [(ID, "form"), (XPATH, "//form")], "form")
+        e = Element(self.web_app, XPATH, "/button").set_parent(p)
+
+        self.assertEquals("button", e.get_web_element())
+        self.assertEquals(["//*[@id='form']/button", "//form/button"],
+                          [c[0][0] for c in self.mock_driver.find_element_by_xpath.call_args_list])
+        # the parent learned the winner too
+        self.assertEquals(XPATH, p.strategy)
+        self.assertEquals(XPATH, FallbackElement(self.web_app, [(ID, "form"), (XPATH, "//form")], "form").strategy)
+        self.assertTrue(Element(self.web_app, XPATH, "/button").set_parent(p).exists())
+
+        # nothing finds it: the parent is left as it was
+        del found["//form/button"]
+
+        with self.assertRaises(NoSuchElementException):
+            e.get_web_element()
+
+        self.assertFalse(e.exists())
+        self.assertEquals(XPATH, p.strategy)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
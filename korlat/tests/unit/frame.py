@@ -0,0 +1,94 @@
+from mock import Mock
+import unittest
+
+import selenium
+
+from korlat.abstraction.container import Container
+from korlat.abstraction.element import Element
+from korlat.abstraction.elementlist import ElementList
+from korlat.core.strategy import ID, TAG
+from korlat.core.webapp import WebApp, MAIN_WINDOW
+
+
+class PaymentContainer(Container):
+    def _build_elements(self):
+        self.set_frame(Element(self.web_app, ID, "payment-iframe"))
+        self.put(Element(self, ID, "card-number", "card_number"), True) \
+            .put(ElementList(self, TAG, "input", "inputs"))
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.mock_driver = Mock()
+        self.mock_driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+        self.mock_driver.window_handles = ["a"]
+        self.web_elements = {}
+        self.mock_driver.find_element_by_id.side_effect = self.web_element
+        self.mock_driver.find_element_by_tag_name.side_effect = self.web_element
+        self.web_app = WebApp(self.mock_driver, "http://coolsite.com")
+
+        self.outer = Element(self.web_app, ID, "outer")
+        self.inner = Element(self.web_app, TAG, "iframe")
+        self.nested = Element(self.web_app, ID, "nested").set_frame(self.outer, self.inner)
+        self.top = Element(self.web_app, ID, "top")
+
+    def web_element(self, identifier):
+        return self.web_elements.setdefault("web-element-%s" % identifier, Mock())
+
+    def switches(self):
+        names = dict([(id(v), k) for k, v in self.web_elements.items()])
+        return [(c[0], names[id(c[1][0])] if len(c[1]) > 0 else None) for c in self.mock_driver.method_calls
+                if c[0] in ("switch_to_frame", "switch_to_default_content")]
+
+    def test_set_frame(self):
+        self.assertEquals((self.outer, self.inner), self.nested.frame)
+        self.assertEquals((self.outer,), self.inner.frame)
+        self.assertEquals((), self.outer.frame)
+        self.assertEquals((), self.top.frame)
+
+    def test_switch_cached(self):
+        self.nested.get_web_element()
+        self.nested.get_web_element()
+        self.nested.click()
+        self.assertEquals([("switch_to_frame", "web-element-outer"), ("switch_to_frame", "web-element-iframe")],
+                          self.switches())
+
+    def test_switch_deeper_and_back(self):
+        self.inner.get_web_element()
+        self.nested.get_web_element()
+        self.inner.get_web_element()
+        self.top.get_web_element()
+        self.top.get_web_element()
+        self.assertEquals([("switch_to_frame", "web-element-outer"),
+                           ("switch_to_frame", "web-element-iframe"),
+                           ("switch_to_default_content", None),
+                           ("switch_to_frame", "web-element-outer"),
+                           ("switch_to_default_content", None)],
+                          self.switches())
+
+    def test_window_resets_frame(self):
+        self.nested.get_web_element()
+        self.web_app.use_window(MAIN_WINDOW)
+        self.nested.get_web_element()
+        self.assertEquals(4, len(self.switches()))
+
+        self.web_app.reset_frame()
+        self.top.get_web_element()
+        self.assertEquals(5, len(self.switches()))
+
+    def test_container_frame(self):
+        c = PaymentContainer(self.web_app)
+        self.assertEquals(1, len(c.frame))
+        self.assertEquals(c.frame, c.get("card_number").frame)
+        self.assertEquals(c.frame, c.get("inputs").frame)
+
+        c.get("card_number").send_keys("4111")
+        c.get("inputs").get_web_elements()
+        self.assertEquals([("switch_to_frame", "web-element-payment-iframe")], self.switches())
+
+        c.set_frame()
+        self.assertEquals((), c.get("card_number").frame)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
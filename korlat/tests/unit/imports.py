@@ -0,0 +1,38 @@
+import os
+import sys
+import unittest
+
+from korlat.tools.importtime import check, measure
+
+
+class Tests(unittest.TestCase):
+    def test_lazy(self):
+        seconds, modules = measure("korlat")
+        self.assertEquals(["korlat.lazy"], [m for m in modules if m.startswith("korlat.")])
+
+    def test_no_selenium(self):
+        for module in ["korlat", "korlat.exception", "korlat.common.unique", "korlat.common.util"]:
+            self.assertEquals([], check(module, None)[1], module)
+
+    @unittest.skipUnless(os.environ.get("KORLAT_IMPORT_BUDGET"), "wall clock; set KORLAT_IMPORT_BUDGET (in seconds)")
+    def test_budget(self):
+        budget = float(os.environ["KORLAT_IMPORT_BUDGET"])
+
+        for module in ["korlat", "korlat.common.unique"]:
+            self.assertEquals([], check(module, budget)[1], module)
+
+    def test_problems(self):
+        seconds, problems = check("korlat.core.webapp", 0.000001)
+        self.assertEquals(["took %.3fs (budget 0.000s)" % seconds, "imported selenium"], problems)
+
+    def test_access(self):
+        import korlat
+        self.assertTrue(korlat.common.unique is sys.modules["korlat.common.unique"])
+        self.assertTrue("unique" in dir(korlat.common))
+
+        with self.assertRaises(AttributeError):
+            korlat.common.missing
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
@@ -0,0 +1,121 @@
+from mock import Mock
+import unittest
+
+import selenium
+
+from korlat.abstraction.container import Container
+from korlat.abstraction.element import Element
+from korlat.abstraction.elementlist import ElementList
+from korlat.abstraction.fallback import FallbackElement
+from korlat.abstraction.widget import Widget
+from korlat.core.strategy import ID, TAG, XPATH
+from korlat.core.webapp import WebApp
+from korlat.tools.locatorcost import analyze, classify, format_report, \
+    LEADING_WILDCARD, DESCENDANT, CONTAINS, STARTS_WITH, NEGATION, POSITIONAL
+
+
+LABEL_A = "label-a"
+LABEL_B = "label-b"
+
+
+class LabelContainer(Container):
+    def _build_elements(self):
+        self.put(Element(self, ID, "root", "root"), True) \
+            .put(Element(self, XPATH, "//*[@class='label-class' and not(starts-with(@id, 'bob'))]", "slow_label")) \
+            .put(Element(self, XPATH, "//label[contains(@class, 'label-class')]", "contains_label")) \
+            .put(ElementList(self, XPATH, "//*[@id='root']//label", "labels"))
+
+
+class FormWidget(Widget):
+    def _build_elements(self):
+        self.put(Element(self.web_app, TAG, "label", "label").set_parent(self))
+
+
+class FallbackContainer(Container):
+    def _build_elements(self):
+        self.put(FallbackElement(self, [(ID, "missing"), (ID, "root")], "root"), True) \
+            .put(FormWidget(self, ID, "root", "form"))
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.mock_driver = Mock()
+        self.mock_driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+        self.mock_driver.window_handles = ["a"]
+        self.web_app = WebApp(self.mock_driver, "http://coolsite.com")
+
+        xpaths = {
+            "//*[@class='label-class' and not(starts-with(@id, 'bob'))]": [LABEL_A],
+            "//label[@class='label-class' and not(starts-with(@id, 'bob'))]": [LABEL_A],
+            "//label[contains(@class, 'label-class')]": [LABEL_A, LABEL_B],
+            "//label[@class='label-class']": [LABEL_A, LABEL_B],
+            "//*[@id='root']//label": [LABEL_A, LABEL_B],
+        }
+        self.mock_driver.find_elements_by_xpath.side_effect = lambda xpath: xpaths.get(xpath, [])
+        self.mock_driver.find_elements_by_id.side_effect = lambda i: {"root": ["root"]}.get(i, [])
+        self.mock_driver.find_elements_by_tag_name.side_effect = lambda t: {"label": [LABEL_A, LABEL_B, "label-c"]}.get(t, [])
+        details = {LABEL_A: ["label", "", "label-class"], LABEL_B: ["label", "", "label-class"]}
+        self.mock_driver.execute_script.side_effect = lambda script, nodes: [details[n] for n in nodes]
+
+    def test_classify(self):
+        self.assertEquals([], classify("//label[@class='label-class']"))
+        self.assertEquals([LEADING_WILDCARD], classify("//*[@id='root']"))
+        self.assertEquals([LEADING_WILDCARD, STARTS_WITH, NEGATION],
+                          classify("//*[@class='label-class' and not(starts-with(@id, 'bob'))]"))
+        self.assertEquals([CONTAINS], classify("//label[contains(@class, 'label-class')]"))
+        self.assertEquals([LEADING_WILDCARD, DESCENDANT], classify("//*[@id='root']//label"))
+        self.assertEquals([POSITIONAL], classify("(//tr)[5]"))
+        self.assertEquals([POSITIONAL], classify("//tr[last()]"))
+        self.assertEquals([], classify("/html/body/div"))
+        self.assertEquals([DESCENDANT], classify("/html//div"))
+
+    def test_analyze(self):
+        reports = analyze(LabelContainer(self.web_app), samples=3)
+        self.assertEquals(4, len(reports))
+        self.assertEquals(sorted([r.median() for r in reports], reverse=True), [r.median() for r in reports])
+        reports = dict([(r.label, r) for r in reports])
+
+        self.assertTrue(all([len(r.samples) == 3 for r in reports.values()]))
+        self.assertEquals([], reports["root"].issues)
+        self.assertIsNone(reports["root"].proposal)
+        self.assertEquals(1, reports["root"].matches)
+
+        # the tag is named, but no cheaper construct matches the same nodes
+        self.assertEquals((XPATH, "//label[@class='label-class' and not(starts-with(@id, 'bob'))]"),
+                          reports["slow_label"].proposal)
+        self.assertEquals(3, len(reports["slow_label"].proposal_samples))
+
+        # every matched node has exactly that class
+        self.assertEquals(2, reports["contains_label"].matches)
+        self.assertEquals((XPATH, "//label[@class='label-class']"), reports["contains_label"].proposal)
+
+        # the leading //* is the ancestor, so it must not be rewritten
+        self.assertIsNone(reports["labels"].proposal)
+
+    def test_propose_id(self):
+        self.mock_driver.execute_script.side_effect = lambda script, nodes: [["label", "the-label", "label-class"]]
+        self.mock_driver.find_elements_by_id.side_effect = lambda i: {"the-label": [LABEL_A]}.get(i, [])
+
+        reports = dict([(r.label, r) for r in analyze(LabelContainer(self.web_app), samples=1)])
+        self.assertEquals((ID, "the-label"), reports["slow_label"].proposal)
+
+    def test_fallback_and_widget(self):
+        reports = dict([(r.label, r) for r in analyze(FallbackContainer(self.web_app), samples=1)])
+        self.assertEquals(["form", "form.label", "root[0]", "root[1]"], sorted(reports.keys()))
+        self.assertEquals(((ID, "missing"), 0), ((reports["root[0]"].strategy, reports["root[0]"].identifier),
+                                                 reports["root[0]"].matches))
+        self.assertEquals(((ID, "root"), 1), ((reports["root[1]"].strategy, reports["root[1]"].identifier),
+                                              reports["root[1]"].matches))
+        self.assertEquals((XPATH, "//*[@id='root']//label", 2),
+                          (reports["form.label"].strategy, reports["form.label"].identifier,
+                           reports["form.label"].matches))
+
+    def test_format_report(self):
+        report = format_report(analyze(LabelContainer(self.web_app), samples=1))
+        # header, then root, slow_label (+ issues, proposal), contains_label (+ issues, proposal), labels (+ issues)
+        self.assertEquals(1 + 1 + 3 + 3 + 2, len(report.split("\n")))
+        self.assertTrue("proposal" in report)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
@@ -0,0 +1,103 @@
+from mock import Mock
+import pickle
+import unittest
+
+import selenium
+
+from korlat.abstraction.container import Container, declare, required
+from korlat.abstraction.element import Element
+from korlat.abstraction.elementlist import ElementList
+from korlat.abstraction.fallback import FallbackElement
+from korlat.abstraction.manifest import dumps, export, load
+from korlat.common.objects import Checkbox
+from korlat.common.table import TableWidget
+from korlat.core.strategy import ID, XPATH
+from korlat.core.webapp import WebApp
+
+
+class HomeContainer(Container):
+    welcome = required(Element, ID, "welcome")
+
+
+class LoginContainer(Container):
+    username = required(Element, ID, "username")
+
+    def _build_elements(self):
+        self.set_frame(Element(self.web_app, ID, "login-frame"))
+        form = Element(self, ID, "form")
+        remember = Checkbox(self, ID, "remember", "remember")
+        remember.set_minimum_width(30)
+        self.put(Element(self, XPATH, "/input[@type='submit']", "login").set_parent(form)
+                 .set_link(HomeContainer(self.web_app))) \
+            .put(remember) \
+            .put(ElementList(self, XPATH, "//li[%d]", "errors").set_content(2)) \
+            .put(FallbackElement(self, [(ID, "help"), (XPATH, "//a[@class='help']")], "help")) \
+            .put(TableWidget(self, ID, "history", "history").set_attributes("class"))
+
+
+def mock_web_app():
+    mock_driver = Mock()
+    mock_driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+    mock_driver.window_handles = ["a"]
+    return WebApp(mock_driver, "http://coolsite.com")
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.web_app = mock_web_app()
+        self.other = mock_web_app()
+
+    def test_round_trip(self):
+        original = LoginContainer(self.web_app)
+        original.get("history")._data = {"headers": ["stale"]}
+        manifest = dumps(original)
+        self.assertTrue("\n" not in manifest)
+
+        c = load(pickle.loads(pickle.dumps(manifest)), self.other)
+        self.assertTrue(isinstance(c, LoginContainer))
+        self.assertTrue(c.web_app is self.other)
+        self.assertEquals(sorted(original._elements.keys()), sorted(c._elements.keys()))
+
+        login = c.get("login")
+        self.assertTrue(login.container is c and login.web_app is self.other)
+        self.assertEquals("//*[@id='form']/input[@type='submit']", login.get_identifier())
+        self.assertEquals(("login-frame",), tuple([f.get_identifier() for f in login.frame]))
+        self.assertTrue(login.frame[0] is c.frame[0])
+        self.assertTrue(isinstance(login.link, HomeContainer))
+        self.assertTrue(login.link.web_app is self.other)
+        self.assertTrue(login.link.welcome.web_app is self.other)
+
+        self.assertEquals(original.get("remember").minimum_size, c.get("remember").minimum_size)
+        self.assertEquals("//li[2]", c.get("errors").get_identifier())
+        self.assertEquals([(ID, "help"), (XPATH, "//a[@class='help']")], c.get("help").candidates)
+        self.assertEquals(["class"], c.get("history").attributes)
+        self.assertEquals(None, c.get("history")._data)
+        self.assertEquals([c.username], c.get_elements(required=True))
+
+    def test_no_build(self):
+        manifest = export(LoginContainer(self.web_app))
+        build_elements = LoginContainer.__dict__["_build_elements"]
+        LoginContainer._build_elements = Mock(side_effect=AssertionError())
+
+        try:
+            load(manifest, self.other)
+        finally:
+            LoginContainer._build_elements = build_elements
+
+    def test_declared(self):
+        home = HomeContainer(self.web_app)
+        c = load(dumps(home), self.other)
+        self.assertEquals({}, c._elements)
+        self.assertTrue(c.welcome.web_app is self.other)
+        self.assertEquals([c.welcome], c.get_elements(required=True))
+
+    def test_unexportable(self):
+        c = HomeContainer(self.web_app)
+        c.session = Mock()
+
+        with self.assertRaises(ValueError):
+            export(c)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
@@ -0,0 +1,155 @@
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from mock import Mock
+import socket
+from threading import Event, Thread
+from time import sleep
+import unittest
+import urllib2
+
+import selenium
+from selenium.webdriver.firefox.firefox_profile import FirefoxProfile
+
+from korlat.core.proxy import BLOCK, ResourceProxy, STUB
+from korlat.core.webapp import WebApp
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    bodies = {"/page": "<html>page</html>", "/analytics.js": "x" * 1000, "/?q=1": "root"}
+    released = Event()
+
+    def do_GET(self):
+        if self.path == "/stream":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.write("5\r\nfirst\r\n")
+            last = "last" if self.released.wait(2) else "late"
+            self.wfile.write("4\r\n%s\r\n0\r\n\r\n" % last)
+            return
+
+        body = self.bodies.get(self.path)
+
+        if self.path == "/analytics.js":
+            sleep(.1)
+
+        self.send_response(200 if body is not None else 404)
+        self.send_header("Content-Length", str(len(body or "")))
+        self.send_header("X-Origin", "yes")
+        self.end_headers()
+        self.wfile.write(body or "")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.origin = HTTPServer(("127.0.0.1", 0), OriginHandler)
+        thread = Thread(target=self.origin.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.base = "http://127.0.0.1:%d" % self.origin.server_address[1]
+        self.proxy = ResourceProxy(measure=True) \
+            .block("*/analytics.js") \
+            .block("https://ads.example.com/") \
+            .stub("*/ads.js", "window.ads = [];", "application/javascript") \
+            .start()
+        self.opener = urllib2.build_opener(urllib2.ProxyHandler({"http": "http://" + self.proxy.address()}))
+
+    def tearDown(self):
+        self.proxy.stop()
+        self.origin.shutdown()
+        self.origin.server_close()
+
+    def test_forward(self):
+        response = self.opener.open(self.base + "/page")
+        self.assertEquals("<html>page</html>", response.read())
+        self.assertEquals("yes", response.info().getheader("X-Origin"))
+
+        with self.assertRaises(urllib2.HTTPError) as context:
+            self.opener.open(self.base + "/missing")
+
+        self.assertEquals(404, context.exception.code)
+        self.assertEquals([], self.proxy.stats())
+        self.assertEquals("root", self.opener.open(self.base + "?q=1").read())
+
+    def test_forward_stream(self):
+        OriginHandler.released.clear()
+        response = self.opener.open(self.base + "/stream", timeout=5)
+        # the first chunk is relayed before the origin sends the rest
+        self.assertEquals("first", response.read(5))
+        OriginHandler.released.set()
+        self.assertEquals("last", response.read())
+
+    def test_block_and_stub(self):
+        for i in range(3):
+            response = self.opener.open(self.base + "/analytics.js")
+            self.assertEquals(204, response.getcode())
+            self.assertEquals("", response.read())
+
+        self.assertEquals("window.ads = [];", self.opener.open(self.base + "/ads.js").read())
+
+        stats = self.proxy.wait_for_measurements().stats()
+        self.assertEquals([(self.base + "/analytics.js", BLOCK, 3), (self.base + "/ads.js", STUB, 1)],
+                          [(s.url, s.rule, s.hits) for s in stats])
+        self.assertEquals(3000, stats[0].bytes_saved())
+        self.assertTrue(stats[0].time_saved() >= .3)
+        self.assertEquals(None, stats[1].bytes_saved())
+
+        report = self.proxy.report().split("\n")
+        self.assertEquals(4, len(report))
+        self.assertTrue(report[1].endswith("block %s/analytics.js" % self.base))
+        self.assertTrue(report[-1].endswith("total"))
+
+    def connect(self, host):
+        client = socket.create_connection(("127.0.0.1", self.proxy.port))
+        client.sendall("CONNECT %s HTTP/1.1\r\nHost: %s\r\n\r\n" % (host, host))
+        response = ""
+
+        while not response.endswith("\r\n\r\n"):
+            response += client.recv(1)
+
+        return client, response
+
+    def test_connect(self):
+        client, response = self.connect("ads.example.com:443")
+        self.assertTrue(response.startswith("HTTP/1.1 403"))
+        client.close()
+        self.assertEquals([("https://ads.example.com/", 1)], [(s.url, s.hits) for s in self.proxy.stats()])
+
+        client, response = self.connect("127.0.0.1:%d" % self.origin.server_address[1])
+        self.assertTrue(response.startswith("HTTP/1.1 200"))
+        # tunnelled as is
+        client.sendall("GET /page HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+        received = ""
+
+        while True:
+            data = client.recv(1024)
+
+            if len(data) == 0:
+                break
+
+            received += data
+
+        client.close()
+        self.assertTrue(received.endswith("<html>page</html>"))
+
+    def test_configure(self):
+        profile = self.proxy.configure(FirefoxProfile())
+        self.assertEquals(self.proxy.port, profile.default_preferences["network.proxy.http_port"])
+        self.assertEquals(1, profile.default_preferences["network.proxy.type"])
+
+        mock_driver = Mock()
+        mock_driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+        mock_driver.window_handles = ["a"]
+        web_app = WebApp(mock_driver, "http://coolsite.com")
+        self.assertTrue(web_app.set_resource_proxy(self.proxy).resource_proxy is self.proxy)
+
+        # a proxy started afterwards can't be the one the browser was pointed at
+        with self.assertRaises(AssertionError):
+            web_app.set_resource_proxy(ResourceProxy())
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
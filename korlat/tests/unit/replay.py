@@ -0,0 +1,166 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from korlat.abstraction.container import Container
+from korlat.abstraction.element import Element
+from korlat.core.replay import record, ReplayDriver
+from korlat.core.strategy import ID
+from korlat.core.webapp import WebApp
+from korlat.exception import ReplayDivergence
+
+
+class FakeBrowser(object):
+    """A command executor standing in for a browser with a tiny, static page.
+    """
+    def __init__(self):
+        self.commands = []
+        self.elements = {"username": "1", "login": "2"}
+        self.displayed = {"1": True, "2": False}
+
+    def execute(self, command, params):
+        self.commands += [command]
+        value = None
+
+        if command == Command.NEW_SESSION:
+            return {"status": 0, "sessionId": "fake", "value": {"browserName": "fake"}}
+        elif command == Command.GET_WINDOW_HANDLES:
+            value = ["window-1"]
+        elif command == Command.FIND_ELEMENT:
+            if params["value"] not in self.elements:
+                return {"status": 7, "value": {"message": "Unable to locate element"}}
+
+            value = {"ELEMENT": self.elements[params["value"]]}
+        elif command == Command.FIND_ELEMENTS:
+            value = [{"ELEMENT": self.elements[params["value"]]}] if params["value"] in self.elements else []
+        elif command == Command.IS_ELEMENT_DISPLAYED:
+            value = self.displayed[params["id"]]
+        elif command == Command.GET_ELEMENT_TEXT:
+            value = "text of %s" % params["id"]
+
+        return {"status": 0, "sessionId": "fake", "value": value}
+
+
+class LoginContainer(Container):
+    def _build_elements(self):
+        self.put(Element(self, ID, "username", "username"), True) \
+            .put(Element(self, ID, "login", "login")) \
+            .put(Element(self, ID, "missing", "missing"))
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "login.session")
+        self.browser = FakeBrowser()
+
+        driver = WebDriver(self.browser, {})
+        recording = record(driver, self.path)
+        self.assertEquals(self.browser.commands, [Command.NEW_SESSION])
+        self.run_flow(WebApp(driver, "http://coolsite.com"))
+        driver.quit()
+        recording.close()
+        self.recorded = len(self.browser.commands) - 1
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_flow(self, web_app):
+        web_app.go_to()
+        c = LoginContainer(web_app)
+        results = [c.is_visible(), c.get("login").is_displayed(), c.get("missing").exists()]
+
+        try:
+            c.get("missing").get_web_element()
+        except NoSuchElementException:
+            results += ["not found"]
+
+        c.get("username").send_keys("bob").click()
+        results += [c.get("username").get_text()]
+        return results
+
+    def test_replay(self):
+        driver = ReplayDriver(self.path)
+        self.assertEquals("fake", driver.session_id)
+        self.assertEquals({"browserName": "fake"}, driver.capabilities)
+
+        results = self.run_flow(WebApp(driver, "http://coolsite.com"))
+        self.assertEquals([True, False, False, "not found", "text of 1"], results)
+        driver.quit()
+        driver.command_executor.check_complete()
+        self.assertEquals(self.recorded, driver.command_executor.position)
+
+    def test_recorded_errors_replayed(self):
+        web_app = WebApp(ReplayDriver(self.path), "http://coolsite.com").go_to()
+        c = LoginContainer(web_app)
+        c.is_visible()
+        c.get("login").is_displayed()
+        self.assertFalse(c.get("missing").exists())
+
+        with self.assertRaises(NoSuchElementException):
+            c.get("missing").get_web_element()
+
+    def test_divergence(self):
+        web_app = WebApp(ReplayDriver(self.path), "http://coolsite.com").go_to()
+        c = LoginContainer(web_app)
+
+        with self.assertRaises(ReplayDivergence) as cm:
+            # the recording looked up username first
+            c.get("login").click()
+
+        self.assertEquals(Command.FIND_ELEMENTS, cm.exception.expected[0])
+        self.assertEquals("username", cm.exception.expected[1]["value"])
+        self.assertEquals("login", cm.exception.actual[1]["value"])
+
+    def record_wait(self):
+        path = os.path.join(self.directory, "wait.session")
+        driver = WebDriver(FakeBrowser(), {})
+        recording = record(driver, path)
+        username = LoginContainer(WebApp(driver, "http://coolsite.com").go_to()).get("username")
+        username.wait_until_displayed(1)
+        username.get_text()
+        recording.close()
+        return WebApp(ReplayDriver(path), "http://coolsite.com").go_to()
+
+    def test_repeated_poll(self):
+        web_app = self.record_wait()
+        username = LoginContainer(web_app).get("username")
+        self.assertTrue(username.wait_until_displayed(1))
+        # a wait polling more often than it did is served the same responses
+        self.assertTrue(username.wait_until_displayed(1))
+        self.assertEquals("text of 1", username.get_text())
+        web_app.driver.command_executor.check_complete()
+
+    def test_repeated_outside_wait(self):
+        web_app = self.record_wait()
+        username = LoginContainer(web_app).get("username")
+        self.assertTrue(username.wait_until_displayed(1))
+
+        # only a wait may repeat what it polled with
+        with self.assertRaises(ReplayDivergence):
+            username.exists()
+
+        web_app = self.record_wait()
+        username = LoginContainer(web_app).get("username")
+        username.wait_until_displayed(1)
+        username.get_text()
+
+        # an inserted duplicate is flagged
+        with self.assertRaises(ReplayDivergence):
+            username.get_text()
+
+    def test_incomplete(self):
+        driver = ReplayDriver(self.path)
+        WebApp(driver, "http://coolsite.com").go_to()
+
+        with self.assertRaises(ReplayDivergence):
+            driver.command_executor.check_complete()
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
@@ -0,0 +1,126 @@
+import json
+import os
+import shutil
+from StringIO import StringIO
+import sys
+import tempfile
+from threading import Thread
+from time import sleep
+import unittest
+
+from korlat.tools import shard
+
+
+class Sample(unittest.TestCase):
+    """Tests for the shards to run.
+    """
+    def test_a(self):
+        pass
+
+    def test_b(self):
+        pass
+
+
+class Fixtured(unittest.TestCase):
+    """Tests with an expensive class fixture, for the shards to run.
+    """
+    @classmethod
+    def setUpClass(cls):
+        sleep(.05)
+
+    def test_c(self):
+        pass
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.history_path = os.path.join(self.directory, "durations.json")
+        self.manifest_path = os.path.join(self.directory, "shards.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def history(self, durations):
+        with open(self.history_path, "w") as f:
+            json.dump(durations, f)
+
+        return shard.DurationHistory(self.history_path)
+
+    def test_plan(self):
+        history = self.history({"m.A.slow": 8, "m.B.window": 7, "m.C.a": 3, "m.D.b": 3, "m.E.c": 2, "m.F.d": 2,
+                                "m.G.e": 1})
+        manifest = shard.plan(["m.A.slow", "m.B.window", "m.C.a", "m.D.b", "m.E.c", "m.F.d", "m.G.e"], history, 3)
+
+        self.assertEquals([["m.A.slow", "m.G.e"], ["m.B.window", "m.F.d"], ["m.C.a", "m.D.b", "m.E.c"]],
+                          [s["tests"] for s in manifest["shards"]])
+        self.assertEquals([9, 9, 8], [s["seconds"] for s in manifest["shards"]])
+
+    def test_plan_classes(self):
+        history = self.history({"m.Window.a": 3, "m.Window.b": 3, "m.Window.<fixtures>": 4, "m.A.a": 6, "m.B.a": 5,
+                                "m.C.a": 4})
+        manifest = shard.plan(["m.Window.a", "m.A.a", "m.Window.b", "m.B.a", "m.C.a"], history, 2)
+
+        # the window tests share their fixture, in one shard
+        self.assertEquals([["m.Window.a", "m.Window.b", "m.C.a"], ["m.A.a", "m.B.a"]],
+                          [s["tests"] for s in manifest["shards"]])
+        self.assertEquals([14, 11], [s["seconds"] for s in manifest["shards"]])
+
+    def test_unknown(self):
+        self.assertEquals(shard.DEFAULT_SECONDS, shard.DurationHistory(self.history_path).get("new"))
+        history = self.history({"a": 1, "b": 2, "c": 9, "m.A.<fixtures>": 20})
+        self.assertEquals(2, history.get("new"))
+        self.assertEquals(9, history.get("c"))
+        self.assertEquals(0, history.get("m.B.<fixtures>"))
+
+    def test_update(self):
+        history = self.history({"a": 4})
+        history.update({"a": 2, "b": 1})
+        self.assertEquals({"a": 3, "b": 1}, shard.DurationHistory(self.history_path).durations)
+
+    def test_concurrent_update(self):
+        self.history({})
+        shards = [Thread(target=shard.DurationHistory(self.history_path).update, args=({"test_%d" % i: i},))
+                  for i in range(8)]
+
+        for t in shards:
+            t.start()
+
+        for t in shards:
+            t.join()
+
+        self.assertEquals(8, len(shard.DurationHistory(self.history_path).durations))
+
+    def test_test_ids(self):
+        suite = unittest.TestSuite([unittest.TestLoader().loadTestsFromTestCase(Sample)])
+        self.assertEquals(["korlat.tests.unit.shard.Sample.test_a", "korlat.tests.unit.shard.Sample.test_b"],
+                          shard.test_ids(suite))
+
+    def test_main(self):
+        sys.stdout = StringIO()
+
+        try:
+            self.assertEquals(0, shard.main(["plan", "korlat.tests.unit.shard.Sample",
+                                             "korlat.tests.unit.shard.Fixtured", "--shards", "2",
+                                             "--history", self.history_path, "--manifest", self.manifest_path]))
+            manifest = shard.load_manifest(self.manifest_path)
+            self.assertEquals(2, len(manifest["shards"]))
+            fixtured = [s for s in manifest["shards"] if len(s["tests"]) == 1][0]
+            self.assertEquals(["korlat.tests.unit.shard.Fixtured.test_c"], fixtured["tests"])
+
+            result = shard.run_shard(manifest, fixtured["index"], shard.DurationHistory(self.history_path), StringIO())
+        finally:
+            sys.stdout = sys.__stdout__
+
+        self.assertTrue(result.wasSuccessful())
+        self.assertEquals(1, result.testsRun)
+        durations = shard.DurationHistory(self.history_path).durations
+        self.assertEquals(["korlat.tests.unit.shard.Fixtured.<fixtures>", "korlat.tests.unit.shard.Fixtured.test_c"],
+                          sorted(durations.keys()))
+        # the class fixture is charged to the class, not the test
+        self.assertTrue(durations["korlat.tests.unit.shard.Fixtured.<fixtures>"] >= .05)
+        self.assertTrue(durations["korlat.tests.unit.shard.Fixtured.test_c"] < .05)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
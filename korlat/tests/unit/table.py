@@ -0,0 +1,59 @@
+from mock import Mock
+import unittest
+
+import selenium
+
+from korlat.common.table import TableWidget
+from korlat.core.script import TABLE_SCRIPT
+from korlat.core.strategy import ID
+from korlat.core.webapp import WebApp
+
+
+DATA = {
+    "headers": ["Name", "Age"],
+    "columns": [["Alice", "Bob", "Carol"], ["31", "27", None]],
+    "attributes": {"class": [["odd", "even", "odd"], [None, "old", None]]}
+}
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.mock_driver = Mock()
+        self.mock_driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+        self.mock_driver.window_handles = ["a"]
+        self.mock_driver.find_element_by_id.return_value = "table"
+        self.mock_driver.execute_script.return_value = DATA
+        self.web_app = WebApp(self.mock_driver, "http://coolsite.com")
+
+    def test_single_call(self):
+        t = TableWidget(self.web_app, ID, "results").set_attributes("class")
+        self.assertFalse(self.mock_driver.execute_script.called)
+
+        self.assertEquals(["Name", "Age"], t.get_headers())
+        self.assertEquals(3, t.row_count())
+        self.assertEquals(2, t.column_count())
+        self.assertEquals(["Bob", "27"], t.get_row(1))
+        self.assertEquals("Carol", t.get_cell(2, 0))
+        self.assertEquals("27", t.get_cell(1, "Age"))
+        self.assertIsNone(t.get_cell(2, "Age"))
+        self.assertEquals(["31", "27", None], t.column("Age"))
+        self.assertEquals("old", t.get_cell_attribute(1, "Age", "class"))
+
+        self.mock_driver.execute_script.assert_called_once_with(TABLE_SCRIPT, "table", ["class"])
+        self.assertEquals(1, self.mock_driver.find_element_by_id.call_count)
+
+        with self.assertRaises(KeyError):
+            t.column("Height")
+
+    def test_refresh(self):
+        t = TableWidget(self.web_app, ID, "results")
+        t.get_row(0)
+        self.mock_driver.execute_script.return_value = {"headers": [], "columns": [], "attributes": {}}
+        self.assertEquals(["Alice", "31"], t.get_row(0))
+        self.assertEquals(0, t.refresh().row_count())
+        self.assertEquals(2, self.mock_driver.execute_script.call_count)
+        self.assertEquals([], t.get_headers())
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
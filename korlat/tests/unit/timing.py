@@ -0,0 +1,165 @@
+from mock import Mock
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from StringIO import StringIO
+
+import selenium
+from selenium.common.exceptions import NoSuchElementException
+
+from korlat.abstraction.container import Container
+from korlat.abstraction.element import Element
+from korlat.core.monitor import Monitor
+from korlat.core.strategy import ID
+from korlat.core.timing import load, TimingStore
+from korlat.core.webapp import WebApp
+from korlat.tools import timingreport
+
+
+class LoginContainer(Container):
+    def _build_elements(self):
+        self.put(Element(self, ID, "username", "username"), True) \
+            .put(Element(self, ID, "login", "login"))
+
+
+class ListMonitor(Monitor):
+    def __init__(self):
+        super(ListMonitor, self).__init__()
+        self.records = []
+
+    def record(self, element, kind, operation, started, seconds, outcome):
+        self.records += [(element.label, kind, operation, outcome)]
+
+
+def record(run, label, operation, ms):
+    return {"run": run, "container": "object.Container.LoginContainer", "label": label, "kind": "action",
+            "operation": operation, "ms": ms, "outcome": "ok"}
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "timings.jsonl")
+        self.mock_driver = Mock()
+        self.mock_driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+        self.mock_driver.window_handles = ["a"]
+        self.mock_driver.find_elements_by_id.return_value = [Mock()]
+        self.web_app = WebApp(self.mock_driver, "http://coolsite.com")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_monitored(self):
+        monitor = ListMonitor()
+        self.web_app.add_monitor(monitor)
+        c = LoginContainer(self.web_app)
+
+        c.get("login").click()
+        self.assertTrue(c.wait_until_visible())
+        self.mock_driver.find_elements_by_id.return_value = []
+        self.assertFalse(c.get("login").wait_until_exists(.1))
+        self.mock_driver.find_element_by_id.side_effect = NoSuchElementException()
+
+        with self.assertRaises(NoSuchElementException):
+            c.get("login").click()
+
+        self.mock_driver.find_element_by_id.side_effect = None
+        self.mock_driver.find_element_by_id.return_value.text = "Log in"
+        self.assertEquals("Log in", c.get("login").get_text())
+
+        # the lookups inside a click (or polled by a wait) are part of it
+        self.assertEquals([
+            ("login", "action", "click", "ok"),
+            ("username", "wait", "wait_until_displayed", "ok"),
+            ("login", "wait", "wait_until_exists", "false"),
+            ("login", "action", "click", "NoSuchElementException"),
+            ("login", "read", "get_text", "ok"),
+        ], monitor.records)
+
+        self.web_app.remove_monitor(monitor)
+        c.get("username").exists()
+        self.assertEquals(5, len(monitor.records))
+
+    def test_failing_monitor(self):
+        monitor = ListMonitor()
+        failing = Mock()
+        failing.record.side_effect = ValueError("broken monitor")
+        self.web_app.add_monitor(failing).add_monitor(monitor)
+        self.mock_driver.find_element_by_id.return_value.text = "Log in"
+
+        # neither the result nor the other monitors are affected
+        self.assertEquals("Log in", Element(self.web_app, ID, "login", "login").get_text())
+        self.assertEquals([("login", "read", "get_text", "ok")], monitor.records)
+
+    def test_store(self):
+        store = TimingStore(self.path, run="run-1")
+        self.web_app.add_monitor(store)
+        c = LoginContainer(self.web_app)
+        c.get("login").click()
+        Element(self.web_app, ID, "other").exists()
+        self.assertFalse(os.path.exists(self.path))
+        store.close()
+
+        records = load(self.path)
+        self.assertEquals(2, len(records))
+        self.assertEquals("run-1", records[0]["run"])
+        self.assertEquals("object.Container.LoginContainer", records[0]["container"])
+        self.assertEquals("login", records[0]["label"])
+        self.assertEquals("click", records[0]["operation"])
+        self.assertEquals(None, records[1]["container"])
+        self.assertEquals("other", records[1]["label"])
+
+        # runs append to the same store
+        store = TimingStore(self.path, run="run-2")
+        store.record(c.get("login"), "action", "click", 0, .5, "ok")
+        store.close()
+        self.assertEquals(["run-1", "run-2"], timingreport.runs(load(self.path)))
+        self.assertEquals(500, load(self.path)[-1]["ms"])
+
+    def test_report(self):
+        records = [record("a", "login", "click", ms) for ms in [10, 12, 11]] + \
+                  [record("a", "username", "send_keys", ms) for ms in [40, 50]] + \
+                  [record("b", "login", "click", ms) for ms in [20, 22, 21]] + \
+                  [record("b", "username", "send_keys", ms) for ms in [41, 49]]
+
+        summary = timingreport.summarize(records, "b")
+        self.assertEquals(["send_keys", "click"], [t.operation for t in summary])
+        self.assertEquals(41, summary[0].median())
+        self.assertEquals(49, summary[0].p95())
+
+        found = timingreport.regressions(records, "b", "a")
+        self.assertEquals(1, len(found))
+        self.assertEquals("click", found[0][0].operation)
+        self.assertEquals(11, found[0][1].median())
+
+        self.assertEquals(["send_keys"], [t.operation for t in timingreport.top_offenders(records, "b", 1)])
+
+    def test_main(self):
+        store = TimingStore(self.path, run="a")
+        store.record(Element(self.web_app, ID, "x", "login"), "action", "click", 0, .01, "ok")
+        store.close()
+        store.run = "b"
+        store.record(Element(self.web_app, ID, "x", "login"), "action", "click", 0, .05, "ok")
+        store.close()
+
+        out = StringIO()
+        sys.stdout = out
+        sys.stderr = StringIO()
+
+        try:
+            self.assertEquals(0, timingreport.main([self.path]))
+            self.assertEquals(1, timingreport.main([self.path, "--run", "c"]))
+        finally:
+            sys.stdout = sys.__stdout__
+            sys.stderr = sys.__stderr__
+
+        report = out.getvalue()
+        self.assertTrue("run b" in report)
+        self.assertTrue("regressions against a" in report)
+        self.assertTrue("-/login click" in report)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
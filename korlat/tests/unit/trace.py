@@ -0,0 +1,124 @@
+from mock import Mock
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import selenium
+from selenium.common.exceptions import NoSuchElementException
+
+from korlat.abstraction.container import Container
+from korlat.abstraction.element import Element
+from korlat.core.trace import Tracer, TracingConnection, traced
+from korlat.core.strategy import ID
+from korlat.core.waitdelegate import WaitDelegate
+from korlat.core.webapp import WebApp
+
+
+class LoginContainer(Container):
+    def _build_elements(self):
+        self.put(Element(self, ID, "username", "username"), True) \
+            .put(Element(self, ID, "login", "login"))
+
+    @traced()
+    def log_in(self):
+        self.get("login").click()
+
+
+class NoopDelegate(WaitDelegate):
+    def wait(self):
+        pass
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.mock_driver = Mock()
+        self.mock_driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+        self.mock_driver.window_handles = ["a"]
+        self.mock_driver.find_elements_by_id.return_value = [Mock()]
+        self.web_app = WebApp(self.mock_driver, "http://coolsite.com")
+        self.tracer = Tracer()
+
+    def spans(self):
+        return [(e["cat"], e["name"], e["args"]["outcome"]) for e in self.tracer.events]
+
+    def test_disabled(self):
+        c = LoginContainer(self.web_app)
+        c.log_in()
+        self.assertTrue(c.wait_until_visible())
+        self.assertEquals([], self.web_app.monitors)
+        self.assertEquals([], self.tracer.events)
+
+    def test_spans(self):
+        self.web_app.set_tracer(self.tracer)
+        self.web_app.set_wait_delegate(NoopDelegate())
+        c = LoginContainer(self.web_app)
+
+        with self.web_app.capturing_failures("test_login"):
+            c.log_in()
+            self.assertTrue(c.wait_until_visible())
+
+        self.assertEquals([
+            ("wait_delegate", "NoopDelegate", "ok"),
+            ("action", "login click", "ok"),
+            ("container", "LoginContainer.log_in", "ok"),
+            ("wait_delegate", "NoopDelegate", "ok"),
+            ("wait", "username wait_until_displayed", "ok"),
+            ("container", "LoginContainer.wait_until_visible", "ok"),
+            ("test", "test_login", "ok"),
+        ], self.spans())
+
+        click = self.tracer.events[1]
+        self.assertEquals({"label": "login", "identifier": "login", "container": "LoginContainer", "outcome": "ok"},
+                          click["args"])
+        self.assertEquals("X", click["ph"])
+
+    def test_outcome(self):
+        self.web_app.set_tracer(self.tracer)
+        self.mock_driver.find_elements_by_id.return_value = []
+        self.mock_driver.find_element_by_id.side_effect = NoSuchElementException()
+
+        with self.assertRaises(NoSuchElementException):
+            with self.tracer.span("test_timeout"):
+                Element(self.web_app, ID, "missing").wait_until_displayed(0)
+
+        self.assertEquals([("wait", "missing wait_until_displayed", "NoSuchElementException"),
+                           ("test", "test_timeout", "NoSuchElementException")], self.spans())
+
+    def test_commands(self):
+        executor = self.mock_driver.command_executor
+        self.web_app.set_tracer(self.tracer)
+        self.assertTrue(isinstance(self.mock_driver.command_executor, TracingConnection))
+
+        self.mock_driver.command_executor.execute("getTitle", {})
+        executor.execute.assert_called_once_with("getTitle", {})
+        self.assertEquals([("command", "getTitle", "ok")], self.spans())
+
+        self.web_app.set_tracer(None)
+        self.assertEquals(executor, self.mock_driver.command_executor)
+        self.assertEquals([], self.web_app.monitors)
+
+    def test_save(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            path = os.path.join(directory, "test.trace.json")
+            self.tracer.add("inner", "action", 2, 1)
+            self.tracer.add("outer", "test", 1, 5)
+            self.tracer.add("same start", "container", 2, 3)
+            self.tracer.save(path)
+
+            with open(path) as f:
+                trace = json.load(f)
+
+            self.assertEquals("ms", trace["displayTimeUnit"])
+            self.assertEquals(["outer", "same start", "inner"], [e["name"] for e in trace["traceEvents"]])
+            self.assertEquals(1000000, trace["traceEvents"][0]["ts"])
+            self.assertEquals(5000000, trace["traceEvents"][0]["dur"])
+        finally:
+            shutil.rmtree(directory)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
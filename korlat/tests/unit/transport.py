@@ -0,0 +1,131 @@
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+import json
+from mock import Mock
+from SocketServer import ThreadingMixIn
+from threading import Thread
+import unittest
+
+import selenium
+from selenium.webdriver.remote.command import Command
+
+from korlat.core.transport import PooledConnection
+from korlat.core.webapp import WebApp
+
+
+class StubDriverHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        # one handler instance serves exactly one connection
+        self.server.connections += 1
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.getheader("Content-Length", 0)))
+        self._respond()
+
+    def _respond(self):
+        self.server.requests += [self.path]
+        body = json.dumps({"sessionId": "stub", "status": 0, "value": self.path})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+
+        if self.server.close_connections:
+            self.send_header("Connection", "close")
+
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubDriverServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ("127.0.0.1", 0), StubDriverHandler)
+        self.connections = 0
+        self.requests = []
+        self.close_connections = False
+
+    def url(self):
+        return "http://127.0.0.1:%d/wd/hub" % self.server_address[1]
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.server = StubDriverServer()
+        self.thread = Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.transport = PooledConnection(self.server.url(), resolve_ip=False)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_reused(self):
+        for i in range(10):
+            response = self.transport.execute(Command.GET_TITLE, {"sessionId": "stub"})
+            self.assertEquals("/wd/hub/session/stub/title", response["value"])
+
+        self.assertEquals(10, len(self.server.requests))
+        self.assertEquals(1, self.server.connections)
+        self.assertEquals(1, self.transport.connections_opened)
+
+    def test_server_closed_connection(self):
+        self.server.close_connections = True
+
+        for i in range(3):
+            self.transport.execute(Command.GET_TITLE, {"sessionId": "stub"})
+
+        self.assertEquals(3, self.server.connections)
+        self.server.close_connections = False
+        self.transport.execute(Command.GET_TITLE, {"sessionId": "stub"})
+        self.transport.execute(Command.GET_TITLE, {"sessionId": "stub"})
+        self.assertEquals(4, self.server.connections)
+
+    def test_post_body_cached(self):
+        params = {"sessionId": "stub", "using": "id", "value": "login"}
+
+        for i in range(5):
+            self.transport.execute(Command.FIND_ELEMENT, params)
+
+        self.assertEquals(1, len(self.transport._bodies)) # some glass-box testing
+        self.transport.execute(Command.EXECUTE_SCRIPT, {"sessionId": "stub", "script": "", "args": []})
+        self.assertEquals(1, len(self.transport._bodies)) # un-hashable args aren't cached
+        self.assertEquals(6, len(self.server.requests))
+
+    def test_timings(self):
+        for i in range(4):
+            self.transport.execute(Command.GET_TITLE, {"sessionId": "stub"})
+
+        self.transport.execute(Command.GET_CURRENT_URL, {"sessionId": "stub"})
+        timings = self.transport.get_timings()
+        self.assertEquals(4, timings[Command.GET_TITLE].count)
+        self.assertEquals(1, timings[Command.GET_CURRENT_URL].count)
+        self.assertTrue(timings[Command.GET_TITLE].maximum >= timings[Command.GET_TITLE].mean())
+
+        self.transport.reset_timings()
+        self.assertEquals({}, self.transport.get_timings())
+
+    def test_web_app_transport(self):
+        mock_driver = Mock()
+        mock_driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+        mock_driver.window_handles = ["a"]
+        web_app = WebApp(mock_driver, "http://coolsite.com")
+        self.assertIsNone(web_app.transport)
+
+        self.assertTrue(web_app is web_app.set_transport(self.transport))
+        self.assertTrue(self.transport is web_app.transport)
+        self.assertTrue(self.transport is mock_driver.command_executor)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
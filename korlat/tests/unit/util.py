@@ -5,7 +5,7 @@ from korlat.abstraction.element import Element
 from korlat.core.strategy import ID
 from korlat.core.webapp import WebApp
 from korlat.common.objects import Checkbox
-from korlat.common.util import canonical_class
+from korlat.common.util import canonical_class, percentile
 
 
 class Tests(unittest.TestCase):
@@ -25,6 +25,14 @@ class Tests(unittest.TestCase):
         s = ""
         self.assertEqual(canonical_class(s), "object.basestring.str")
 
+    def test_percentile(self):
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(1, percentile([1], 95))
+        self.assertEqual(2, percentile([4, 1, 3, 2], 50))
+        self.assertEqual(4, percentile([4, 1, 3, 2], 95))
+        self.assertEqual(1, percentile([4, 1, 3, 2], 0))
+        self.assertEqual(95, percentile(range(1, 101), 95))
+
 
 def suite():
     return unittest.TestLoader().loadTestsFromTestCase(Tests)
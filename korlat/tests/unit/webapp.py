@@ -0,0 +1,279 @@
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from mock import Mock
+from threading import Thread
+from time import time
+import unittest
+
+import selenium
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from korlat.abstraction.container import Container
+from korlat.abstraction.element import Element
+from korlat.core.script import GENERATION_SCRIPT
+from korlat.core.strategy import ID
+from korlat.core.webapp import WebApp, INTERACTIVE
+from korlat.exception import CheckError
+
+
+class ReadyContainer(Container):
+    def _build_elements(self):
+        self.put(Element(self, ID, "ready", "ready"), True)
+
+
+class FormContainer(Container):
+    def _build_elements(self):
+        self.put(Element(self, ID, "username", "username"), True) \
+            .put(Element(self, ID, "password", "password"), True)
+
+
+def displayed(container, result):
+    for element in container.get_elements(required=True):
+        element.wait_until_displayed = Mock(return_value=result)
+
+    return container
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = "<html><body><div id='ready'>ready</div></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.mock_driver = Mock()
+        self.mock_driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+        self.mock_driver.window_handles = ["a"]
+        self.web_app = WebApp(self.mock_driver, "http://coolsite.com")
+
+    def test_go_to(self):
+        self.assertTrue(self.web_app is self.web_app.go_to())
+        self.mock_driver.get.assert_called_once_with("http://coolsite.com")
+        self.assertFalse(self.mock_driver.execute_script.called)
+
+    def test_go_to_interactive(self):
+        self.mock_driver.execute_script.return_value = True
+        self.web_app.go_to(ready=INTERACTIVE)
+        self.assertFalse(self.mock_driver.get.called)
+        # one script to navigate, one (or more) to poll for the new document
+        self.assertTrue(self.mock_driver.execute_script.call_count >= 2)
+        navigate = self.mock_driver.execute_script.call_args_list[0][0]
+        self.assertEquals("http://coolsite.com", navigate[1])
+
+    def test_go_to_ready_container(self):
+        self.mock_driver.execute_script.return_value = True
+        ready = displayed(FormContainer(self.web_app), True)
+        self.web_app.go_to(ready=ready, wait_in_seconds=2)
+        self.assertFalse(self.mock_driver.get.called)
+
+        # every required element is waited on, within the one budget
+        for label in ["username", "password"]:
+            wait = ready.get(label).wait_until_displayed
+            self.assertEquals(1, wait.call_count)
+            self.assertTrue(wait.call_args[0][0] <= 2)
+
+        ready.get("password").wait_until_displayed = Mock(return_value=False)
+
+        with self.assertRaises(TimeoutException):
+            self.web_app.go_to(ready=ready, wait_in_seconds=2)
+
+    def test_go_to_never_navigates(self):
+        self.mock_driver.execute_script.return_value = False
+
+        with self.assertRaises(TimeoutException):
+            self.web_app.go_to(ready=INTERACTIVE, wait_in_seconds=.3)
+
+    def test_go_to_unloading(self):
+        # navigate, then poll: the outgoing document fails the script once
+        results = [None, WebDriverException("unloading"), True]
+
+        def execute_script(*args):
+            result = results.pop(0)
+
+            if isinstance(result, Exception):
+                raise result
+
+            return result
+
+        self.mock_driver.execute_script.side_effect = execute_script
+        self.web_app.go_to(ready=INTERACTIVE, wait_in_seconds=2)
+        self.assertEquals([], results)
+
+    def test_go_to_deadline(self):
+        self.mock_driver.execute_script.return_value = False
+        started = time()
+
+        with self.web_app.deadline(.3) as deadline:
+            with self.assertRaises(TimeoutException):
+                self.web_app.go_to(ready=INTERACTIVE)
+
+        self.assertTrue(time() - started < 1.5)
+        self.assertEquals(["go_to"], [o for o, s in deadline.spent])
+
+    def test_go_to_soft(self):
+        self.mock_driver.current_url = "http://coolsite.com/some/page#x"
+        self.mock_driver.execute_script.return_value = True
+        self.web_app.go_to(soft=True)
+        self.assertFalse(self.mock_driver.get.called)
+        self.assertTrue(self.mock_driver.delete_all_cookies.called)
+        self.assertEquals("http://coolsite.com", self.mock_driver.execute_script.call_args[0][1])
+
+    def test_go_to_soft_other_origin(self):
+        self.mock_driver.current_url = "http://othersite.com"
+        self.web_app.go_to(soft=True)
+        self.mock_driver.get.assert_called_once_with("http://coolsite.com")
+        self.assertFalse(self.mock_driver.delete_all_cookies.called)
+
+        self.mock_driver.current_url = "about:blank"
+        self.web_app.go_to(soft=True)
+        self.assertEquals(2, self.mock_driver.get.call_count)
+
+    def test_go_to_soft_state_check(self):
+        self.mock_driver.current_url = "http://coolsite.com"
+        # the url couldn't be restored in place
+        self.mock_driver.execute_script.return_value = False
+        self.web_app.go_to(soft=True)
+        self.assertEquals(1, self.mock_driver.get.call_count)
+
+        # the ready container never showed up
+        self.mock_driver.execute_script.return_value = True
+        ready = displayed(FormContainer(self.web_app), False)
+
+        # falls back to a full navigation, which still doesn't find it
+        with self.assertRaises(TimeoutException):
+            self.web_app.go_to(soft=True, ready=ready, wait_in_seconds=2)
+
+        waits = [e.wait_until_displayed for e in ready.get_elements(required=True)]
+        self.assertEquals([2, 0], [w.call_count for w in waits])
+        self.assertTrue(waits[0].call_args_list[0][0][0] <= 1)
+
+        displayed(ready, True)
+        self.web_app.go_to(soft=True, ready=ready)
+        self.assertEquals([1, 1], [e.wait_until_displayed.call_count for e in ready.get_elements(required=True)])
+
+    def test_go_to_soft_file_origin(self):
+        self.web_app = WebApp(self.mock_driver, "file:///tmp/a.html")
+        self.mock_driver.current_url = "file:///tmp/b.html"
+        self.web_app.go_to(soft=True)
+        self.assertEquals(1, self.mock_driver.get.call_count)
+
+        self.mock_driver.current_url = "file:///tmp/a.html"
+        self.mock_driver.execute_script.return_value = True
+        self.web_app.go_to(soft=True)
+        self.assertEquals(1, self.mock_driver.get.call_count)
+
+    def test_fingerprinting(self):
+        self.generation = "page:0"
+        self.mock_driver.find_elements_by_id.return_value = [Mock()]
+        self.mock_driver.execute_script.side_effect = lambda script: self.generation
+        ready = ReadyContainer(self.web_app)
+
+        # off by default
+        self.assertTrue(ready.is_visible())
+        self.assertTrue(ready.is_visible())
+        self.assertFalse(self.mock_driver.execute_script.called)
+        self.assertEquals(2, self.mock_driver.find_elements_by_id.call_count)
+
+        self.web_app.set_fingerprinting(True)
+        self.assertTrue(ready.wait_until_visible())
+        self.mock_driver.execute_script.assert_called_with(GENERATION_SCRIPT)
+        self.assertEquals(3, self.mock_driver.find_elements_by_id.call_count)
+
+        # nothing changed, so nothing is looked up
+        self.assertTrue(ready.wait_until_visible())
+        self.assertTrue(ReadyContainer(self.web_app).is_visible())
+        self.assertEquals(3, self.mock_driver.find_elements_by_id.call_count)
+
+        # a mutation
+        self.generation = "page:1"
+        self.assertTrue(ready.is_visible())
+        self.assertEquals(4, self.mock_driver.find_elements_by_id.call_count)
+
+        # navigation drops the cache
+        self.web_app.go_to()
+        self.assertTrue(ready.is_visible())
+        self.assertEquals(5, self.mock_driver.find_elements_by_id.call_count)
+
+    def test_fingerprinting_failures(self):
+        self.mock_driver.execute_script.side_effect = lambda script: "page:0"
+        self.web_app.set_fingerprinting(True)
+        ready = ReadyContainer(self.web_app)
+        self.shown = Mock()
+        self.mock_driver.find_elements_by_id.return_value = [self.shown]
+
+        self.shown.is_displayed.return_value = False
+        self.assertFalse(ready.is_visible())
+        self.shown.is_displayed.return_value = True
+        # a failure isn't cached
+        self.assertTrue(ready.is_visible())
+
+        # a page which can't be fingerprinted is always evaluated
+        self.mock_driver.execute_script.side_effect = lambda script: None
+        ready.is_visible()
+        ready.is_visible()
+        self.assertEquals(4, self.mock_driver.find_elements_by_id.call_count)
+
+    def test_fingerprinting_check_appearance(self):
+        self.mock_driver.execute_script.side_effect = lambda script: "page:0"
+        self.web_app.set_fingerprinting(True)
+        ready = ReadyContainer(self.web_app)
+        checked = Element(ready, ID, "checked", "checked")
+        checked.check_appearance = Mock(side_effect=[CheckError("nope"), None, None])
+        ready.put(checked)
+
+        with self.assertRaises(CheckError):
+            ready.check_appearance()
+
+        self.assertEquals(ready, ready.check_appearance())
+        self.assertEquals(ready, ready.check_appearance())
+        self.assertEquals(2, checked.check_appearance.call_count)
+
+
+class BrowserTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.origin = HTTPServer(("127.0.0.1", 0), OriginHandler)
+        thread = Thread(target=self.origin.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.d = webdriver.Firefox()
+
+    @classmethod
+    def tearDownClass(self):
+        self.d.quit()
+        self.origin.shutdown()
+        self.origin.server_close()
+
+    def test_go_to_soft_origin_root(self):
+        # the browser reports this as http://127.0.0.1:port/
+        web_app = WebApp(self.d, "http://127.0.0.1:%d" % self.origin.server_address[1])
+        web_app.go_to()
+        self.d.execute_script("window.__korlat_kept = true; window.history.pushState(null, '', '/some/page');")
+        web_app.go_to(soft=True)
+        # reset in place: the same document, back at the root
+        self.assertTrue(self.d.execute_script("return window.__korlat_kept === true;"))
+        self.assertEquals(web_app.url + "/", self.d.current_url)
+
+    def test_go_to_same_document(self):
+        root = "http://127.0.0.1:%d/" % self.origin.server_address[1]
+        WebApp(self.d, root).go_to()
+        self.d.execute_script("window.__korlat_kept = true;")
+        # only the fragment changes, so there's no new document to wait for
+        WebApp(self.d, root + "#results").go_to(ready=INTERACTIVE, wait_in_seconds=2)
+        self.assertTrue(self.d.execute_script("return window.__korlat_kept === true;"))
+        self.assertEquals(root + "#results", self.d.current_url)
+
+
+def suite():
+    return unittest.TestSuite([
+        unittest.TestLoader().loadTestsFromTestCase(Tests),
+        unittest.TestLoader().loadTestsFromTestCase(BrowserTests),
+    ])
@@ -0,0 +1,143 @@
+from mock import Mock
+import unittest
+
+import selenium
+from selenium.common.exceptions import NoSuchElementException
+
+from korlat.abstraction.container import Container
+from korlat.abstraction.element import Element
+from korlat.abstraction.widget import Widget, CheckableWidget
+from korlat.common.elementbase import AestheticElement
+from korlat.core.script import PROBE_SCRIPT
+from korlat.core.strategy import ID, XPATH
+from korlat.core.webapp import WebApp
+from korlat.exception import CheckError, CheckAtLeastError
+
+
+SHOWN = {"exists": True, "displayed": True, "width": 100, "height": 30}
+HIDDEN = {"exists": True, "displayed": False, "width": 0, "height": 0}
+MISSING = {"exists": False, "displayed": False, "width": 0, "height": 0}
+
+
+class SearchWidget(CheckableWidget):
+    def _build_elements(self):
+        self.put(Element(self.web_app, XPATH, "//input", "textbox").set_parent(self)) \
+            .put(AestheticElement(self.web_app, XPATH, "//button", "button").set_parent(self))
+
+
+class FramedContainer(Container):
+    def _build_elements(self):
+        self.set_frame(Element(self.web_app, ID, "frame"))
+        self.put(SearchWidget(self, ID, "search", "search"))
+
+
+class Tests(unittest.TestCase):
+    def setUp(self):
+        self.mock_driver = Mock()
+        self.mock_driver.__class__ = selenium.webdriver.remote.webdriver.WebDriver
+        self.mock_driver.window_handles = ["a"]
+        self.web_app = WebApp(self.mock_driver, "http://coolsite.com")
+
+        self.page = {
+            "//*[@id='search']": SHOWN,
+            "//*[@id='search']//input": SHOWN,
+            "//*[@id='search']//button": SHOWN,
+        }
+        self.mock_driver.execute_script.side_effect = lambda script, xpaths: [self.page.get(x, MISSING) for x in xpaths]
+
+    def test_elements(self):
+        w = SearchWidget(self.web_app, ID, "search", "search")
+        self.assertEquals(["button", "textbox"], sorted([e.label for e in w.get_elements()]))
+        self.assertEquals([w.get("button")], w.get_elements(AestheticElement))
+
+        with self.assertRaises(KeyError):
+            w.get("nope")
+
+    def test_single_probe(self):
+        w = SearchWidget(self.web_app, ID, "search", "search")
+        self.assertTrue(w.exists())
+        self.assertTrue(w.is_displayed())
+        self.assertEquals(2, self.mock_driver.execute_script.call_count)
+        self.assertFalse(self.mock_driver.find_element_by_id.called)
+        self.assertFalse(self.mock_driver.find_element_by_xpath.called)
+
+        script, xpaths = self.mock_driver.execute_script.call_args[0]
+        self.assertEquals(PROBE_SCRIPT, script)
+        self.assertEquals("//*[@id='search']", xpaths[0])
+        self.assertEquals(3, len(xpaths))
+
+    def test_missing(self):
+        w = SearchWidget(self.web_app, ID, "search", "search")
+        del self.page["//*[@id='search']//button"]
+        self.assertFalse(w.exists())
+        self.assertFalse(w.is_displayed(ignore=True))
+
+        with self.assertRaises(NoSuchElementException):
+            w.is_displayed()
+
+        # and the waits follow
+        self.assertFalse(w.wait_until_exists(.1))
+        self.assertTrue(w.wait_until_not_exists(.1))
+
+    def test_hidden(self):
+        w = SearchWidget(self.web_app, ID, "search", "search")
+        self.page["//*[@id='search']//input"] = HIDDEN
+        self.assertTrue(w.exists())
+        self.assertFalse(w.is_displayed())
+
+    def test_plain_widget(self):
+        w = Widget(self.web_app, ID, "search", "search")
+        self.assertEquals([], w.get_elements())
+        self.assertTrue(w.is_displayed())
+        self.assertEquals(["//*[@id='search']"], self.mock_driver.execute_script.call_args[0][1])
+
+    def test_frames(self):
+        w = SearchWidget(self.web_app, ID, "search", "search")
+        w.get("button").set_frame(Element(self.web_app, ID, "frame"))
+        self.assertTrue(w.exists())
+        # one probe per frame
+        self.assertEquals(2, self.mock_driver.execute_script.call_count)
+
+    def test_framed_container(self):
+        w = FramedContainer(self.web_app).get("search")
+        self.assertEquals(w.frame, w.get("textbox").frame)
+        self.assertEquals(w.frame, w.get("button").frame)
+        self.assertTrue(w.exists())
+
+        # the whole widget is probed at once, inside of the container's frame
+        calls = [c[0] for c in self.mock_driver.method_calls if c[0] in ("switch_to_frame", "execute_script")]
+        self.assertEquals(["switch_to_frame", "execute_script"], calls)
+
+    def test_set_frame(self):
+        c = FramedContainer(self.web_app)
+        w = c.get("search")
+        other = Element(self.web_app, ID, "other")
+        w.get("button").set_frame(other)
+
+        moved = Element(self.web_app, ID, "moved")
+        c.set_frame(moved)
+        self.assertEquals((moved,), w.frame)
+        self.assertEquals((moved,), w.get("textbox").frame)
+        self.assertEquals((other,), w.get("button").frame)
+
+        c.set_frame()
+        self.assertEquals((), w.get("textbox").frame)
+
+    def test_check_appearance(self):
+        w = SearchWidget(self.web_app, ID, "search", "search")
+        self.assertEquals(w, w.check_appearance())
+        self.assertEquals(1, self.mock_driver.execute_script.call_count)
+
+        w.get("button").set_minimum_width(150)
+
+        with self.assertRaises(CheckAtLeastError):
+            w.check_appearance()
+
+        self.page["//*[@id='search']//input"] = HIDDEN
+
+        with self.assertRaises(CheckError):
+            w.check_appearance()
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Tests)
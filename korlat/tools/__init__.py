@@ -0,0 +1,3 @@
+from korlat.lazy import install
+
+install(__name__, ["importtime", "locatorcost", "shard", "startup", "timingreport"])
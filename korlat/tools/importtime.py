@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+BUDGET_IN_SECONDS = 0.5
+"""The default time importing a module (in a fresh interpreter) may take.
+"""
+FORBIDDEN = ["selenium"]
+"""The default packages a module must not import.
+"""
+
+_MEASURE = """
+import json, sys, time
+started = time.time()
+__import__(sys.argv[1])
+print json.dumps([time.time() - started, sorted([k for k, v in sys.modules.items() if v is not None])])
+"""
+
+
+def measure(module, python=sys.executable):
+    """Import a module in a fresh interpreter, and measure it.
+
+    :param module: the module to import (ie: korlat.common.unique.)
+    :type module: str
+    :param python: the interpreter.
+    :type python: str
+    :returns: the (seconds, list of every module loaded) pair.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join([root] + [p for p in [environment.get("PYTHONPATH")] if p])
+    output = subprocess.check_output([python, "-c", _MEASURE, module], env=environment)
+    seconds, modules = json.loads(output.strip().split("\n")[-1])
+    return seconds, modules
+
+
+def check(module, budget=BUDGET_IN_SECONDS, forbidden=FORBIDDEN, python=sys.executable):
+    """Check a module imports within the budget, and without importing the forbidden packages.
+
+    :param module: the module to import.
+    :type module: str
+    :param budget: the seconds the import may take.  if None, the time isn't checked.
+    :type budget: float
+    :param forbidden: the packages which must not be imported.
+    :type forbidden: list
+    :returns: the (seconds, list of problems) pair.  no problems if the module passes.
+    """
+    seconds, modules = measure(module, python)
+    problems = []
+
+    if budget is not None and seconds > budget:
+        problems += ["took %.3fs (budget %.3fs)" % (seconds, budget)]
+
+    for package in forbidden:
+        if any([m == package or m.startswith(package + ".") for m in modules]):
+            problems += ["imported %s" % package]
+
+    return seconds, problems
+
+
+def main(argv=None):
+    """Print the import time of modules, failing when one is over budget or imports a forbidden package.
+
+    python -m korlat.tools.importtime korlat korlat.common.unique --budget 0.5 --forbid selenium
+
+    :param argv: the command line arguments.  if unspecified, sys.argv is used.
+    :type argv: list
+    :returns: the exit status.
+    """
+    parser = argparse.ArgumentParser(description="Measure the import time of modules, each in a fresh interpreter.")
+    parser.add_argument("modules", nargs="+", help="the modules to import")
+    parser.add_argument("--budget", type=float, default=BUDGET_IN_SECONDS, help="the seconds an import may take (default: %(default)s)")
+    parser.add_argument("--forbid", action="append", help="a package the modules must not import (default: %s)" % ", ".join(FORBIDDEN))
+    args = parser.parse_args(argv)
+    failed = False
+
+    for module in args.modules:
+        seconds, problems = check(module, args.budget, args.forbid if args.forbid is not None else FORBIDDEN)
+        failed = failed or len(problems) > 0
+        print "%8.3fs  %s%s" % (seconds, module, "  " + ", ".join(problems) if len(problems) > 0 else "")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+import re
+from time import time
+
+from korlat.abstraction.element import Element
+from korlat.abstraction.widget import Widget
+from korlat.common.util import percentile
+from korlat.core.strategy import ID, TAG, XPATH
+from korlat.exception import UnknownStrategy
+
+
+SAMPLES = 5
+"""The default number of times each locator is timed.
+"""
+
+LEADING_WILDCARD = "leading //*"
+"""The xpath starts by searching every node in the document.
+"""
+DESCENDANT = "descendant step"
+"""The xpath searches a whole subtree (//) past its first step.
+"""
+CONTAINS = "contains()"
+"""The xpath does substring matching.
+"""
+STARTS_WITH = "starts-with()"
+"""The xpath does prefix matching.
+"""
+NEGATION = "not()"
+"""The xpath has a negated predicate.
+"""
+POSITIONAL = "positional predicate"
+"""The xpath selects by position, which is both slow and brittle.
+"""
+
+_CLASSIFIERS = [
+    (LEADING_WILDCARD, re.compile(r"^\(*//\*")),
+    (DESCENDANT, re.compile(r"^\(*//?[^/]+.*//")),
+    (CONTAINS, re.compile(r"contains\s*\(")),
+    (STARTS_WITH, re.compile(r"starts-with\s*\(")),
+    (NEGATION, re.compile(r"not\s*\(")),
+    (POSITIONAL, re.compile(r"\[\s*\d+\s*\]|position\s*\(\s*\)|last\s*\(\s*\)")),
+]
+_STRATEGIES = [ID, TAG, XPATH]
+_FIRST_STEP = re.compile(r"^\(*//(\*|[\w-]+)")
+_CONTAINS_CLASS = re.compile(r"contains\s*\(\s*@class\s*,\s*'([^']+)'\s*\)")
+_NODES_SCRIPT = """
+var out = [];
+for (var i = 0; i < arguments[0].length; i++) {
+    var e = arguments[0][i];
+    out.push([e.tagName.toLowerCase(), e.id, e.getAttribute('class')]);
+}
+return out;
+"""
+
+
+def classify(xpath):
+    """Statically classify the expensive constructs of the xpath
+
+    >>> classify("//*[@class='label-class' and not(starts-with(@id, 'bob'))]")
+    ['leading //*', 'starts-with()', 'not()']
+    >>> classify("//label[@class='label-class']")
+    []
+
+    :param xpath: the xpath to classify.
+    :type xpath: str
+    :returns: the list of expensive constructs found (see the module constants.)
+    """
+    return [name for name, pattern in _CLASSIFIERS if pattern.search(xpath)]
+
+
+class LocatorReport(object):
+    """LocatorReport is the cost analysis of a single Element (or ElementList) locator.
+
+    :var label: the label of the Element.
+    :var strategy: the strategy the Element is located by.
+    :var identifier: the identifier the Element is located by.
+    :var samples: the lookup durations measured, in seconds.
+    :var matches: the number of nodes the locator matched.
+    :var issues: the expensive constructs of the locator (see :func:`classify`.)
+    :var proposal: a cheaper (strategy, identifier) which matches the same nodes.  can be None.
+    :var proposal_samples: the lookup durations measured for the proposal, in seconds.
+    """
+    def __init__(self, label, strategy, identifier):
+        super(LocatorReport, self).__init__()
+        self.label = label
+        self.strategy = strategy
+        self.identifier = identifier
+        self.samples = []
+        self.matches = 0
+        self.issues = []
+        self.proposal = None
+        self.proposal_samples = []
+
+    def median(self):
+        """Get the median lookup duration in seconds.
+        """
+        return percentile(self.samples, 50)
+
+    def p95(self):
+        """Get the 95th percentile lookup duration in seconds.
+        """
+        return percentile(self.samples, 95)
+
+    def __str__(self):
+        out = "%-24s %8.2fms %8.2fms %5d  %s %s" % (self.label, self.median() * 1000, self.p95() * 1000,
+                                                     self.matches, self.strategy, self.identifier)
+
+        if len(self.issues) > 0:
+            out += "\n%-24s issues: %s" % ("", ", ".join(self.issues))
+
+        if self.proposal is not None:
+            out += "\n%-24s proposal (%.2fms): %s %s" % ("", percentile(self.proposal_samples, 50) * 1000,
+                                                          self.proposal[0], self.proposal[1])
+
+        return out
+
+
+def analyze(container, samples=SAMPLES):
+    """Time and classify the locator of every Element and ElementList in the Container, on the live page.
+
+    The sub-Elements of a Widget are analyzed too, labelled "widget.sub-element".  An Element with several ways of
+    being located (a FallbackElement, or one with a FallbackElement parent) has a report for each, labelled
+    "label[i]".  Locators of a strategy which can't be timed here are left out.
+
+    >>> for report in analyze(LoginContainer(web_app)):
+    >>>     print report
+
+    :param container: the Container to analyze (its :class:`WebApp` must be on the relevant page.)
+    :type container: :class:`Container`
+    :param samples: the number of times to time each locator.
+    :type samples: int
+    :returns: the list of :class:`LocatorReport`, slowest (by median) first.
+    """
+    assert samples > 0
+    driver = container.web_app.driver
+    reports = []
+
+    for label, element in _flatten(container.get_elements()):
+        locators = _locators(element)
+        container.web_app.use_frame(element.frame)
+
+        for i, (strategy, identifier) in enumerate(locators):
+            if strategy in _STRATEGIES:
+                reports += [_measure(driver, label if len(locators) == 1 else "%s[%d]" % (label, i), strategy,
+                                     identifier, samples)]
+
+    return sorted(reports, key=lambda r: r.median(), reverse=True)
+
+
+def format_report(reports):
+    """Format the LocatorReports as a ranked table.
+
+    :param reports: the reports, as returned by :func:`analyze`.
+    :type reports: list
+    :returns: the table as a str.
+    """
+    header = "%-24s %10s %10s %5s  %s" % ("label", "median", "p95", "found", "locator")
+    return "\n".join([header] + [str(r) for r in reports])
+
+
+def _flatten(elements, prefix=""):
+    for element in elements:
+        label = prefix + str(element.label)
+        yield label, element
+
+        if isinstance(element, Widget):
+            for pair in _flatten(element.get_elements(), label + "."):
+                yield pair
+
+
+def _locators(element):
+    """Get each (strategy, identifier) the Element (or ElementList) may be located by.
+    """
+    if isinstance(element, Element):
+        alternatives = element._alternatives()
+    elif element.parent is not None:
+        alternatives = element.parent._alternatives()
+    else:
+        alternatives = [None]
+
+    return [(XPATH if element.parent is not None else element.strategy, element.get_identifier()) for _ in alternatives]
+
+
+def _measure(driver, label, strategy, identifier, samples):
+    report = LocatorReport(label, strategy, identifier)
+
+    for i in range(samples):
+        started = time()
+        nodes = _find_all(driver, report.strategy, report.identifier)
+        report.samples += [time() - started]
+
+    report.matches = len(nodes)
+    report.issues = classify(report.identifier) if report.strategy == XPATH else []
+
+    if len(report.issues) > 0 and len(nodes) > 0:
+        report.proposal = _propose(driver, report.identifier, nodes)
+
+        if report.proposal is not None:
+            for i in range(samples):
+                started = time()
+                _find_all(driver, report.proposal[0], report.proposal[1])
+                report.proposal_samples += [time() - started]
+
+    return report
+
+
+def _find_all(driver, strategy, identifier):
+    if strategy == XPATH:
+        return driver.find_elements_by_xpath(identifier)
+    elif strategy == ID:
+        return driver.find_elements_by_id(identifier)
+    elif strategy == TAG:
+        return driver.find_elements_by_tag_name(identifier)
+
+    raise UnknownStrategy(strategy)
+
+
+def _propose(driver, xpath, nodes):
+    """Find the cheapest locator which matches exactly the same nodes.
+    """
+    details = driver.execute_script(_NODES_SCRIPT, nodes)
+    tags = set([d[0] for d in details])
+    candidates = []
+
+    if len(nodes) == 1 and details[0][1]:
+        candidates += [(ID, details[0][1])]
+
+    if len(tags) == 1:
+        tag = tags.pop()
+        candidates += [(TAG, tag)]
+        candidates += [(XPATH, _anchor(xpath, tag, details))]
+
+    for candidate in candidates:
+        if candidate[1] is not None and candidate[1] != xpath and \
+                len(classify(candidate[1]) if candidate[0] == XPATH else []) < len(classify(xpath)) and \
+                _find_all(driver, candidate[0], candidate[1]) == nodes:
+            return candidate
+
+    return None
+
+
+def _anchor(xpath, tag, details):
+    """Rewrite a single step xpath to name the tag it matches, and to compare whole class names where that's equivalent.
+    """
+    if not _single_step(xpath):
+        # the leading //* and its predicates would stand for some ancestor, not the matched nodes
+        return None
+
+    anchored = re.sub(r"^(\(*)//\*", r"\1//%s" % tag, xpath)
+    classes = set([d[2] for d in details])
+
+    for match in _CONTAINS_CLASS.finditer(anchored):
+        if classes == set([match.group(1)]):
+            anchored = anchored.replace(match.group(0), "@class='%s'" % match.group(1))
+
+    return anchored
+
+
+def _single_step(xpath):
+    step = _FIRST_STEP.match(xpath)
+
+    if step is None:
+        return False
+
+    depth = 0
+
+    for c in xpath[step.end():]:
+        if c == "[":
+            depth += 1
+        elif c == "]":
+            depth -= 1
+        elif depth == 0 and c != ")":
+            return False
+
+    return True
@@ -0,0 +1,337 @@
+import argparse
+from contextlib import contextmanager
+import heapq
+import json
+import os
+import sys
+import tempfile
+from time import time
+import unittest
+
+try:
+    import fcntl
+except ImportError:
+    # no advisory locks (ie: on Windows); concurrent shards may then lose each other's updates
+    fcntl = None
+
+from korlat.common.util import percentile
+
+
+DEFAULT_SECONDS = 1.0
+"""The duration assumed for a test when there is no history at all.
+"""
+SMOOTHING = 0.5
+"""The weight of the latest duration against the history, when the history is updated.
+"""
+FIXTURES = "<fixtures>"
+"""The name the class fixtures (setUpClass, tearDownClass and any module fixture) of a TestCase are timed under, as
+though they were one of its tests.
+"""
+
+
+class DurationHistory(object):
+    """DurationHistory is the per-test durations of past runs, kept in a json file.
+
+    A test without history is assumed to take the median of the known durations (or DEFAULT_SECONDS), and class
+    fixtures without history to take nothing.  Each update is smoothed into the history, so a single slow run doesn't
+    skew the plan.
+
+    :param path: the json file of the history.  it doesn't need to exist yet.
+    :type path: str
+
+    :var path: the json file of the history.
+    :var durations: the dict of test id to duration, in seconds.
+    """
+    def __init__(self, path):
+        super(DurationHistory, self).__init__()
+        self.path = path
+        self.durations = _read(path)
+
+    def get(self, test_id):
+        """Get the expected duration of a test.
+
+        :param test_id: the id of the test (see id() from :class:`unittest.TestCase`.)
+        :type test_id: str
+        :returns: the expected seconds.
+        """
+        if test_id in self.durations:
+            return self.durations[test_id]
+        elif _is_fixtures(test_id):
+            return 0.0
+
+        known = [seconds for t, seconds in self.durations.items() if not _is_fixtures(t)]
+        return percentile(known, 50) if len(known) > 0 else DEFAULT_SECONDS
+
+    def update(self, durations):
+        """Update the history with the durations of a run, and save it.
+
+        The update is merged under a lock (shards finishing together would otherwise overwrite each other's): the
+        file is re-read, then replaced atomically.
+
+        :param durations: the dict of test id to the seconds it took.
+        :type durations: dict
+        :returns: this DurationHistory.
+        """
+        with _locked(self.path + ".lock"):
+            self.durations = _read(self.path)
+
+            for test_id, seconds in durations.items():
+                previous = self.durations.get(test_id)
+                self.durations[test_id] = seconds if previous is None else \
+                    SMOOTHING * seconds + (1 - SMOOTHING) * previous
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            handle, temporary = tempfile.mkstemp(dir=directory)
+
+            with os.fdopen(handle, "w") as f:
+                json.dump(self.durations, f, indent=0, sort_keys=True)
+
+            os.rename(temporary, self.path)
+
+        return self
+
+
+class TimedResult(unittest.TextTestResult):
+    """TimedResult is a test result which measures how long each test takes.
+
+    The class fixtures are timed too, when the tests are run by a :class:`TimedSuite`.
+
+    :var durations: the dict of test id (or fixtures id, see :func:`fixtures_id`) to the seconds it took.
+    """
+    def __init__(self, *args, **kwargs):
+        super(TimedResult, self).__init__(*args, **kwargs)
+        self.durations = {}
+        self._started = None
+
+    def startTest(self, test):
+        self._started = time()
+        super(TimedResult, self).startTest(test)
+
+    def stopTest(self, test):
+        super(TimedResult, self).stopTest(test)
+        self.durations[test.id()] = time() - self._started
+
+
+class TimedSuite(unittest.TestSuite):
+    """TimedSuite is a flat test suite which charges the time of the class (and module) fixtures to the TestCase class
+    they run for, in the durations of its :class:`TimedResult`.
+
+    :param tests: the tests.
+    :type tests: list
+    """
+    def _handleModuleFixture(self, test, result):
+        with _charged(result, test.__class__):
+            super(TimedSuite, self)._handleModuleFixture(test, result)
+
+    def _handleClassSetUp(self, test, result):
+        with _charged(result, test.__class__):
+            super(TimedSuite, self)._handleClassSetUp(test, result)
+
+    def _tearDownPreviousClass(self, test, result):
+        with _charged(result, getattr(result, "_previousTestClass", None)):
+            super(TimedSuite, self)._tearDownPreviousClass(test, result)
+
+    def _handleModuleTearDown(self, result):
+        with _charged(result, getattr(result, "_previousTestClass", None)):
+            super(TimedSuite, self)._handleModuleTearDown(result)
+
+
+def fixtures_id(class_id):
+    """Get the id the class fixtures of a TestCase class are timed under.
+
+    :param class_id: the id of the class (see :func:`test_class`.)
+    :type class_id: str
+    :returns: the fixtures id (ie: module.Class.<fixtures>.)
+    """
+    return "%s.%s" % (class_id, FIXTURES)
+
+
+def test_class(test_id):
+    """Get the TestCase class of a test.
+
+    :param test_id: the id of the test.
+    :type test_id: str
+    :returns: the id of the class (ie: module.Class.)
+    """
+    return test_id.rsplit(".", 1)[0] if "." in test_id else test_id
+
+
+def test_ids(suite):
+    """Get the id of every test in a suite.
+
+    :param suite: the suite (or test.)
+    :type suite: :class:`unittest.TestSuite`
+    :returns: the list of test ids, in the order they would run.
+    """
+    if isinstance(suite, unittest.TestSuite):
+        return [test_id for test in suite for test_id in test_ids(test)]
+
+    return [suite.id()]
+
+
+def plan(tests, history, shards):
+    """Pack the tests into balanced shards, longest expected duration first.
+
+    The tests of a TestCase class stay together, so its class fixtures (ie: a browser launched in setUpClass) run in a
+    single shard.  Each class, from the longest (its tests and fixtures) to the shortest, goes to the shard expected to
+    finish first (LPT scheduling.)
+
+    :param tests: the test ids.
+    :type tests: list
+    :param history: the durations to expect.
+    :type history: :class:`DurationHistory`
+    :param shards: the number of shards.
+    :type shards: int
+    :returns: the manifest: a dict of "shards", each a dict of "index", "seconds" (expected) and "tests".
+    """
+    assert shards > 0
+    manifest = [{"index": i, "seconds": 0.0, "tests": []} for i in range(shards)]
+    # (expected seconds, index) of each shard, the first to finish on top
+    loads = [(0.0, i) for i in range(shards)]
+    classes = {}
+
+    for test_id in tests:
+        members = classes.setdefault(test_class(test_id), [])
+
+        if test_id not in members:
+            members += [test_id]
+
+    expected = [(sum([history.get(t) for t in members]) + history.get(fixtures_id(c)), c, members)
+                for c, members in classes.items()]
+
+    for seconds, c, members in sorted(expected, key=lambda e: (-e[0], e[1])):
+        load, i = heapq.heappop(loads)
+        manifest[i]["tests"] += members
+        manifest[i]["seconds"] += seconds
+        heapq.heappush(loads, (load + seconds, i))
+
+    return {"shards": manifest}
+
+
+def write_manifest(manifest, path):
+    """Write a shard manifest (see :func:`plan`) as json.
+
+    :returns: the manifest.
+    """
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    return manifest
+
+
+def load_manifest(path):
+    """Read a shard manifest written by :func:`write_manifest`.
+
+    :returns: the manifest.
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+def run_shard(manifest, index, history=None, stream=sys.stderr, verbosity=1):
+    """Run one shard of a manifest, and update the history with its durations.
+
+    :param manifest: the manifest (see :func:`plan`.)
+    :type manifest: dict
+    :param index: the index of the shard to run.
+    :type index: int
+    :param history: the history to update once the shard has run.  can be None.
+    :type history: :class:`DurationHistory`
+    :returns: the :class:`TimedResult`.
+    """
+    tests = manifest["shards"][index]["tests"]
+    suite = TimedSuite(_flatten(unittest.TestLoader().loadTestsFromNames([str(t) for t in tests])))
+    result = unittest.TextTestRunner(stream=stream, verbosity=verbosity, resultclass=TimedResult).run(suite)
+
+    if history is not None:
+        history.update(result.durations)
+
+    return result
+
+
+def main(argv=None):
+    """Plan shards, or run one.
+
+    python -m korlat.tools.shard plan korlat.tests.all_unit --shards 4 --history durations.json --manifest shards.json
+    python -m korlat.tools.shard run shards.json 2 --history durations.json
+
+    :param argv: the command line arguments.  if unspecified, sys.argv is used.
+    :type argv: list
+    :returns: the exit status.
+    """
+    parser = argparse.ArgumentParser(description="Split test suites into shards balanced by duration.")
+    commands = parser.add_subparsers(dest="command")
+    planning = commands.add_parser("plan", help="write a shard manifest")
+    planning.add_argument("names", nargs="+", help="the suites (or modules, classes, tests) to shard")
+    planning.add_argument("--shards", type=int, required=True, help="the number of shards")
+    planning.add_argument("--history", required=True, help="the duration history file")
+    planning.add_argument("--manifest", required=True, help="the manifest file to write")
+    running = commands.add_parser("run", help="run a shard, and update the duration history")
+    running.add_argument("manifest", help="the manifest file")
+    running.add_argument("index", type=int, help="the shard to run")
+    running.add_argument("--history", help="the duration history file to update")
+    args = parser.parse_args(argv)
+
+    if args.command == "plan":
+        manifest = plan(test_ids(unittest.TestLoader().loadTestsFromNames(args.names)),
+                        DurationHistory(args.history), args.shards)
+        write_manifest(manifest, args.manifest)
+
+        for shard in manifest["shards"]:
+            print "shard %d: %d tests, %.1fs expected" % (shard["index"], len(shard["tests"]), shard["seconds"])
+
+        return 0
+
+    history = DurationHistory(args.history) if args.history is not None else None
+    result = run_shard(load_manifest(args.manifest), args.index, history)
+    return 0 if result.wasSuccessful() else 1
+
+
+def _is_fixtures(test_id):
+    return test_id.endswith("." + FIXTURES)
+
+
+def _flatten(suite):
+    if isinstance(suite, unittest.TestSuite):
+        return [test for member in suite for test in _flatten(member)]
+
+    return [suite]
+
+
+@contextmanager
+def _charged(result, clss):
+    started = time()
+
+    try:
+        yield
+    finally:
+        durations = getattr(result, "durations", None)
+
+        if durations is not None and clss is not None:
+            key = fixtures_id("%s.%s" % (clss.__module__, clss.__name__))
+            durations[key] = durations.get(key, 0.0) + time() - started
+
+
+@contextmanager
+def _locked(path):
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _read(path):
+    if not os.path.exists(path):
+        return {}
+
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
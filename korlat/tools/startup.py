@@ -0,0 +1,77 @@
+import argparse
+import sys
+
+from selenium import webdriver
+
+from korlat.common.util import percentile
+from korlat.core.browser import benchmark, DriverFactory, ProfileTemplate
+
+
+RUNS = 5
+"""The default number of browsers timed per mode.
+"""
+PAUSE = 5
+"""The default seconds between browsers, standing in for a test.
+"""
+
+
+def compare(url, runs=RUNS, pause=PAUSE):
+    """Benchmark launch-to-first-go_to latency of a plain launch, a templated launch and a prewarmed launch.
+
+    :param url: the URL to go_to().
+    :type url: str
+    :param runs: the number of browsers to time per mode.
+    :type runs: int
+    :param pause: the seconds between browsers.
+    :type pause: int or float
+    :returns: the list of (mode, latencies) pairs.
+    """
+    results = [("plain", benchmark(webdriver.Firefox, url, runs, pause))]
+    template = ProfileTemplate()
+
+    try:
+        results += [("template", benchmark(DriverFactory(template, prewarm=False).get, url, runs, pause))]
+        factory = DriverFactory(template)
+
+        try:
+            results += [("prewarmed", benchmark(factory.get, url, runs, pause))]
+        finally:
+            factory.close()
+    finally:
+        template.remove()
+
+    return results
+
+
+def format_report(results):
+    """Format the latencies of each mode.
+
+    :param results: the list of (mode, latencies) pairs, as from :func:`compare`.
+    :type results: list
+    :returns: the report as a str.
+    """
+    lines = ["%-10s %10s %10s %6s" % ("mode", "p50 s", "p95 s", "runs")]
+    lines += ["%-10s %10.3f %10.3f %6d" % (mode, percentile(l, 50), percentile(l, 95), len(l)) for mode, l in results]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Print the browser startup benchmark.
+
+    python -m korlat.tools.startup http://coolsite.com --runs 5 --pause 5
+
+    :param argv: the command line arguments.  if unspecified, sys.argv is used.
+    :type argv: list
+    :returns: the exit status.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark browser launch-to-first-go_to latency.")
+    parser.add_argument("url", help="the url to go to")
+    parser.add_argument("--runs", type=int, default=RUNS, help="the browsers timed per mode (default: %(default)s)")
+    parser.add_argument("--pause", type=float, default=PAUSE, help="the seconds between browsers (default: %(default)s)")
+    args = parser.parse_args(argv)
+    print format_report(compare(args.url, args.runs, args.pause))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
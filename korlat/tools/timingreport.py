@@ -0,0 +1,194 @@
+import argparse
+import sys
+
+from korlat.common.util import percentile
+from korlat.core.timing import load
+
+
+THRESHOLD = 1.2
+"""The default ratio of median durations (run over baseline) reported as a regression.
+"""
+TOP = 10
+"""The default number of top offenders reported.
+"""
+
+
+class OperationTiming(object):
+    """OperationTiming is every duration of one operation on one Element, within a run.
+
+    :var container: the canonical class of the Element's :class:`Container`.  can be None.
+    :var label: the label (or identifier) of the Element.
+    :var operation: the operation (ie: click.)
+    :var samples: the durations, in milliseconds.
+    """
+    def __init__(self, container, label, operation):
+        super(OperationTiming, self).__init__()
+        self.container = container
+        self.label = label
+        self.operation = operation
+        self.samples = []
+
+    def key(self):
+        """Get the (container, label, operation) this timing is of.
+        """
+        return (self.container, self.label, self.operation)
+
+    def median(self):
+        """Get the median duration in milliseconds.
+        """
+        return percentile(self.samples, 50)
+
+    def p95(self):
+        """Get the 95th percentile duration in milliseconds.
+        """
+        return percentile(self.samples, 95)
+
+    def total(self):
+        """Get the total duration in milliseconds.
+        """
+        return sum(self.samples)
+
+    def name(self):
+        """Get the short, readable name of the operation: Container/label operation.
+        """
+        container = self.container.split(".")[-1] if self.container is not None else "-"
+        return "%s/%s %s" % (container, self.label, self.operation)
+
+
+def runs(records):
+    """Get the runs in the store, oldest first.
+
+    :param records: the records, as loaded by :func:`korlat.core.timing.load`.
+    :type records: list
+    :returns: the list of run names.
+    """
+    seen = []
+
+    for record in records:
+        if record["run"] not in seen:
+            seen += [record["run"]]
+
+    return seen
+
+
+def summarize(records, run):
+    """Group the durations of a run by Element and operation.
+
+    :param records: the records, as loaded by :func:`korlat.core.timing.load`.
+    :type records: list
+    :param run: the run to summarize.
+    :type run: str
+    :returns: the list of :class:`OperationTiming`, slowest (by median) first.
+    """
+    timings = {}
+
+    for record in records:
+        if record["run"] == run:
+            key = (record["container"], record["label"], record["operation"])
+
+            if key not in timings:
+                timings[key] = OperationTiming(*key)
+
+            timings[key].samples += [record["ms"]]
+
+    return sorted(timings.values(), key=lambda t: t.median(), reverse=True)
+
+
+def regressions(records, run, baseline, threshold=THRESHOLD):
+    """Find the operations whose median got slower than the baseline's by more than the threshold.
+
+    :param records: the records, as loaded by :func:`korlat.core.timing.load`.
+    :type records: list
+    :param run: the run to compare.
+    :type run: str
+    :param baseline: the run to compare against.
+    :type baseline: str
+    :param threshold: the ratio of medians (run over baseline) above which an operation has regressed.
+    :type threshold: float
+    :returns: the list of (:class:`OperationTiming` of the run, :class:`OperationTiming` of the baseline), worst first.
+    """
+    base = dict([(t.key(), t) for t in summarize(records, baseline)])
+    found = []
+
+    for timing in summarize(records, run):
+        before = base.get(timing.key())
+
+        if before is not None and timing.median() > before.median() * threshold:
+            found += [(timing, before)]
+
+    return sorted(found, key=lambda pair: pair[0].median() / max(pair[1].median(), 0.01), reverse=True)
+
+
+def top_offenders(records, run, top=TOP):
+    """Find the operations which took the most time in total.
+
+    :param records: the records, as loaded by :func:`korlat.core.timing.load`.
+    :type records: list
+    :param run: the run to look at.
+    :type run: str
+    :param top: the number of operations to return.
+    :type top: int
+    :returns: the list of :class:`OperationTiming`, most total time first.
+    """
+    return sorted(summarize(records, run), key=lambda t: t.total(), reverse=True)[:top]
+
+
+def format_report(records, run, baseline=None, threshold=THRESHOLD, top=TOP):
+    """Format the per operation percentiles, the regressions and the top offenders of a run.
+
+    :returns: the report as a str.
+    """
+    lines = ["run %s" % run, "", "%10s %10s %6s  %s" % ("p50 ms", "p95 ms", "count", "operation")]
+    lines += ["%10.2f %10.2f %6d  %s" % (t.median(), t.p95(), len(t.samples), t.name()) for t in summarize(records, run)]
+
+    if baseline is not None:
+        lines += ["", "regressions against %s (over %.2fx)" % (baseline, threshold)]
+        lines += ["%10.2f -> %8.2f %5.2fx  %s" % (b.median(), t.median(), t.median() / max(b.median(), 0.01), t.name())
+                  for t, b in regressions(records, run, baseline, threshold)]
+
+    lines += ["", "top %d by total time" % top]
+    lines += ["%10.2f ms %6d  %s" % (t.total(), len(t.samples), t.name()) for t in top_offenders(records, run, top)]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Print the report of a timing store (see :class:`korlat.core.timing.TimingStore`.)
+
+    python -m korlat.tools.timingreport /var/korlat/timings.jsonl --baseline release-1.3 --top 10
+
+    :param argv: the command line arguments.  if unspecified, sys.argv is used.
+    :type argv: list
+    :returns: the exit status.
+    """
+    parser = argparse.ArgumentParser(description="Report on a korlat timing store.")
+    parser.add_argument("path", help="the timing store file")
+    parser.add_argument("--run", help="the run to report on (default: the latest)")
+    parser.add_argument("--baseline", help="the run to compare against (default: the one before --run)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="the regression ratio (default: %(default)s)")
+    parser.add_argument("--top", type=int, default=TOP, help="the number of top offenders (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    records = load(args.path)
+    names = runs(records)
+
+    if len(names) == 0:
+        print >> sys.stderr, "no timings in %s" % args.path
+        return 1
+
+    run = args.run if args.run is not None else names[-1]
+
+    if run not in names:
+        print >> sys.stderr, "no run %s in %s" % (run, args.path)
+        return 1
+
+    baseline = args.baseline
+
+    if baseline is None and names.index(run) > 0:
+        baseline = names[names.index(run) - 1]
+
+    print format_report(records, run, baseline, args.threshold, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
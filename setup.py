@@ -7,5 +7,6 @@ setup(
               "korlat.core",
               "korlat.abstraction",
               "korlat.common",
+              "korlat.tools",
               "korlat.tests.unit"],
 )